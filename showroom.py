@@ -56,7 +56,7 @@ def run_showroom():
     grade_result = guardian.calculate_resale_grade(event)
 
     # Run Tax Logic
-    reg_engine = RegulatoryEngine(rulepack_version="2024.1")
+    reg_engine = RegulatoryEngine(rulepack_version="2025.1.0")
     # Hard-coded date to demonstrate 2024 service year phase-out rule
     # Note: evaluate_us_macrs_2026 takes (basis, date, business_use_percent)
     tax_result = reg_engine.evaluate_us_macrs_2026(cost, "2024-06-01", 100)
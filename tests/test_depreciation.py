@@ -0,0 +1,41 @@
+import pytest
+from voltyield_ledger_core.regulatory import RegulatoryEngine
+
+def test_half_year_schedule_with_179_and_bonus():
+    engine = RegulatoryEngine("2025.1.0")
+    asset = {"id": "A", "cost_minor": 8500000, "weight_lbs": 6500, "date_service": "2024-03-15"}
+    schedules = engine.depreciation_schedules([8500000, 1000000], [6500, 20000], ["2024-03-15", "2024-05-01"], [100, 100])
+    report = engine.evaluate_all(asset)
+
+    assert schedules.first_year == 2024 and schedules.mid_quarter_years == []
+    row = schedules.row(0)
+    # Year one is exactly what evaluate_all reports; the rest follows Pub 946 Table A-1 (5-year).
+    assert row[0] == report["total_deduction_first_year"] + (8500000 - report["total_deduction_first_year"]) * 2000 // 10000
+    assert sum(row) == 8500000
+    assert schedules.row(1)[:6] == [600000 + 80000, 128000, 76800, 46080, 46080, 23040]
+    assert schedules.year_totals()[2025] == row[1] + 128000
+
+def test_mid_quarter_when_q4_exceeds_forty_percent():
+    engine = RegulatoryEngine("2025.1.0")
+    schedules = engine.depreciation_schedules([1000000, 2000000], [20000, 20000], ["2023-02-01", "2023-11-20"], [100, 100])
+    assert schedules.mid_quarter_years == [2023]
+    # 80% bonus, then Table A-2 (Q1) and A-5 (Q4) on the remaining 20%.
+    assert schedules.row(0)[:2] == [800000 + 70000, 52000]
+    assert schedules.row(1)[:2] == [1600000 + 20000, 152000]
+    forced = engine.depreciation_schedules([1000000], [20000], ["2023-02-01"], [100], convention="HALF_YEAR")
+    assert forced.row(0)[0] == 800000 + 40000
+
+def test_ads_and_business_use_recapture():
+    engine = RegulatoryEngine("2025.1.0")
+    schedules = engine.depreciation_schedules([1000000, 1000000], [20000, 20000], ["2024-03-01", "2024-03-01"], [40, 100],
+                                              business_use_changes={1: (2026, 30)})
+    # At 50% business use or less, ADS straight line over five years with no 179 or bonus.
+    assert schedules.row(0)[:6] == [40000, 80000, 80000, 80000, 80000, 40000]
+    # Row 1 claimed 60% bonus + MACRS (680000 + 128000) before 2026; ADS would have allowed 300000.
+    assert schedules.recapture_row(1)[2] == 808000 - 300000
+    assert schedules.row(1)[:6] == [680000, 128000, 60000, 60000, 60000, 30000]
+
+    with pytest.raises(ValueError):
+        engine.depreciation_schedules([1], [1], ["2024-03-01"], [100], business_use_changes={0: (2026, 80)})
+    with pytest.raises(ValueError):
+        engine.depreciation_schedules([1], [1], ["2024-03-01"], [100], recovery_period=4)
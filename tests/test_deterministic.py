@@ -66,3 +66,94 @@ def test_end_to_end_determinism():
     sys.stdout = old_stdout
 
     assert output1 == output2
+
+def test_commit_many_matches_sequential_commits():
+    items = [({"i": i}, f"k{i}", f"scope{i}") for i in range(5)]
+
+    single = ForensicLedger()
+    for payload, key, adc in items:
+        last = single.commit(payload, key, adc_key=adc)
+
+    batched = ForensicLedger()
+    entries = batched.commit_many(items)
+    assert len(entries) == 5
+    assert entries[-1].chain_hash == last.chain_hash
+    assert batched.merkle_root() == single.merkle_root()
+
+def test_commit_many_atomic_rejects_whole_batch():
+    l = ForensicLedger()
+    l.commit({"val": 0}, "req0", adc_key="scope0")
+    with pytest.raises(ValueError, match="Double-count protection"):
+        l.commit_many([({"val": 1}, "req1"), ({"val": 2}, "req2", "scope0")])
+    with pytest.raises(ValueError, match="Idempotency violation"):
+        l.commit_many([({"val": 1}, "req1"), ({"val": 2}, "req1")])
+    assert len(l.entries) == 1
+    assert "req1" not in l.idempotency_keys
+
+def test_commit_many_per_item_results():
+    l = ForensicLedger()
+    l.commit({"val": 0}, "req0")
+    results = l.commit_many(
+        [({"val": 1}, "req0"), ({"val": 2}, "req2", "s"), ({"val": 3}, "req3", "s"), ({"val": 4}, "req4")],
+        mode="PER_ITEM",
+    )
+    assert [r.ok for r in results] == [False, True, False, True]
+    assert "Idempotency violation" in results[0].error
+    assert "Double-count protection" in results[2].error
+    assert results[3].entry.prev_hash == results[1].entry.chain_hash
+    assert len(l.entries) == 3
+
+def test_commit_many_per_item_isolates_unserializable_payload():
+    l = ForensicLedger()
+    results = l.commit_many([({"val": 1}, "req1", "s1"), ({"x": object()}, "bad", "s2"), ({"val": 3}, "req3", "s2")],
+                            mode="PER_ITEM")
+    assert [r.ok for r in results] == [True, False, True]
+    assert "Unserializable payload" in results[1].error
+    # The bad item claimed neither of its keys.
+    assert "bad" not in l.idempotency_keys
+    assert results[2].entry.prev_hash == results[0].entry.chain_hash
+    with pytest.raises(ValueError, match="Unserializable payload"):
+        l.commit_many([({"val": 4}, "req4"), ({"x": object()}, "bad")])
+    assert len(l.entries) == 2
+
+def test_shape_encoders_match_canonicalize():
+    from voltyield_ledger_core.ledger import canonicalize_charging_event, canonicalize_verified_charging_event
+    data = {"kwh": 10, "station_id": "Sé-\"1\"", "z": [1.5, None, True], "a": {"y": 1, "b": 2}}
+    event = {"event_type": "CHARGING_START", "timestamp": "2025-06-15T12:00:00Z", "data": data}
+    assert canonicalize_charging_event(event["event_type"], event["timestamp"], data) == canonicalize(event)
+
+    receipt = {"merchant": "VoltStation", "kwh": 50.0, "cost_minor": 2500, "receipt_link": "rü.pdf"}
+    telemetry = {"asset_id": "hummer-01", "gps": "37.7749,-122.4194", "kwh": 50}
+    payload = {
+        "type": "VERIFIED_CHARGING_EVENT",
+        "asset_id": "hummer-01",
+        "receipt_data": receipt,
+        "telemetry_match": telemetry,
+        "certificate_hash": "ab" * 32,
+    }
+    assert canonicalize_verified_charging_event("hummer-01", receipt, telemetry, "ab" * 32) == canonicalize(payload)
+
+def test_canonical_payload_is_hashed_once_and_reused():
+    from voltyield_ledger_core.ledger import CanonicalPayload
+    payload = {"amount": 100, "asset": "V1"}
+    prepared = CanonicalPayload(payload)
+    entry = ForensicLedger().commit(prepared, prepared.entry_hash)
+    assert entry.entry_hash == ForensicLedger().commit(payload, "k").entry_hash
+    assert entry.canonical == canonicalize(payload)
+    assert entry.payload == payload
+
+def test_entries_are_compact_and_decode_payload_on_read():
+    import sys
+    ledger = ForensicLedger()
+    first = ledger.commit({"asset_id": "V1", "kwh": 50.5, "meta": {"b": [1, 2]}}, "k1")
+    second = ledger.commit({"asset_id": "V1", "kwh": 12}, "k2")
+    assert not hasattr(second, "__dict__")
+    assert sys.getsizeof(second.digests) < 3 * sys.getsizeof(second.entry_hash)
+
+    assert first.prev_hash is None and first.prev_digest is None
+    assert second.prev_hash == first.chain_hash and second.prev_digest == first.chain_digest
+    assert bytes.fromhex(second.entry_hash) == second.entry_digest
+    stored = ledger.entries[0].payload
+    assert stored == {"asset_id": "V1", "kwh": 50.5, "meta": {"b": [1, 2]}}
+    stored["asset_id"] = "mutated"  # each read decodes a fresh dict from the canonical bytes
+    assert ledger.entries[0].payload["asset_id"] == "V1"
@@ -0,0 +1,50 @@
+import json
+import hashlib
+from fastapi.testclient import TestClient
+from voltyield_ledger_core import api
+from voltyield_ledger_core.export import cbor_encode, export_ledger
+from voltyield_ledger_core.ledger import ForensicLedger
+
+def _ledger(n=30):
+    ledger = ForensicLedger()
+    ledger.commit_many([({"type": "PING", "asset_id": f"V-{i % 3}", "timestamp": f"2026-02-{1 + i:02d}T00:00:00Z", "i": i}, f"k{i}")
+                        for i in range(n)])
+    return ledger
+
+def test_ndjson_rows_carry_chain_fields_and_rehash():
+    ledger = _ledger()
+    rows = [json.loads(line) for line in b"".join(export_ledger(ledger, chunk_bytes=512)).splitlines()]
+    assert [r["index"] for r in rows] == list(range(30))
+    assert rows[0]["prev_hash"] is None
+    for row, entry in zip(rows, ledger.entries):
+        assert (row["entry_hash"], row["prev_hash"], row["chain_hash"]) == (entry.entry_hash, entry.prev_hash, entry.chain_hash)
+        assert hashlib.sha256(json.dumps(row["payload"], sort_keys=True, separators=(",", ":")).encode()).hexdigest() == row["entry_hash"]
+
+def test_cursor_limit_and_filters():
+    ledger = _ledger()
+    first = [json.loads(l) for l in b"".join(export_ledger(ledger, asset_id="V-1", limit=4)).splitlines()]
+    assert [r["index"] for r in first] == [1, 4, 7, 10]
+    rest = [json.loads(l) for l in b"".join(export_ledger(ledger, asset_id="V-1", cursor=first[-1]["index"] + 1)).splitlines()]
+    assert [r["index"] for r in rest] == [13, 16, 19, 22, 25, 28]
+    window = b"".join(export_ledger(ledger, since="2026-02-05T00:00:00Z", until="2026-02-07T00:00:00Z")).splitlines()
+    assert [json.loads(l)["index"] for l in window] == [4, 5]
+
+def test_cbor_is_deterministic_and_compact():
+    assert cbor_encode({"b": 1, "a": [True, None, -25, b"\x00"]}).hex() == "a2616184f5f638184100616201"
+    ledger = _ledger(3)
+    cbor = b"".join(export_ledger(ledger, "cbor"))
+    entry = ledger.entries[1]
+    assert bytes.fromhex(entry.chain_hash) in cbor and entry.canonical in cbor
+    assert len(cbor) < len(b"".join(export_ledger(ledger)))
+
+def test_export_endpoint_streams_and_rejects_bad_filters():
+    client = TestClient(api.app)
+    client.post("/webhooks/charging", json={"event_type": "START", "timestamp": "2026-03-01T00:00:00Z", "data": {"asset_id": "EXP-1"}})
+    response = client.get("/ledger/export", params={"asset_id": "EXP-1"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(l) for l in response.content.splitlines()]
+    assert rows and all(r["payload"]["data"]["asset_id"] == "EXP-1" for r in rows)
+
+    assert client.get("/ledger/export", params={"format": "xml"}).status_code == 400
+    assert client.get("/ledger/export", params={"since": "yesterday"}).status_code == 400
@@ -0,0 +1,35 @@
+import random
+from array import array
+import pytest
+from voltyield_ledger_core.regulatory import RegulatoryEngine
+
+def _amounts(report):
+    amounts = {r["rule"]: r["amount"] for r in report["results"]}
+    return (amounts["US_SEC_179_HEAVY"], amounts["US_MACRS_2026"], amounts.get("US_45W", 0), report["total_deduction_first_year"])
+
+def test_evaluate_fleet_matches_evaluate_all():
+    engine = RegulatoryEngine("2025.1.0")
+    rng = random.Random(7)
+    n = 3000
+    cost = array("q", (rng.randrange(0, 20000000) for _ in range(n)))
+    weight = array("q", (rng.choice([5999, 6000, 9000, 13999, 14000, 20000]) for _ in range(n)))
+    dates = [rng.choice(["2022-03-01", "2023-07-04", "2024-12-31", "2025-01-19", "2025-01-20", "2026-06-01", "2028-01-01"]) for _ in range(n)]
+    use = array("q", (rng.choice([0, 50, 51, 80, 100]) for _ in range(n)))
+    ids = [f"A-{i}" for i in range(n)]
+
+    fleet = engine.evaluate_fleet(cost, weight, dates, use, ids)
+    assert len(fleet) == n
+    for i in range(n):
+        report = engine.evaluate_all({"id": ids[i], "cost_minor": cost[i], "weight_lbs": weight[i], "date_service": dates[i]}, use[i])
+        assert (fleet.sec_179[i], fleet.macrs[i], fleet.us_45w[i], fleet.total_deduction_first_year[i]) == _amounts(report)
+    assert fleet.report(5) == engine.evaluate_all({"id": "A-5", "cost_minor": cost[5], "weight_lbs": weight[5], "date_service": dates[5]}, use[5])
+
+def test_evaluate_fleet_dates_and_lengths():
+    engine = RegulatoryEngine("2025.1.0")
+    # Rows that never need a year (low business use, or not heavy and past the restoration date) accept any date.
+    fleet = engine.evaluate_fleet([100000, 100000], [9000, 20000], ["", "2025-06-01"], [40, 100])
+    assert list(fleet.total_deduction_first_year) == [0, 100000]
+    with pytest.raises(ValueError):
+        engine.evaluate_fleet([100000], [9000], [""], [100])
+    with pytest.raises(ValueError):
+        engine.evaluate_fleet([1, 2], [9000], ["2025-06-01"], [100])
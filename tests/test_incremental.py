@@ -0,0 +1,68 @@
+import json
+import pytest
+from voltyield_ledger_core.incremental import IncrementalEvaluator, diff_rulepacks
+from voltyield_ledger_core.regulatory import RegulatoryEngine
+from voltyield_ledger_core.rulepack import load_rulepack, rulepack_path
+
+ASSETS = [
+    {"id": f"A-{i:03d}", "cost_minor": 3000000 + 250000 * i, "weight_lbs": [5000, 7000, 12000, 16000][i % 4],
+     "date_service": ["2023-05-01", "2024-02-01", "2024-09-01", "2025-06-01"][i % 4]}
+    for i in range(40)
+]
+
+def _pack(tmp_path, name, edit):
+    with open(rulepack_path("default")) as f:
+        data = json.load(f)
+    edit(data["rules"])
+    path = tmp_path / f"{name}.json"
+    path.write_text(json.dumps(data))
+    return load_rulepack(path=str(path))
+
+def _build():
+    tracker = IncrementalEvaluator(RegulatoryEngine("2025.1.0"))
+    for asset in ASSETS:
+        tracker.add(asset)
+    return tracker
+
+def test_step_segment_change_touches_only_that_year(tmp_path):
+    tracker = _build()
+    # Only the 2024 Section 179 cap moves: heavy SUVs placed in 2024 (and their MACRS remainder) change.
+    pack = _pack(tmp_path, "cap2024", lambda r: r["US_SEC_179_HEAVY"]["cap_minor_by_year"]["steps"].__setitem__(0, [2024, 2000000]))
+    delta = tracker.apply_rulepack(pack)
+    assert delta.changed_parameters == [("US_SEC_179_HEAVY", "cap_minor_by_year", 1)]
+    heavy_2024 = [a["id"] for a in ASSETS if 6000 <= a["weight_lbs"] < 14000 and a["date_service"].startswith("2024")]
+    assert delta.reevaluated == 2 * len(heavy_2024)
+    assert sorted({c["asset_id"] for c in delta.changes}) == heavy_2024
+
+    fresh = RegulatoryEngine("2025.1.0", pack)
+    for asset in ASSETS:
+        assert tracker.report(asset["id"]) == fresh.evaluate_all(asset)
+
+def test_scalar_change_and_unrelated_change(tmp_path):
+    tracker = _build()
+    delta = tracker.apply_rulepack(_pack(tmp_path, "lcfs", lambda r: r["US_LCFS"]["rate_cents_per_kwh"].__setitem__("CA", 20)))
+    assert delta.changed_parameters == [("US_LCFS", "rate_cents_per_kwh")]
+    assert delta.reevaluated == 0 and delta.changes == []
+
+    pack = _pack(tmp_path, "ev", lambda r: r["US_45W"].__setitem__("ev_rate", 0.25))
+    delta = tracker.apply_rulepack(pack)
+    assert {c["rule"] for c in delta.changes} == {"US_45W"}
+    assert delta.reevaluated == len(ASSETS)
+    assert tracker.dependencies("A-001", "US_45W").parameters >= {("US_45W", "ev_rate"), ("US_45W", "cap_minor_by_weight", 0)}
+    assert diff_rulepacks(pack, pack) == []
+
+def test_update_asset_reevaluates_rules_reading_changed_fields():
+    tracker = _build()
+    asset = dict(ASSETS[1], weight_lbs=20000)
+    delta = tracker.update_asset(asset)
+    assert delta.reevaluated == 3
+    assert tracker.report("A-001") == RegulatoryEngine("2025.1.0").evaluate_all(asset)
+    # date_service is not read by 45W, so only 179 and MACRS run.
+    assert tracker.update_asset(dict(asset, date_service="2026-01-01")).reevaluated == 2
+
+def test_add_rejects_bad_asset_without_leaking_state():
+    tracker = _build()
+    with pytest.raises(ValueError):
+        tracker.add({"id": "BAD", "cost_minor": 1, "weight_lbs": 9000, "date_service": ""})
+    assert len(tracker) == len(ASSETS)
+    tracker.add({"id": "BAD", "cost_minor": 1, "weight_lbs": 9000, "date_service": "2024-01-01"})
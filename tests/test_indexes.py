@@ -0,0 +1,86 @@
+from voltyield_ledger_core.ledger import ForensicLedger
+from voltyield_ledger_core.indexes import FieldIndex, parse_timestamp_ms
+from voltyield_ledger_core.snapshot import SnapshotManager
+from voltyield_ledger_core.storage import SegmentStorage
+
+def _payload(i):
+    return {
+        "type": "ELIGIBLE_PENNY" if i % 2 else "ASSET_PROFILE",
+        "asset_id": f"V-{i % 3}",
+        "rule_id": "US_45W" if i % 4 == 1 else "US_LCFS",
+        "timestamp": f"2026-01-{1 + i % 28:02d}T12:00:00Z",
+        "i": i,
+    }
+
+def _filled(ledger, n=60):
+    ledger.commit_many([(_payload(i), f"k{i}") for i in range(n)])
+    return ledger
+
+def _naive(n, start=0, since=None, until=None, **equals):
+    out = []
+    for i in range(start, n):
+        p = _payload(i)
+        if any(p[k] != v for k, v in equals.items()):
+            continue
+        if since is not None and p["timestamp"] < since:
+            continue
+        if until is not None and p["timestamp"] >= until:
+            continue
+        out.append(i)
+    return out
+
+def test_queries_match_a_linear_scan():
+    ledger = _filled(ForensicLedger())
+    cases = [
+        {"asset_id": "V-1"},
+        {"asset_id": "V-2", "type": "ELIGIBLE_PENNY"},
+        {"asset_id": "V-0", "rule_id": "US_45W", "type": "ELIGIBLE_PENNY"},
+        {"since": "2026-01-05T00:00:00Z", "until": "2026-01-09T00:00:00Z"},
+        {"since": "2026-01-03T00:00:00Z"},
+        {"asset_id": "V-1", "since": "2026-01-10T00:00:00Z", "start": 20},
+    ]
+    for filters in cases:
+        assert [e.payload["i"] for e in ledger.query(**filters)] == _naive(60, **filters), filters
+
+    latest = next(ledger.query(asset_id="V-2", type="ASSET_PROFILE", reverse=True))
+    assert latest.payload["i"] == max(_naive(60, asset_id="V-2", type="ASSET_PROFILE"))
+    assert list(ledger.query(asset_id="V-404")) == []
+
+def test_indexes_survive_snapshot_restart(tmp_path):
+    def open_ledger():
+        return ForensicLedger(SegmentStorage(str(tmp_path / "log")), snapshots=SnapshotManager(str(tmp_path / "snap")))
+
+    ledger = _filled(open_ledger(), 40)
+    ledger.snapshot()
+    ledger.commit_many([(_payload(i), f"k{i}") for i in range(40, 60)])
+    ledger.close()
+
+    restarted = open_ledger()
+    assert [e.payload["i"] for e in restarted.query(asset_id="V-1", type="ELIGIBLE_PENNY")] == _naive(60, asset_id="V-1", type="ELIGIBLE_PENNY")
+    restarted.close()
+
+def test_index_missing_from_snapshot_is_rebuilt_in_position_order(tmp_path):
+    def open_ledger(indexes=None):
+        return ForensicLedger(SegmentStorage(str(tmp_path / "log")), snapshots=SnapshotManager(str(tmp_path / "snap")),
+                              indexes=indexes)
+
+    ledger = _filled(open_ledger([FieldIndex("rule_id", ("rule_id",))]), 40)
+    ledger.snapshot()
+    ledger.commit_many([(_payload(i), f"k{i}") for i in range(40, 60)])
+    ledger.close()
+
+    # asset_id, type and timestamp are not in the snapshot: built over [0, 40), then the tail.
+    restarted = open_ledger()
+    assert [e.payload["i"] for e in restarted.query(asset_id="V-1")] == _naive(60, asset_id="V-1")
+    window = {"since": "2026-01-02T00:00:00Z", "until": "2026-01-04T00:00:00Z"}
+    assert [e.payload["i"] for e in restarted.query(**window)] == _naive(60, **window)
+    assert [e.payload["i"] for e in restarted.query(type="ASSET_PROFILE", rule_id="US_LCFS")] == \
+        _naive(60, type="ASSET_PROFILE", rule_id="US_LCFS")
+    restarted.close()
+
+def test_parse_timestamp_ms_floors_pre_epoch_fractions():
+    assert parse_timestamp_ms("1969-12-31T23:59:59.5Z") == -500
+    assert parse_timestamp_ms("1969-12-31T23:59:59.9995+00:00") == -1
+    assert parse_timestamp_ms("1970-01-01T00:00:00.0015") == 1
+    assert parse_timestamp_ms("2026-01-05T12:00:00.250+02:00") == 1767607200250
+    assert parse_timestamp_ms(42) == 42
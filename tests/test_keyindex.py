@@ -0,0 +1,72 @@
+import random
+from voltyield_ledger_core.keyindex import KeyIndex, _SortedRun
+from voltyield_ledger_core.ledger import ForensicLedger
+
+def test_key_index_is_exact_across_runs_and_spills(tmp_path):
+    index = KeyIndex(memory_budget_bytes=4096, spill_dir=str(tmp_path), buffer_size=64)
+    keys = [f"key-{i}" for i in range(3000)]
+    for key in keys:
+        index.add(key)
+    index.add("key-7")  # Re-adding is a no-op, like a set
+
+    assert len(index) == 3000
+    assert all(key in index for key in keys)
+    assert not any(f"absent-{i}" in index for i in range(3000))
+    assert index.memory_bytes < 3000 * 32
+    index.close()
+
+def test_key_index_without_bloom_front():
+    index = KeyIndex(bloom_bits_per_key=0, buffer_size=16)
+    rng = random.Random(7)
+    keys = {f"{rng.getrandbits(64):x}" for _ in range(500)}
+    for key in keys:
+        index.add(key)
+    assert all(key in index for key in keys)
+    assert "not-there" not in index
+    assert sorted(index.digests()) == sorted(set(index.digests()))
+
+def test_ledger_uses_budgeted_key_index(tmp_path):
+    ledger = ForensicLedger(key_index_options={"memory_budget_bytes": 1024, "spill_dir": str(tmp_path), "buffer_size": 8})
+    ledger.commit_many([({"i": i}, f"k{i}", f"scope{i}") for i in range(200)])
+    assert "k150" in ledger.idempotency_keys
+    assert "scope150" in ledger.anti_double_count_keys
+    assert "k200" not in ledger.idempotency_keys
+    ledger.close()
+
+def test_merging_spilled_runs_streams_to_file(tmp_path, monkeypatch):
+    index = KeyIndex(memory_budget_bytes=2048, spill_dir=str(tmp_path), buffer_size=32)
+    keys = [f"key-{i}" for i in range(2000)]
+    for key in keys[:1000]:
+        index.add(key)
+    assert any(not run.in_memory for run in index._runs)
+
+    # Merges involving a spilled run must never build the merged run in memory.
+    built = []
+    init = _SortedRun.__init__
+
+    def recording_init(run, data):
+        built.append(len(data))
+        init(run, data)
+    monkeypatch.setattr(_SortedRun, "__init__", recording_init)
+    for key in keys[1000:]:
+        index.add(key)
+    index.flush()
+    assert max(built) <= index.memory_budget_bytes
+    assert len(index) == 2000 and all(key in index for key in keys)
+    assert list(index.iter_sorted()) == sorted(index.digests())
+    index.close()
+
+def test_budget_holds_after_spilling(tmp_path):
+    budget = 50000
+    index = KeyIndex(memory_budget_bytes=budget, spill_dir=str(tmp_path), buffer_size=128)
+    rng = random.Random(3)
+    for i in range(20000):
+        index.add(f"{rng.getrandbits(64):x}")
+        if not i % 1000:
+            assert index.memory_bytes <= budget
+    index.flush()
+    assert any(not run.in_memory for run in index._runs)
+    assert index.memory_bytes <= budget
+    # Bloom bits and fence keys stay resident outside the budget, at a fraction of the digest data.
+    assert 0 < index.overhead_bytes < 20000 * 32 // 4
+    index.close()
@@ -0,0 +1,37 @@
+from voltyield_ledger_core.ledger import ForensicLedger
+from voltyield_ledger_core.merkle import verify_inclusion, verify_consistency
+
+def _ledger(n):
+    ledger = ForensicLedger()
+    for i in range(n):
+        ledger.commit({"i": i}, f"k{i}")
+    return ledger
+
+def test_inclusion_proofs_verify_for_every_size():
+    ledger = _ledger(17)
+    for size in range(1, 18):
+        for index in range(size):
+            proof = ledger.inclusion_proof(index, size)
+            assert len(proof["audit_path"]) <= size.bit_length()
+            assert verify_inclusion(proof["entry_hash"], index, size, proof["audit_path"], proof["root"])
+
+    proof = ledger.inclusion_proof(5)
+    assert not verify_inclusion(ledger.entries[6].entry_hash, 5, proof["tree_size"], proof["audit_path"], proof["root"])
+    assert not verify_inclusion(proof["entry_hash"], 5, proof["tree_size"], proof["audit_path"], ledger.merkle_root(10))
+
+def test_consistency_proofs_verify_between_sizes():
+    ledger = _ledger(13)
+    for new_size in range(1, 14):
+        for old_size in range(1, new_size + 1):
+            p = ledger.consistency_proof(old_size, new_size)
+            assert verify_consistency(old_size, new_size, p["old_root"], p["new_root"], p["proof"])
+
+    # A forked history does not verify against the original
+    fork = _ledger(6)
+    fork.commit({"i": "forged"}, "forged")
+    p = ledger.consistency_proof(6, 13)
+    assert not verify_consistency(7, 13, fork.merkle_root(), p["new_root"], ledger.consistency_proof(7, 13)["proof"])
+
+def test_root_is_stable_across_ledgers():
+    assert _ledger(9).merkle_root() == _ledger(9).merkle_root()
+    assert _ledger(9).merkle_root(4) == _ledger(4).merkle_root()
@@ -0,0 +1,69 @@
+import itertools
+import random
+import pytest
+from voltyield_ledger_core.models import Receipt, TelemetryEvent
+from voltyield_ledger_core.processor import ReceiptStitcher, haversine_meters
+from voltyield_ledger_core.reconcile import ReceiptReconciler, edge_cost
+from voltyield_ledger_core.indexes import parse_timestamp_ms
+
+def _event(asset_id, minute, lat):
+    return TelemetryEvent(asset_id=asset_id, timestamp_iso=f"2026-01-01T{minute // 60:02d}:{minute % 60:02d}:00Z",
+                          lat=lat, lon=0.0, kwh_delivered=50000, status="CHARGING")
+
+def _receipt(receipt_id, minute, lat):
+    return Receipt(receipt_id=receipt_id, vendor="ChargePoint", amount_minor=1500, currency="USD",
+                   timestamp_iso=f"2026-01-01T{minute // 60:02d}:{minute % 60:02d}:00Z", confidence=lat)
+
+WINDOW = {"max_distance_m": 3000, "max_time_ms": 45 * 60 * 1000}
+
+def _cost(receipt, event):
+    dist = haversine_meters(receipt.confidence, 0, event.lat, event.lon)
+    dt = abs(parse_timestamp_ms(receipt.timestamp_iso) - parse_timestamp_ms(event.timestamp_iso))
+    if dist > WINDOW["max_distance_m"] or dt > WINDOW["max_time_ms"]:
+        return None
+    return edge_cost(dist, dt)
+
+def _brute_force(receipts, events):
+    best = (0, 0)
+    slots = list(range(len(events))) + [None] * len(receipts)
+    for choice in set(itertools.permutations(slots, len(receipts))):
+        costs = [_cost(r, events[p]) if p is not None else 0 for r, p in zip(receipts, choice)]
+        if any(c is None for c in costs):
+            continue
+        matched = sum(p is not None for p in choice)
+        best = max(best, (matched, -sum(costs)))
+    return best[0], -best[1]
+
+def test_competing_receipts_never_share_an_event():
+    events = [_event("V-1", 600, 34.0), _event("V-2", 640, 34.01)]
+    receipts = [_receipt("R-a", 605, 34.0), _receipt("R-b", 606, 34.0)]
+    # Stitched one at a time, both receipts claim the same event.
+    stitcher = ReceiptStitcher()
+    assert stitcher.stitch(receipts[0], events)[0] is stitcher.stitch(receipts[1], events)[0]
+
+    result = ReceiptReconciler(**WINDOW).reconcile(receipts, events)
+    assert {m[1].asset_id for m in result.matches} == {"V-1", "V-2"}
+    assert not result.unmatched
+
+def test_matches_brute_force_optimum_and_is_order_independent():
+    rng = random.Random(13)
+    for trial in range(25):
+        events = [_event(f"V-{i}", rng.randrange(600, 700), 34.0 + rng.uniform(0, 0.03)) for i in range(rng.randrange(1, 6))]
+        receipts = [_receipt(f"R-{i}", rng.randrange(600, 700), 34.0 + rng.uniform(0, 0.03)) for i in range(rng.randrange(1, 5))]
+        result = ReceiptReconciler(**WINDOW).reconcile(receipts, events)
+        assert (len(result.matches), result.total_cost) == _brute_force(receipts, events)
+        assert len({id(m[1]) for m in result.matches}) == len(result.matches)
+
+        shuffled = ReceiptReconciler(**WINDOW).reconcile(list(reversed(receipts)), list(reversed(events)))
+        assert [(m[0].receipt_id, m[2]) for m in shuffled.matches] == [(m[0].receipt_id, m[2]) for m in result.matches]
+
+def test_scales_over_sparse_windows_and_rejects_duplicate_ids():
+    rng = random.Random(2)
+    events = [_event(f"V-{i % 500}", rng.randrange(0, 1440), rng.uniform(30.0, 40.0)) for i in range(6000)]
+    receipts = [_receipt(f"R-{i:05d}", rng.randrange(0, 1440), rng.uniform(30.0, 40.0)) for i in range(5000)]
+    result = ReceiptReconciler(**WINDOW).reconcile(receipts, events)
+    assert len(result.matches) + len(result.unmatched) == 5000
+    assert len({id(m[1]) for m in result.matches}) == len(result.matches)
+
+    with pytest.raises(ValueError):
+        ReceiptReconciler().reconcile([receipts[0], receipts[0]], events)
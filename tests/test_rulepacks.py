@@ -0,0 +1,109 @@
+import json
+import pytest
+from voltyield_ledger_core.regulatory import RegulatoryEngine
+from voltyield_ledger_core.rulepack import (StepTable, compile_rulepack, load_rulepack, resident_fingerprints,
+                                            rulepack_path)
+
+def test_step_table_lookup():
+    table = StepTable([2024, 2025], [2890000, 3050000, 3130000])
+    assert [table.lookup(y) for y in (2020, 2023, 2024, 2025, 2031)] == [2890000, 2890000, 3050000, 3130000, 3130000]
+
+def test_default_pack_matches_published_values():
+    engine = RegulatoryEngine("2025.1.0")
+    caps = {y: engine.evaluate_us_section_179_heavy(8000, 10**9, f"{y}-06-01", 100).trace["cap_limit"] for y in (2022, 2023, 2024, 2025, 2030)}
+    assert caps == {2022: 2890000, 2023: 2890000, 2024: 3050000, 2025: 3130000, 2030: 3130000}
+
+    rates = {d: engine.evaluate_us_macrs_2026(1000, d, 100).trace["bonus_rate"]
+             for d in ("2022-12-31", "2023-05-01", "2024-05-01", "2025-01-19", "2025-01-20", "2026-05-01")}
+    assert rates == {"2022-12-31": 1.0, "2023-05-01": 0.8, "2024-05-01": 0.6, "2025-01-19": 0.4,
+                     "2025-01-20": 1.0, "2026-05-01": 1.0}
+    assert engine.evaluate_us_macrs_2026(1000, "2025-01-01", 50).trace == {"reason": "Business use <= 50%"}
+
+    assert engine.evaluate_us_45w(13999, 10**8).trace["cap_applied"] == 750000
+    assert engine.evaluate_us_45w(14000, 10**8).trace["cap_applied"] == 4000000
+    assert engine.evaluate_us_30c_enhanced(True, 10**9, "LOW_INCOME").amount == 10000000
+    assert engine.evaluate_us_30c_enhanced(False, 1000, "NON_URBAN").amount == 60
+    assert not engine.evaluate_us_30c_enhanced(True, 1000).eligible
+    assert engine.evaluate_us_lcfs(10000, "OR", True, True).amount == 120
+    assert engine.evaluate_uk_aer_reimbursement(10000, "PUBLIC_NETWORK").amount == 140
+    assert not engine.evaluate_uk_aer_reimbursement(10000, "OFFICE").eligible
+    assert engine.evaluate_uk_vat_recovery(1000, True).amount == 200
+
+    stack = engine.evaluate_all({"id": "A", "cost_minor": 8500000, "weight_lbs": 6500, "date_service": "2026-01-15"})
+    assert [r["amount"] for r in stack["results"]] == [3130000, 5370000, 750000]
+    assert stack["total_deduction_first_year"] == 8500000
+
+def test_versioned_pack_and_fingerprint(tmp_path):
+    assert rulepack_path("2025.1.0") != rulepack_path("default")
+    with pytest.raises(ValueError, match="Unknown rulepack version"):
+        rulepack_path("2026.1.0")
+    with pytest.raises(ValueError, match="Invalid rulepack version"):
+        rulepack_path("../default")
+
+    with open(rulepack_path("default")) as f:
+        data = json.load(f)
+    data["rules"]["UK_VAT"]["rate"] = 0.25
+    path = tmp_path / "vat25.json"
+    path.write_text(json.dumps(data, indent=4))
+
+    base = RegulatoryEngine("2025.1.0")
+    custom = RegulatoryEngine("2025.1.0", load_rulepack(path=str(path)))
+    assert base.evaluate_uk_vat_recovery(1000, True).amount == 200
+    assert custom.evaluate_uk_vat_recovery(1000, True).amount == 250
+    assert base.get_fingerprint() != custom.get_fingerprint()
+    assert {base.rulepack.fingerprint, custom.rulepack.fingerprint} <= set(resident_fingerprints())
+
+def test_packs_are_compiled_from_source_once_per_content(tmp_path):
+    with open(rulepack_path("default")) as f:
+        data = json.load(f)
+    data["rules"]["UK_VAT"]["rate"] = 0.125
+    first, second = tmp_path / "a.json", tmp_path / "b.json"
+    first.write_text(json.dumps(data))
+    second.write_text(json.dumps(data, indent=2))
+    pack = load_rulepack(path=str(first))
+    # Same content under another path or formatting shares the resident pack.
+    assert load_rulepack(path=str(second)) is pack
+    assert pack.rule("UK_VAT")["rate"] == 0.125
+    assert pack.fingerprint == compile_rulepack(data).fingerprint
+
+def test_invalid_rulepack_rejected():
+    with open(rulepack_path("default")) as f:
+        data = json.load(f)
+    data["rules"]["US_45W"]["cap_minor_by_weight"]["steps"] = [[14000, 1], [9000, 2]]
+    with pytest.raises(ValueError):
+        compile_rulepack(data)
+    del data["rules"]["UK_VAT"]
+    with pytest.raises(ValueError):
+        compile_rulepack(data)
+
+def test_evaluate_all_cached_lru_ttl_and_invalidation(tmp_path):
+    now = [0.0]
+    engine = RegulatoryEngine("2025.1.0", cache_size=2, cache_ttl_seconds=60)
+    engine.cache.clock = lambda: now[0]
+    a = {"id": "A", "cost_minor": 8500000, "weight_lbs": 6500, "date_service": "2026-01-15"}
+    b = dict(a, id="B")
+    c = dict(a, id="C")
+
+    first = engine.evaluate_all_cached(a)
+    assert first == engine.evaluate_all(a)
+    assert engine.evaluate_all_cached(dict(reversed(list(a.items())))) is first
+    assert engine.evaluate_all_cached(a, 80) is not first
+    assert engine.cache.stats()["hits"] == 1 and engine.cache.stats()["misses"] == 2
+
+    engine.evaluate_all_cached(b)
+    engine.evaluate_all_cached(c)
+    assert engine.cache.evictions == 2 and len(engine.cache) == 2
+
+    now[0] = 61.0
+    engine.evaluate_all_cached(c)
+    assert engine.cache.misses == 5
+
+    with open(rulepack_path("default")) as f:
+        data = json.load(f)
+    data["rules"]["US_45W"]["cap_minor_by_weight"]["default"] = 500000
+    path = tmp_path / "pack.json"
+    path.write_text(json.dumps(data))
+    engine.use_rulepack(load_rulepack(path=str(path)))
+    report = engine.evaluate_all_cached(c)
+    assert report["results"][2]["amount"] == 500000
+    assert engine.cache.invalidations == 1 and len(engine.cache) == 1
@@ -0,0 +1,64 @@
+import os
+from voltyield_ledger_core.ledger import ForensicLedger
+from voltyield_ledger_core.snapshot import SnapshotManager
+from voltyield_ledger_core.storage import SegmentStorage
+from voltyield_ledger_core.cli import main
+
+def _open(tmp_path, **kwargs):
+    return ForensicLedger(SegmentStorage(str(tmp_path / "log")), snapshots=SnapshotManager(str(tmp_path / "snap")), **kwargs)
+
+def test_restart_loads_snapshot_and_replays_tail(tmp_path):
+    ledger = _open(tmp_path, snapshot_every=10)
+    for i in range(25):
+        ledger.commit({"i": i}, f"k{i}", adc_key=f"scope{i}")
+    root, head = ledger.merkle_root(), ledger.entries[-1].chain_hash
+    ledger.close()
+    assert [os.path.basename(p) for p in SnapshotManager(str(tmp_path / "snap")).list()] == [
+        f"{10:020d}.snap", f"{20:020d}.snap"
+    ]
+
+    restarted = _open(tmp_path)
+    assert restarted._snapshot_count == 20
+    assert restarted.merkle_root() == root
+    assert "k3" in restarted.idempotency_keys and "k24" in restarted.idempotency_keys
+    assert "scope3" in restarted.anti_double_count_keys
+    entry = restarted.commit({"i": 25}, "k25")
+    assert entry.prev_hash == head
+
+    fresh = ForensicLedger(SegmentStorage(str(tmp_path / "log")))
+    assert fresh.merkle_root() == restarted.merkle_root()
+    restarted.close()
+    fresh.close()
+
+def test_damaged_or_stale_snapshots_are_skipped(tmp_path):
+    ledger = _open(tmp_path)
+    for i in range(5):
+        ledger.commit({"i": i}, f"k{i}")
+    ledger.snapshot()
+    for i in range(5, 8):
+        ledger.commit({"i": i}, f"k{i}")
+    bad = ledger.snapshot()
+    ledger.close()
+
+    with open(bad, "r+b") as f:
+        f.seek(20)
+        f.write(b"X")
+
+    restarted = _open(tmp_path)
+    assert restarted._snapshot_count == 5
+    assert "k7" in restarted.idempotency_keys
+    entry = restarted.commit({"i": 8}, "k8")
+    assert entry.prev_hash == restarted.entries[7].chain_hash
+    restarted.close()
+
+def test_prune_keeps_newest(tmp_path, capsys):
+    ledger = _open(tmp_path)
+    for i in range(4):
+        ledger.commit({"i": i}, f"k{i}")
+        ledger.snapshot()
+    ledger.close()
+
+    main(["snapshots", "prune", str(tmp_path / "snap"), "--keep", "1"])
+    assert len(capsys.readouterr().out.splitlines()) == 3
+    remaining = SnapshotManager(str(tmp_path / "snap")).list()
+    assert [os.path.basename(p) for p in remaining] == [f"{4:020d}.snap"]
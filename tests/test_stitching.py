@@ -0,0 +1,126 @@
+import random
+import pytest
+from voltyield_ledger_core.models import Receipt, TelemetryEvent
+from voltyield_ledger_core.processor import ReceiptStitcher, TelemetryIndex, haversine_meters
+
+def _event(asset_id, minute, lat, lon):
+    hour, minute = divmod(minute, 60)
+    return TelemetryEvent(asset_id=asset_id, timestamp_iso=f"2026-01-0{1 + hour // 24}T{hour % 24:02d}:{minute:02d}:00Z",
+                          lat=lat, lon=lon, kwh_delivered=50000, status="CHARGING")
+
+def _receipt(i, minute, lat):
+    hour, minute = divmod(minute, 60)
+    return Receipt(receipt_id=f"R-{i}", vendor="ChargePoint", amount_minor=1500, currency="USD",
+                   timestamp_iso=f"2026-01-0{1 + hour // 24}T{hour % 24:02d}:{minute:02d}:00Z", confidence=lat)
+
+def _fleet(n=400, seed=7):
+    rng = random.Random(seed)
+    return [_event(f"V-{i % 37:03d}", rng.randrange(0, 3 * 24 * 60), rng.uniform(33.9, 34.2), rng.uniform(-0.2, 0.2))
+            for i in range(n)]
+
+def test_indexed_stitch_matches_full_scan_inside_the_window():
+    events = _fleet()
+    index = TelemetryIndex(events, max_distance_m=20000, max_time_ms=4 * 60 * 60 * 1000)
+    stitcher = ReceiptStitcher()
+    rng = random.Random(3)
+    for i in range(50):
+        receipt = _receipt(i, rng.randrange(0, 3 * 24 * 60), rng.uniform(33.95, 34.15))
+        assert stitcher.stitch(receipt, index) == stitcher.stitch(receipt, events)
+
+def test_index_only_returns_events_inside_the_window():
+    events = _fleet()
+    index = TelemetryIndex(events, max_distance_m=3000, max_time_ms=30 * 60 * 1000)
+    lat, lon, ms = 34.05, 0.0, index.times_ms[0]
+    expected = [p for p, e in enumerate(events)
+                if haversine_meters(lat, lon, e.lat, e.lon) <= 3000 and abs(index.times_ms[p] - ms) <= 30 * 60 * 1000]
+    assert index.candidates(lat, lon, ms) == expected
+
+def test_ties_break_by_insertion_order_and_empty_window_raises():
+    twin = [_event("V-002", 0, 34.05, 0.0), _event("V-001", 0, 34.05, 0.0), _event("V-001", 0, 34.05, 0.0)]
+    index = TelemetryIndex(reversed(twin[:1]))
+    for e in twin[1:]:
+        index.add(e)
+    event, _ = ReceiptStitcher().stitch(_receipt(1, 0, 34.05), index)
+    assert event is twin[1]
+
+    with pytest.raises(ValueError):
+        ReceiptStitcher().stitch(_receipt(2, 0, -45.0), index)
+
+def test_index_covers_high_latitudes_and_the_antimeridian():
+    events = [_event("V-N", 0, 89.99, 179.0), _event("V-E", 0, 10.0, 179.999), _event("V-W", 0, 10.0, -179.999)]
+    index = TelemetryIndex(events, max_distance_m=3000)
+    assert index.candidates(89.99, -1.0, index.times_ms[0]) == [0]
+    assert index.candidates(10.0, 180.0, index.times_ms[0]) == [1, 2]
+
+def _reference_stitch(receipt, events):
+    # The per-event scan stitch() used before columnar scoring.
+    from voltyield_ledger_core.indexes import parse_timestamp_ms
+    receipt_ms = parse_timestamp_ms(receipt.timestamp_iso)
+    candidates = []
+    for e in events:
+        dist = haversine_meters(receipt.confidence, 0, e.lat, e.lon)
+        time_diff = abs(receipt_ms - parse_timestamp_ms(e.timestamp_iso))
+        candidates.append((dist + (time_diff / 100), time_diff, dist, e.asset_id, e))
+    candidates.sort(key=lambda x: (x[0], x[1], x[2], x[3]))
+    return candidates[0][4]
+
+def test_stitch_many_matches_per_event_scoring():
+    from voltyield_ledger_core.processor import TelemetryColumns
+    events = _fleet(300, seed=11) + [_event("V-000", 90, 34.0, 0.0), _event("V-000", 90, 34.0, 0.0)]
+    rng = random.Random(5)
+    receipts = [_receipt(i, rng.randrange(0, 3 * 24 * 60), rng.uniform(33.9, 34.2)) for i in range(40)]
+    receipts.append(_receipt(99, 90, 34.0))
+
+    matches = ReceiptStitcher().stitch_many(receipts, TelemetryColumns(events))
+    for receipt, (event, evidence_hash) in zip(receipts, matches):
+        assert event is _reference_stitch(receipt, events)
+    assert matches[-1][0] is events[-2]
+    assert ReceiptStitcher().stitch_many(receipts[:1], []) == [None]
+
+def _windowed_reference(receipt, events, max_time_ms):
+    from voltyield_ledger_core.indexes import parse_timestamp_ms
+    receipt_ms = parse_timestamp_ms(receipt.timestamp_iso)
+    inside = [e for e in events if abs(parse_timestamp_ms(e.timestamp_iso) - receipt_ms) <= max_time_ms]
+    return _reference_stitch(receipt, inside) if inside else None
+
+def test_streaming_stitcher_matches_windowed_batch_and_stays_bounded():
+    from voltyield_ledger_core.processor import StreamingStitcher
+    window = 30 * 60 * 1000
+    rng = random.Random(21)
+    events = sorted(_fleet(600, seed=4), key=lambda e: e.timestamp_iso)
+    receipts = {i: _receipt(i, rng.randrange(0, 3 * 24 * 60), rng.uniform(33.9, 34.2)) for i in range(60)}
+
+    # Interleave: each receipt arrives just before the first event at or after its timestamp.
+    arrivals = sorted(receipts.values(), key=lambda r: r.timestamp_iso)
+    stream = StreamingStitcher(max_time_ms=window)
+    emitted = []
+    peak = 0
+    for event in events:
+        while arrivals and arrivals[0].timestamp_iso <= event.timestamp_iso:
+            emitted += stream.push_receipt(arrivals.pop(0))
+        emitted += stream.push_event(event)
+        peak = max(peak, stream.buffered_events)
+    for receipt in arrivals:
+        emitted += stream.push_receipt(receipt)
+    emitted += stream.flush()
+
+    assert sorted(r.receipt_id for r, _, _ in emitted) == sorted(r.receipt_id for r in receipts.values())
+    for receipt, event, evidence_hash in emitted:
+        assert event is _windowed_reference(receipt, events, window)
+    assert stream.pending_receipts == 0
+    assert peak < len(events) // 10  # roughly 2 windows of a 3-day stream
+
+def test_streaming_stitcher_emits_when_watermark_passes_and_handles_late_receipts():
+    from voltyield_ledger_core.processor import StreamingStitcher
+    stream = StreamingStitcher(max_time_ms=10 * 60 * 1000)
+    assert stream.push_event(_event("V-1", 0, 34.0, 0.0)) == []
+    assert stream.push_receipt(_receipt(1, 5, 34.0)) == []
+    assert stream.push_event(_event("V-2", 14, 34.0, 0.0)) == []
+    (receipt, event, evidence_hash), = stream.push_event(_event("V-3", 15, 34.0, 0.0))
+    assert (receipt.receipt_id, event.asset_id) == ("R-1", "V-1")  # same distance, 5 min vs 9 min
+
+    # Window already closed on arrival: stitched immediately; nothing in reach -> no event.
+    (receipt, event, _), = stream.push_receipt(_receipt(2, 3, 34.0))
+    assert event.asset_id == "V-1"
+    (receipt, event, evidence_hash), = stream.push_receipt(_receipt(3, 2 * 60, 34.0)) or stream.flush()
+    assert event is None and evidence_hash is None
@@ -0,0 +1,59 @@
+import os
+import pytest
+from voltyield_ledger_core.ledger import ForensicLedger
+from voltyield_ledger_core.storage import SegmentStorage, FsyncPolicy
+
+def test_segment_ledger_survives_restart(tmp_path):
+    l1 = ForensicLedger(SegmentStorage(str(tmp_path)))
+    e1 = l1.commit({"val": 1}, "req1", adc_key="scope1")
+    e2 = l1.commit({"val": 2, "nested": {"b": 1, "a": 2}}, "req2")
+    l1.close()
+
+    l2 = ForensicLedger(SegmentStorage(str(tmp_path)))
+    assert len(l2.entries) == 2
+    assert l2.entries[-1].chain_hash == e2.chain_hash
+    assert l2.entries[1].prev_hash == e1.chain_hash
+    assert l2.entries[1].payload == {"val": 2, "nested": {"b": 1, "a": 2}}
+
+    # Keys are rebuilt from disk
+    with pytest.raises(ValueError, match="Idempotency violation"):
+        l2.commit({"val": 3}, "req1")
+    with pytest.raises(ValueError, match="Double-count protection"):
+        l2.commit({"val": 3}, "req3", adc_key="scope1")
+
+    # The chain continues from the recovered head, matching an in-memory ledger
+    e3 = l2.commit({"val": 3}, "req3")
+    mem = ForensicLedger()
+    for payload, key in [({"val": 1}, "a"), ({"val": 2, "nested": {"b": 1, "a": 2}}, "b"), ({"val": 3}, "c")]:
+        last = mem.commit(payload, key)
+    assert e3.chain_hash == last.chain_hash
+    l2.close()
+
+def test_segments_roll_and_torn_tail_is_truncated(tmp_path):
+    storage = SegmentStorage(str(tmp_path), FsyncPolicy.every_n(10), segment_max_bytes=256)
+    ledger = ForensicLedger(storage)
+    for i in range(20):
+        ledger.commit({"i": i}, f"k{i}")
+    ledger.close()
+
+    segments = sorted(os.listdir(tmp_path))
+    assert len(segments) > 1
+
+    # Simulate a crash mid-write on the newest segment
+    with open(os.path.join(tmp_path, segments[-1]), "ab") as f:
+        f.write(b"\x00\x00\x01\x00garbage")
+
+    reopened = ForensicLedger(SegmentStorage(str(tmp_path)))
+    assert len(reopened.entries) == 20
+    assert [e.payload["i"] for e in reopened.entries] == list(range(20))
+    reopened.commit({"i": 20}, "k20")
+    assert reopened.entries[20].prev_hash == reopened.entries[19].chain_hash
+    reopened.close()
+
+def test_interval_group_commit(tmp_path):
+    storage = SegmentStorage(str(tmp_path), FsyncPolicy.interval_ms(5))
+    ledger = ForensicLedger(storage)
+    for i in range(100):
+        ledger.commit({"i": i}, f"k{i}")
+    ledger.close()
+    assert len(SegmentStorage(str(tmp_path), read_only=True)) == 100
@@ -0,0 +1,81 @@
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import pytest
+from voltyield_ledger_core import rulepack, sweep
+from voltyield_ledger_core.cli import main
+from voltyield_ledger_core.regulatory import RegulatoryEngine
+from voltyield_ledger_core.sweep import COLUMNS, SweepGrid, SweepResult, iter_sweep, run_sweep
+
+ASSETS = [
+    {"id": f"A-{i}", "cost_minor": 4000000 + 750000 * i, "weight_lbs": [5500, 6500, 9000, 15000][i % 4],
+     "date_service": ["2023-04-01", "2024-08-15", "2025-03-01"][i % 3]}
+    for i in range(7)
+]
+
+def _expected(version, asset_id, date, business_use):
+    asset = dict(next(a for a in ASSETS if a["id"] == asset_id), date_service=date)
+    report = RegulatoryEngine(version).evaluate_all(asset, business_use)
+    amounts = {r["rule"]: r["amount"] for r in report["results"]}
+    return [amounts["US_SEC_179_HEAVY"], amounts["US_MACRS_2026"], amounts.get("US_45W", 0), report["total_deduction_first_year"]]
+
+@pytest.fixture
+def two_versions(tmp_path, monkeypatch):
+    """A rulepack directory where 2025.1.0 is the shipped pack and v2026.1.1 changes 179, bonus and 45W."""
+    with open(rulepack.rulepack_path("default")) as f:
+        data = json.load(f)
+    packs = tmp_path / "rulepacks"
+    packs.mkdir()
+    (packs / "2025.1.0.json").write_text(json.dumps(data))
+    rules = data["rules"]
+    rules["US_SEC_179_HEAVY"]["cap_minor_by_year"]["steps"] = [[2024, 2600000], [2025, 2500000]]
+    rules["US_MACRS_2026"]["bonus_rate_by_year"]["steps"] = [[2023, 0.5], [2024, 0.3], [2025, 0.1]]
+    rules["US_45W"]["cap_minor_by_weight"]["default"] = 500000
+    (packs / "v2026.1.1.json").write_text(json.dumps(data))
+    monkeypatch.setattr(rulepack, "RULEPACK_DIR", str(packs))
+    # Spawned workers re-import everything, so they only see the fixture packs through their tasks.
+    spawn = multiprocessing.get_context("spawn")
+    monkeypatch.setattr(sweep, "ProcessPoolExecutor", lambda max_workers: ProcessPoolExecutor(max_workers, mp_context=spawn))
+    return ["2025.1.0", "v2026.1.1"]
+
+def test_sweep_file_matches_evaluate_all(tmp_path, two_versions):
+    grid = SweepGrid(ASSETS, range(0, 101, 25), [None, "2025-01-20"], two_versions)
+    path = str(tmp_path / "sweep.bin")
+    assert run_sweep(grid, path, workers=2, chunk_assets=2) == len(grid) == 7 * 5 * 2 * 2
+
+    with SweepResult(path) as result:
+        assert len(result) == len(grid)
+        fingerprints = result.header["rulepack_fingerprints"]
+        assert len(set(fingerprints)) == 2
+        # Version-major rows: the second half is the same scenarios under v2026.1.1.
+        half = len(grid) // 2
+        for name in COLUMNS:
+            assert list(result.columns[name][:half]) != list(result.columns[name][half:])
+        for row in range(len(result)):
+            record = result.row(row)
+            expected = _expected(record["version"], record["asset_id"], record["date_service"], record["business_use_percent"])
+            assert [record[name] for name in COLUMNS] == expected
+
+    # Every worker evaluated its rows under the pack the header names for their version.
+    per_version = len(grid) // 2
+    for first_row, fingerprint, _ in iter_sweep(grid, workers=2, chunk_assets=2):
+        assert fingerprint == fingerprints[first_row // per_version]
+
+    # Chunking and worker count only change how the work is split.
+    serial = [(row, {k: list(v) for k, v in cols.items()}) for row, _, cols in iter_sweep(grid, workers=1, chunk_assets=3)]
+    assert [row for row, _ in serial] == sorted(row for row, _ in serial)
+    with SweepResult(path) as result:
+        for first_row, columns in serial:
+            for name, values in columns.items():
+                assert list(result.columns[name][first_row:first_row + len(values)]) == values
+
+def test_sweep_cli(tmp_path):
+    assets = tmp_path / "assets.json"
+    assets.write_text(json.dumps(ASSETS))
+    out = str(tmp_path / "out.bin")
+    assert main(["sweep", str(assets), out, "--business-use", "0:100:50", "60", "--dates", "asset", "2026-01-01", "--workers", "1"]) == 0
+    with SweepResult(out) as result:
+        assert len(result) == 7 * 4 * 2
+        assert result.row(3)["business_use_percent"] == 60
+    with pytest.raises(ValueError):
+        SweepGrid([], [100])
@@ -0,0 +1,59 @@
+import random
+import pytest
+from voltyield_ledger_core.battery import BatteryPassport
+from voltyield_ledger_core.models import Receipt, TelemetryEvent
+from voltyield_ledger_core.processor import ReceiptStitcher
+from voltyield_ledger_core.telemetry import TelemetryStore, format_timestamp_ms
+from voltyield_ledger_core.indexes import parse_timestamp_ms
+
+def _events(n=200, seed=3):
+    rng = random.Random(seed)
+    return [TelemetryEvent(asset_id=f"V-{rng.randrange(5)}", timestamp_iso=format_timestamp_ms(1767225600000 + rng.randrange(0, 86_400_000)),
+                           lat=rng.uniform(33.9, 34.2), lon=rng.uniform(-0.1, 0.1), kwh_delivered=rng.randrange(1000, 60000),
+                           status=rng.choice(["CHARGING", "DC_FAST"]), unbroken_lineage=rng.random() < 0.5)
+            for _ in range(n)]
+
+def test_store_keeps_time_order_and_slices_without_copying():
+    events = _events()
+    store = TelemetryStore()
+    store.extend(events[:120])
+    store.extend(events[120:])  # overlaps the first batch in time
+    times = list(store.view().time_ms)
+    assert times == sorted(parse_timestamp_ms(e.timestamp_iso) for e in events)
+
+    since, until = times[50], times[150]
+    with store.view(since, until) as view:
+        assert view.time_ms.obj is store._columns["time_ms"]  # a window onto the column, not a copy
+        expected = [e for e in events if since <= parse_timestamp_ms(e.timestamp_iso) < until]
+        assert view.kwh_total() == sum(e.kwh_delivered for e in expected)
+        assert view.kwh_total("V-2") == sum(e.kwh_delivered for e in expected if e.asset_id == "V-2")
+        assert sum(view.kwh_by_asset().values()) == view.kwh_total()
+        assert sorted(view, key=lambda e: (e.timestamp_iso, e.asset_id, e.kwh_delivered)) == \
+            sorted(expected, key=lambda e: (e.timestamp_iso, e.asset_id, e.kwh_delivered))
+    store.append(events[0])  # views released, so the columns can grow again
+
+def test_saved_store_maps_read_only_and_feeds_stitching_and_analytics(tmp_path):
+    events = _events()
+    store = TelemetryStore()
+    store.extend(events)
+    store.save(str(tmp_path / "fleet.tel"))
+
+    opened = TelemetryStore.open(str(tmp_path / "fleet.tel"))
+    assert len(opened) == len(store)
+    assert opened.kwh_total() == store.kwh_total()
+    with pytest.raises(ValueError):
+        opened.append(events[0])
+
+    receipt = Receipt(receipt_id="R-1", vendor="ChargePoint", amount_minor=1500, currency="USD",
+                      timestamp_iso=events[7].timestamp_iso, confidence=34.0)
+    event, evidence_hash = ReceiptStitcher().stitch(receipt, opened)
+    reference, _ = ReceiptStitcher().stitch(receipt, events)
+    assert (event.asset_id, event.timestamp_iso, event.lat, event.kwh_delivered) == \
+        (reference.asset_id, reference.timestamp_iso, reference.lat, reference.kwh_delivered)
+
+    with opened.view() as view:
+        rows = [e for e in events if e.asset_id == "V-1"]
+        ratio = BatteryPassport().fast_charge_ratio(view, "V-1")
+        assert ratio == sum(e.status == "DC_FAST" for e in rows) / len(rows)
+        assert BatteryPassport().fast_charge_ratio(view, "V-404") == 0.0
+    opened.close()
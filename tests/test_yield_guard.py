@@ -0,0 +1,86 @@
+import random
+from voltyield_ledger_core import yield_guard
+from voltyield_ledger_core.models import BasisSlice
+from voltyield_ledger_core.regulatory import RuleResult
+from voltyield_ledger_core.yield_guard import FleetOptimizer, SharedPool, YieldOptimizer
+
+def _rule(rule_id, amount, category="GENERAL"):
+    return RuleResult(rule_id, True, amount, {"basis_category": category}, f"Cite {rule_id}")
+
+def test_exact_beats_greedy_on_combinations():
+    rules = [_rule("R1", 600), _rule("R2", 500), _rule("R3", 500)]
+    assert YieldOptimizer().optimize(rules, {"GENERAL": 1000}).total_yield == 600
+    plan = YieldOptimizer("EXACT").optimize(rules, {"GENERAL": 1000})
+    assert plan.optimal and plan.total_yield == 1000
+    assert [r.rule_id for r in plan.chosen_incentives] == ["R2", "R3"]
+
+def test_partial_application_and_exclusive_groups():
+    rules = [_rule("LCFS", 700, "EQUIPMENT"), _rule("30C", 400, "EQUIPMENT"), _rule("AER", 300, "EQUIPMENT"),
+             _rule("VAT", 900, "INSTALLATION"), _rule("45W", 500, "INSTALLATION")]
+    basis = [BasisSlice(asset_id="A", amount_minor=600, category="EQUIPMENT"),
+             BasisSlice(asset_id="A", amount_minor=400, category="EQUIPMENT"),
+             BasisSlice(asset_id="A", amount_minor=800, category="INSTALLATION")]
+    plan = YieldOptimizer("EXACT").optimize(rules, basis, exclusive_groups=[["LCFS", "30C"], ["VAT", "45W"]],
+                                            partial_rules=["LCFS", "VAT"])
+    claimed = {r.rule_id: r.amount for r in plan.chosen_incentives}
+    # LCFS wins its group and AER fills the rest of EQUIPMENT; VAT is claimed in part up to the 800 basis.
+    assert plan.total_yield == 1800
+    assert claimed == {"LCFS": 700, "AER": 300, "VAT": 800}
+    vat = next(r for r in plan.chosen_incentives if r.rule_id == "VAT")
+    assert vat.trace["applied_partially"] and vat.trace["full_amount"] == 900
+
+def test_exact_is_order_independent_and_falls_back_on_budget(monkeypatch):
+    rng = random.Random(11)
+    rules = [_rule(f"R{i:02d}", rng.randrange(10001, 99999, 2)) for i in range(40)]
+    basis = {"GENERAL": 1234567}
+    plan = YieldOptimizer("EXACT").optimize(rules, basis)
+    shuffled = rules[:]
+    rng.shuffle(shuffled)
+    again = YieldOptimizer("EXACT").optimize(shuffled, basis)
+    assert plan.optimal and plan.total_yield == again.total_yield == 1234567
+    assert [r.rule_id for r in plan.chosen_incentives] == [r.rule_id for r in again.chosen_incentives]
+
+    # Too large for the subset-sum DP and no time to search: the greedy plan comes back.
+    monkeypatch.setattr(yield_guard, "_MAX_DP_BITS", 1)
+    fallback = YieldOptimizer("EXACT", time_budget_seconds=0).optimize(rules, {"GENERAL": 1234566})
+    greedy = YieldOptimizer().optimize(rules, {"GENERAL": 1234566})
+    assert not fallback.optimal
+    assert [r.rule_id for r in fallback.chosen_incentives] == [r.rule_id for r in greedy.chosen_incentives]
+
+def test_fleet_optimizer_shares_pools_across_assets():
+    results = {
+        "A": [_rule("US_SEC_179_HEAVY", 900), _rule("US_LCFS", 300, "EQUIPMENT")],
+        "B": [_rule("US_SEC_179_HEAVY", 700), _rule("US_LCFS", 500, "EQUIPMENT")],
+        "C": [_rule("US_SEC_179_HEAVY", 800), _rule("US_LCFS", 100, "EQUIPMENT")],
+    }
+    pools = [SharedPool("179-T1", 1000, ["US_SEC_179_HEAVY"], ["A", "B"]),
+             SharedPool("179-T2", 500, ["US_SEC_179_HEAVY"], ["C"]),
+             SharedPool("LCFS", 700, ["US_LCFS"])]
+    plan = FleetOptimizer(pools, partial_rules=["US_SEC_179_HEAVY"]).optimize(results, {"A": {"GENERAL": 2000, "EQUIPMENT": 200},
+                                                                                        "B": {"GENERAL": 2000, "EQUIPMENT": 600},
+                                                                                        "C": {"GENERAL": 2000, "EQUIPMENT": 600}})
+    claimed = {a: {r.rule_id: r.amount for r in p.chosen_incentives} for a, p in plan.plans.items()}
+    # Taxpayer 1's limit goes to A first and B gets the rest; A's LCFS does not fit its EQUIPMENT basis.
+    assert claimed == {"A": {"US_SEC_179_HEAVY": 900}, "B": {"US_SEC_179_HEAVY": 100, "US_LCFS": 500},
+                       "C": {"US_SEC_179_HEAVY": 500, "US_LCFS": 100}}
+    assert plan.pool_usage == {"179-T1": 1000, "179-T2": 500, "LCFS": 600}
+    assert plan.total_yield == 2100 == sum(p.total_yield for p in plan.plans.values())
+    assert plan.plans["B"].chosen_incentives[0].trace["full_amount"] == 700
+
+def test_fleet_optimizer_is_order_independent():
+    rng = random.Random(5)
+    results = {f"A{i:03d}": [_rule("US_SEC_179_HEAVY", rng.randrange(0, 5000, 100)),
+                             _rule("US_LCFS", rng.randrange(0, 3000, 100), "EQUIPMENT"),
+                             _rule("US_45W", rng.randrange(0, 2000, 100))] for i in range(300)}
+    pools = [SharedPool("179", 200000, ["US_SEC_179_HEAVY"]), SharedPool("LCFS", 150000, ["US_LCFS", "US_45W"])]
+    optimizer = FleetOptimizer(pools, exclusive_groups=[["US_LCFS", "US_45W"]], partial_rules=["US_LCFS"])
+    plan = optimizer.optimize(results)
+    items = list(results.items())
+    rng.shuffle(items)
+    again = optimizer.optimize({a: rules[::-1] for a, rules in items})
+
+    def summary(p):
+        return {a: [(r.rule_id, r.amount) for r in y.chosen_incentives] for a, y in p.plans.items()}
+    assert summary(plan) == summary(again)
+    assert plan.pool_usage == again.pool_usage and plan.pool_usage["179"] <= 200000 and plan.pool_usage["LCFS"] <= 150000
+    assert all(len({r.rule_id for r in y.chosen_incentives} & {"US_LCFS", "US_45W"}) <= 1 for y in plan.plans.values())
@@ -1,11 +1,17 @@
 from typing import List, Optional, Dict
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 import uvicorn
 import hashlib
 import json
 from voltyield_ledger_core.regulatory import RegulatoryEngine
-from voltyield_ledger_core.ledger import ForensicLedger, canonicalize
+from voltyield_ledger_core.ledger import (
+    ForensicLedger, CanonicalPayload,
+    canonicalize_charging_event, canonicalize_verified_charging_event
+)
+from voltyield_ledger_core.ingest import LedgerWriter
+from voltyield_ledger_core.export import FORMATS, export_ledger
 from voltyield_ledger_core.adapters import (
     Vault, InMemoryEncryptedVault,
     ReceiptParser, MockReceiptParser,
@@ -13,8 +19,11 @@ from voltyield_ledger_core.adapters import (
 )
 
 app = FastAPI()
-engine = RegulatoryEngine("2025.1.0")
+# Dashboards re-certify the same assets; reports are memoized per rulepack fingerprint.
+engine = RegulatoryEngine("2025.1.0", cache_size=4096, cache_ttl_seconds=300)
 ledger = ForensicLedger()
+# All request-path commits go through one writer so concurrent handlers cannot fork the chain.
+ledger_writer = LedgerWriter(ledger)
 
 # Dependency Injection Setup
 def get_vault() -> Vault:
@@ -73,15 +82,17 @@ class WebhookEvent(BaseModel):
     data: dict
 
 @app.post("/webhooks/charging")
-def webhook_charging(event: WebhookEvent):
+async def webhook_charging(event: WebhookEvent):
     # "Charging Event Start/Stop"
     # Push to SHA-256 Notarization Service
 
-    # Create a unique key for idempotency using the whole event content
-    idempotency_key = hashlib.sha256(canonicalize(event.model_dump())).hexdigest()
+    # Dump, serialize and hash the event once; its entry hash doubles as the idempotency key
+    payload = event.model_dump()
+    prepared = CanonicalPayload(payload, canonicalize_charging_event(event.event_type, event.timestamp, payload["data"]))
+    idempotency_key = prepared.entry_hash
 
     try:
-        entry = ledger.commit(event.model_dump(), idempotency_key=idempotency_key)
+        entry = await ledger_writer.submit(prepared, idempotency_key=idempotency_key)
         return {"status": "NOTARIZED", "hash": entry.entry_hash}
     except ValueError as e:
         # In a real scenario, we might return 200 to acknowledge receipt even if duplicate,
@@ -131,8 +142,12 @@ async def ingest_receipt(
             "certificate_hash": certificate_hash
         }
 
+        prepared = CanonicalPayload(payload, canonicalize_verified_charging_event(
+            asset_id, receipt_data, telemetry_event, certificate_hash
+        ))
+
         try:
-            ledger.commit(payload, idempotency_key=certificate_hash)
+            await ledger_writer.submit(prepared, idempotency_key=certificate_hash)
         except ValueError:
             # Already notarized
             pass
@@ -145,6 +160,27 @@ async def ingest_receipt(
     else:
         return {"status": "MATCH_FAILED"}
 
+# --- Audit Export ---
+
+@app.get("/ledger/export")
+def export_entries(
+    format: str = "ndjson",
+    cursor: int = 0,
+    limit: Optional[int] = None,
+    asset_id: Optional[str] = None,
+    rule_id: Optional[str] = None,
+    type: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None
+):
+    # Streamed in chunks straight from storage; resume an interrupted pull with cursor = last index + 1.
+    try:
+        chunks = export_ledger(ledger, format, cursor, limit, since, until,
+                               asset_id=asset_id, rule_id=rule_id, type=type)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(chunks, media_type=FORMATS[format])
+
 # --- Existing Endpoints ---
 
 @app.post("/ingest/files")
@@ -220,6 +256,6 @@ def certify_asset(asset_id: str, business_use_percent: int = 100):
         }
 
     # Pro View
-    report = engine.evaluate_all(asset_data, business_use_percent)
+    report = engine.evaluate_all_cached(asset_data, business_use_percent)
 
     return report
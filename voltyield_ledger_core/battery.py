@@ -1,6 +1,9 @@
-from typing import Dict, Any, Union
+from typing import Dict, Any, Sequence, Union, TYPE_CHECKING
 from dataclasses import dataclass
 
+if TYPE_CHECKING:
+    from .telemetry import TelemetryView
+
 @dataclass
 class BatteryHealthEvent:
     soh: float
@@ -14,6 +17,14 @@ class BatteryPassport:
     In a real system, this would analyze internal resistance, thermal history, etc.
     """
 
+    def fast_charge_ratio(self, telemetry: "TelemetryView", asset_id: str, fast_statuses: Sequence[str] = ("DC_FAST",)) -> float:
+        """Share of an asset's telemetry rows in a fast-charging status, for BatteryHealthEvent.fast_charge_ratio."""
+        counts = telemetry.status_counts(asset_id)
+        total = sum(counts.values())
+        if not total:
+            return 0.0
+        return sum(counts.get(status, 0) for status in fast_statuses) / total
+
     def calculate_resale_grade(self, input_data: Union[str, BatteryHealthEvent]) -> Dict[str, Any]:
         """
         Calculates the resale grade and value adjustment for a battery asset.
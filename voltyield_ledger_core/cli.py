@@ -1,5 +1,6 @@
 import sys
 import json
+import argparse
 from .models import TelemetryEvent, Receipt, AuditState
 from .ledger import ForensicLedger
 from .processor import ReceiptStitcher
@@ -9,7 +10,7 @@ from .yield_guard import YieldOptimizer
 def demo_full_stack():
     ledger = ForensicLedger()
     stitcher = ReceiptStitcher()
-    engine = RegulatoryEngine(rulepack_version="v2026.1.1")
+    engine = RegulatoryEngine(rulepack_version="2025.1.0")
     optimizer = YieldOptimizer()
 
     # 1. Ingestion
@@ -113,16 +114,109 @@ def demo_full_stack():
     print(f"TOTAL VERIFIED VALUE:  ${plan.total_yield / 100:,.2f}")
     print("-------------------------------------------------------")
 
-def main():
-    if len(sys.argv) > 1:
-        if sys.argv[1] == "demo":
-            demo_full_stack()
-        elif sys.argv[1] == "serve":
-            import uvicorn
-            uvicorn.run("voltyield_ledger_core.api:app", host="0.0.0.0", port=8000, reload=True)
-            return
-
-    print("Usage: python -m voltyield_ledger_core.cli [demo|serve]")
+def snapshots_command(args):
+    from .snapshot import SnapshotManager
+    manager = SnapshotManager(args.directory)
+    if args.action == "prune":
+        for path in manager.prune(args.keep):
+            print(f"removed {path}")
+        return
+    for path in manager.list():
+        try:
+            snapshot = manager.read(path)
+            print(f"{path}  entries={snapshot.entry_count}  head={snapshot.chain_head}")
+        except ValueError as e:
+            print(f"{path}  INVALID ({e})")
+
+def verify_command(args) -> int:
+    from .storage import SegmentStorage
+    from .verify import verify_storage
+
+    def progress(done: int, total: int, phase: str):
+        sys.stderr.write(f"\r[{phase}] {done}/{total} entries")
+        sys.stderr.flush()
+        if done == total:
+            sys.stderr.write("\n")
+
+    try:
+        storage = SegmentStorage(args.directory, read_only=True)
+    except (OSError, ValueError) as e:
+        # A mistyped path must not pass an audit as an empty, intact ledger.
+        print(json.dumps({"ok": False, "error": str(e)}, indent=2))
+        return 2
+    try:
+        report = verify_storage(storage, args.workers, args.shard_size, progress)
+    finally:
+        storage.close()
+    print(json.dumps(report.as_dict(), indent=2))
+    return 0 if report.ok else 1
+
+def _business_use_values(specs) -> list:
+    """Business-use percentages from plain values and inclusive "start:stop:step" ranges."""
+    values = []
+    for spec in specs:
+        parts = [int(p) for p in spec.split(":")]
+        if len(parts) == 1:
+            values.append(parts[0])
+        elif len(parts) == 3 and parts[2] > 0:
+            values.extend(range(parts[0], parts[1] + 1, parts[2]))
+        else:
+            raise ValueError(f"Invalid business use range: {spec}")
+    return values
+
+def sweep_command(args) -> int:
+    from .sweep import SweepGrid, run_sweep
+    with open(args.assets) as f:
+        assets = json.load(f)
+    dates = [None if d == "asset" else d for d in args.dates]
+    grid = SweepGrid(assets, _business_use_values(args.business_use), dates, args.versions)
+    rows = run_sweep(grid, args.output, args.workers, args.chunk_assets)
+    print(json.dumps({"rows": rows, "output": args.output}))
+    return 0
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="voltyield-ledger")
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("demo", help="Run the full-stack compliance demo")
+    commands.add_parser("serve", help="Serve the API on port 8000")
+
+    verify = commands.add_parser("verify", help="Verify every entry hash and chain link of a segment ledger")
+    verify.add_argument("directory", help="Segment storage directory")
+    verify.add_argument("--workers", type=int, default=None, help="Hashing processes (default: CPU count)")
+    verify.add_argument("--shard-size", type=int, default=50_000, help="Entries per hashing shard")
+
+    snapshots = commands.add_parser("snapshots", help="List or prune ledger snapshots")
+    snapshots.add_argument("action", choices=["list", "prune"])
+    snapshots.add_argument("directory", help="Snapshot directory")
+    snapshots.add_argument("--keep", type=int, default=2, help="Snapshots to keep when pruning")
+
+    sweep = commands.add_parser("sweep", help="Evaluate a business-use/date/rulepack what-if grid into a columnar result file")
+    sweep.add_argument("assets", help="JSON list of assets (id, cost_minor, weight_lbs, date_service)")
+    sweep.add_argument("output", help="Result file to write")
+    sweep.add_argument("--business-use", nargs="+", default=["0:100:1"], help='Percentages or inclusive "start:stop:step" ranges')
+    sweep.add_argument("--dates", nargs="+", default=["asset"], help='Placed-in-service dates ("asset" keeps each asset\'s own)')
+    sweep.add_argument("--versions", nargs="+", default=["default"], help="Rulepack versions")
+    sweep.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    sweep.add_argument("--chunk-assets", type=int, default=2_000, help="Assets per worker task")
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    if args.command == "demo":
+        demo_full_stack()
+    elif args.command == "serve":
+        import uvicorn
+        uvicorn.run("voltyield_ledger_core.api:app", host="0.0.0.0", port=8000, reload=True)
+    elif args.command == "verify":
+        return verify_command(args)
+    elif args.command == "snapshots":
+        snapshots_command(args)
+    elif args.command == "sweep":
+        return sweep_command(args)
+    else:
+        print("Usage: python -m voltyield_ledger_core.cli [demo|serve|verify|snapshots|sweep]")
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
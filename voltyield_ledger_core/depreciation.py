@@ -0,0 +1,172 @@
+from array import array
+from itertools import accumulate
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .regulatory import RegulatoryEngine
+
+CONVENTIONS = ("AUTO", "HALF_YEAR", "MID_QUARTER")
+
+# IRS Publication 946, Appendix A: GDS 200% declining balance, in basis points of the
+# depreciable basis per recovery year. Table A-1 (half-year) and A-2..A-5 (mid-quarter,
+# placed in service in quarter 1..4).
+_GDS_200DB = {
+    3: {"HY": (3333, 4445, 1481, 741),
+        "MQ1": (5833, 2778, 1235, 154), "MQ2": (4167, 3889, 1414, 530),
+        "MQ3": (2500, 5000, 1667, 833), "MQ4": (833, 6111, 2037, 1019)},
+    5: {"HY": (2000, 3200, 1920, 1152, 1152, 576),
+        "MQ1": (3500, 2600, 1560, 1101, 1101, 138), "MQ2": (2500, 3000, 1800, 1137, 1137, 426),
+        "MQ3": (1500, 3400, 2040, 1224, 1130, 706), "MQ4": (500, 3800, 2280, 1368, 1094, 958)},
+    7: {"HY": (1429, 2449, 1749, 1249, 893, 892, 893, 446),
+        "MQ1": (2500, 2143, 1531, 1093, 875, 874, 875, 109), "MQ2": (1785, 2347, 1676, 1197, 887, 887, 887, 334),
+        "MQ3": (1071, 2551, 1822, 1302, 930, 885, 886, 553), "MQ4": (357, 2755, 1968, 1406, 1004, 873, 873, 764)},
+}
+
+# A table is (denominator, cumulative numerators); year k deducts
+# basis * cum[k] // den - basis * cum[k - 1] // den, so a schedule always sums to the basis exactly.
+_Table = Tuple[int, Tuple[int, ...]]
+
+def _gds_table(recovery_period: int, key: str) -> _Table:
+    return 10000, tuple(accumulate(_GDS_200DB[recovery_period][key]))
+
+def _ads_table(recovery_period: int, key: str) -> _Table:
+    """ADS straight line over `recovery_period` years with the given convention."""
+    if key == "HY":
+        parts = [1] + [2] * (recovery_period - 1) + [1]
+        return 2 * recovery_period, tuple(accumulate(parts))
+    quarter = int(key[2])
+    first = 9 - 2 * quarter
+    parts = [first] + [8] * (recovery_period - 1) + [8 - first]
+    return 8 * recovery_period, tuple(accumulate(parts))
+
+def _amounts(basis: int, table: _Table) -> List[int]:
+    den, cumulative = table
+    previous = 0
+    amounts = []
+    for cum in cumulative:
+        total = basis * cum // den
+        amounts.append(total - previous)
+        previous = total
+    return amounts
+
+class DepreciationSchedules:
+    """
+    Assets x tax years integer matrices (row-major int64, minor units). Column j is tax
+    year first_year + j. `deductions` holds the Section 179 + bonus + regular depreciation
+    claimed each year; `recapture` holds excess depreciation brought back into income
+    when business use falls to 50% or less. `mid_quarter_years` lists the placed-in-service
+    years that used the mid-quarter convention.
+    """
+    def __init__(self, first_year: int, years: int, deductions: array, recapture: array, mid_quarter_years: List[int]):
+        self.first_year = first_year
+        self.years = years
+        self.deductions = deductions
+        self.recapture = recapture
+        self.mid_quarter_years = mid_quarter_years
+
+    def __len__(self) -> int:
+        return len(self.deductions) // self.years if self.years else 0
+
+    def row(self, i: int) -> List[int]:
+        return list(self.deductions[i * self.years:(i + 1) * self.years])
+
+    def recapture_row(self, i: int) -> List[int]:
+        return list(self.recapture[i * self.years:(i + 1) * self.years])
+
+    def year_totals(self) -> Dict[int, int]:
+        """Fleet deductions per tax year."""
+        totals = [0] * self.years
+        for offset, amount in enumerate(self.deductions):
+            totals[offset % self.years] += amount
+        return {self.first_year + j: total for j, total in enumerate(totals)}
+
+def depreciation_schedules(engine: "RegulatoryEngine", cost_minor: Sequence[int], weight_lbs: Sequence[int],
+                           date_service: Sequence[str], business_use_percent: Sequence[int],
+                           recovery_period: int = 5, convention: str = "AUTO", ads_recovery_period: int = 5,
+                           business_use_changes: Optional[Mapping[int, Tuple[int, int]]] = None) -> DepreciationSchedules:
+    """
+    Full MACRS schedules for a fleet in one pass. Section 179 and bonus come from
+    evaluate_fleet (so year one agrees with evaluate_all), the rest of the business basis
+    follows the GDS 200% DB table for `recovery_period`. Assets at or below the MACRS
+    business-use threshold use ADS straight line instead. AUTO applies the mid-quarter
+    convention to a placed-in-service year when more than 40% of that year's depreciable
+    basis was placed in service in Q4 (IRC § 168(d)(3)).
+    business_use_changes maps a row to (tax year, new business use percent) for a later
+    drop to the threshold or below (IRC § 280F(b)(2)): the excess of depreciation claimed
+    before that year over ADS is recaptured in that year, and ADS on the new business
+    basis applies from then on.
+    """
+    if recovery_period not in _GDS_200DB:
+        raise ValueError(f"Unsupported recovery period: {recovery_period}")
+    if convention not in CONVENTIONS:
+        raise ValueError(f"Unknown convention: {convention}")
+    if ads_recovery_period < 1:
+        raise ValueError(f"Invalid ADS recovery period: {ads_recovery_period}")
+    changes = business_use_changes or {}
+    threshold = engine._macrs["min_business_use_percent"]
+    fleet = engine.evaluate_fleet(cost_minor, weight_lbs, date_service, business_use_percent)
+    count = len(fleet)
+
+    placed: List[Tuple[int, int]] = []
+    q4_basis: Dict[int, int] = {}
+    year_basis: Dict[int, int] = {}
+    for i, (cost, date, business_use) in enumerate(zip(cost_minor, date_service, business_use_percent)):
+        try:
+            year, month = int(date[:4]), int(date[5:7])
+        except ValueError:
+            raise ValueError(f"Invalid date_service at row {i}: {date!r}") from None
+        if not 1 <= month <= 12:
+            raise ValueError(f"Invalid date_service at row {i}: {date!r}")
+        quarter = (month - 1) // 3 + 1
+        placed.append((year, quarter))
+        # The 40% test counts depreciable basis, i.e. after the Section 179 expense.
+        basis = (cost * business_use) // 100 - fleet.sec_179[i]
+        year_basis[year] = year_basis.get(year, 0) + basis
+        if quarter == 4:
+            q4_basis[year] = q4_basis.get(year, 0) + basis
+    if convention == "AUTO":
+        mid_quarter = {y for y, total in year_basis.items() if total > 0 and q4_basis.get(y, 0) * 10 > total * 4}
+    else:
+        mid_quarter = set(year_basis) if convention == "MID_QUARTER" else set()
+
+    first_year = min((y for y, _ in placed), default=0)
+    last_year = max((y for y, _ in placed), default=0)
+    years = last_year - first_year + max(recovery_period, ads_recovery_period) + 1 if count else 0
+    deductions = array("q", bytes(8 * count * years))
+    recapture = array("q", bytes(8 * count * years))
+    tables: Dict[Tuple[str, str], _Table] = {}
+
+    def table(kind: str, key: str) -> _Table:
+        cached = tables.get((kind, key))
+        if cached is None:
+            cached = tables[(kind, key)] = _gds_table(recovery_period, key) if kind == "GDS" else _ads_table(ads_recovery_period, key)
+        return cached
+
+    for i, (cost, business_use) in enumerate(zip(cost_minor, business_use_percent)):
+        year, quarter = placed[i]
+        key = f"MQ{quarter}" if year in mid_quarter else "HY"
+        business_cost = (cost * business_use) // 100
+        base = i * years + (year - first_year)
+        change = changes.get(i)
+        if business_use <= threshold:
+            schedule = _amounts(business_cost, table("ADS", key))
+        else:
+            expensed = fleet.sec_179[i] + fleet.macrs[i]
+            schedule = _amounts(business_cost - expensed, table("GDS", key))
+            schedule[0] += expensed
+            if change is not None:
+                drop_year, new_use = change
+                if new_use > threshold:
+                    raise ValueError(f"Business use change at row {i} is not a drop to {threshold}% or less")
+                d = drop_year - year
+                if d < 1:
+                    raise ValueError(f"Business use change at row {i} is not after the placed-in-service year")
+                ads = _amounts(business_cost, table("ADS", key))
+                if d < len(ads):
+                    recapture[base + d] = max(0, sum(schedule[:d]) - sum(ads[:d]))
+                    after = _amounts((cost * new_use) // 100, table("ADS", key))
+                    schedule = schedule[:d] + after[d:]
+        for k, amount in enumerate(schedule):
+            deductions[base + k] = amount
+
+    return DepreciationSchedules(first_year, years, deductions, recapture, sorted(mid_quarter))
@@ -0,0 +1,114 @@
+import struct
+from typing import Any, Iterator, Optional, Union
+from .ledger import ForensicLedger, LedgerEntry, _escape
+from .indexes import parse_timestamp_ms
+
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "cbor": "application/cbor-seq",
+}
+# Rows are grouped into chunks of about this size so a large export is not one write per entry.
+DEFAULT_CHUNK_BYTES = 64 * 1024
+
+def _cbor_head(major: int, value: int) -> bytes:
+    if value < 24:
+        return bytes([major << 5 | value])
+    if value < 1 << 8:
+        return bytes([major << 5 | 24, value])
+    if value < 1 << 16:
+        return bytes([major << 5 | 25]) + struct.pack(">H", value)
+    if value < 1 << 32:
+        return bytes([major << 5 | 26]) + struct.pack(">I", value)
+    return bytes([major << 5 | 27]) + struct.pack(">Q", value)
+
+def cbor_encode(value: Any) -> bytes:
+    """
+    Deterministic CBOR (RFC 8949 § 4.2.1) for JSON-like values plus bytes:
+    shortest-form heads, map keys ordered by their encoded bytes.
+    """
+    if value is None:
+        return b"\xf6"
+    if value is True:
+        return b"\xf5"
+    if value is False:
+        return b"\xf4"
+    if isinstance(value, int):
+        if not -(1 << 64) <= value < 1 << 64:
+            raise ValueError(f"Integer out of CBOR range: {value}")
+        return _cbor_head(0, value) if value >= 0 else _cbor_head(1, -1 - value)
+    if isinstance(value, float):
+        return b"\xfb" + struct.pack(">d", value)
+    if isinstance(value, (bytes, bytearray)):
+        return _cbor_head(2, len(value)) + bytes(value)
+    if isinstance(value, str):
+        data = value.encode("utf-8")
+        return _cbor_head(3, len(data)) + data
+    if isinstance(value, (list, tuple)):
+        return _cbor_head(4, len(value)) + b"".join(cbor_encode(v) for v in value)
+    if isinstance(value, dict):
+        items = sorted((cbor_encode(k), cbor_encode(v)) for k, v in value.items())
+        return _cbor_head(5, len(items)) + b"".join(k + v for k, v in items)
+    raise ValueError(f"Cannot CBOR-encode {type(value).__name__}")
+
+def _ndjson_row(index: int, entry: LedgerEntry) -> bytes:
+    # The stored canonical bytes are spliced in as-is, so `payload` re-hashes to entry_hash.
+    prev_hash = "null" if entry.prev_hash is None else _escape(entry.prev_hash)
+    return b"".join([
+        f'{{"chain_hash":"{entry.chain_hash}","entry_hash":"{entry.entry_hash}","index":{index},"payload":'.encode("utf-8"),
+        entry.canonical,
+        f',"prev_hash":{prev_hash}}}\n'.encode("utf-8"),
+    ])
+
+def _cbor_row(index: int, entry: LedgerEntry) -> bytes:
+    # Hashes travel as raw 32-byte strings; `canonical` carries the exact hashed payload bytes.
+    return cbor_encode({
+        "index": index,
+        "entry_hash": entry.entry_digest,
+        "prev_hash": entry.prev_digest,
+        "chain_hash": entry.chain_digest,
+        "canonical": entry.canonical,
+    })
+
+def export_ledger(ledger: ForensicLedger, fmt: str = "ndjson", cursor: int = 0, limit: Optional[int] = None,
+                  since: Optional[Union[str, int]] = None, until: Optional[Union[str, int]] = None,
+                  chunk_bytes: int = DEFAULT_CHUNK_BYTES, **filters: Optional[str]) -> Iterator[bytes]:
+    """
+    Streams ledger entries from index `cursor` onward as NDJSON lines or a CBOR sequence,
+    one row per entry with its index, entry_hash, prev_hash and chain_hash. Filters are the
+    ledger's secondary indexes (see ForensicLedger.query). Entries committed after the export
+    starts are not included; resume with cursor = last exported index + 1.
+    Arguments are validated before the first chunk so callers can reject a bad request up front.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    if cursor < 0:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    if limit is not None and limit < 0:
+        raise ValueError(f"Invalid limit: {limit}")
+    for name, value in filters.items():
+        if value is not None and name not in ledger.indexes.fields:
+            raise ValueError(f"No secondary index named {name}")
+    for bound in (since, until):
+        if bound is not None:
+            parse_timestamp_ms(bound)
+    return _export(ledger, _ndjson_row if fmt == "ndjson" else _cbor_row, cursor, limit, since, until, chunk_bytes, filters)
+
+def _export(ledger, encode_row, cursor, limit, since, until, chunk_bytes, filters) -> Iterator[bytes]:
+    if limit == 0:
+        return
+    chunk = []
+    pending = 0
+    exported = 0
+    for index, entry in ledger.query_items(start=cursor, since=since, until=until, **filters):
+        row = encode_row(index, entry)
+        chunk.append(row)
+        pending += len(row)
+        if pending >= chunk_bytes:
+            yield b"".join(chunk)
+            chunk = []
+            pending = 0
+        exported += 1
+        if exported == limit:
+            break
+    if chunk:
+        yield b"".join(chunk)
@@ -0,0 +1,104 @@
+from array import array
+from typing import Any, Dict, Iterator, Optional, Sequence, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .regulatory import RegulatoryEngine
+
+class FleetResult:
+    """
+    Columnar tax stack for a fleet: one int64 array per rule amount, row i for asset i.
+    Columns equal the amounts evaluate_all() reports for the same inputs (0 where a rule
+    is ineligible or, for 45W, not applied). report(i) rebuilds the full per-asset
+    report with traces on demand.
+    """
+    def __init__(self, engine: "RegulatoryEngine", inputs: Tuple[Sequence[Any], ...], asset_ids: Optional[Sequence[str]],
+                 sec_179: array, macrs: array, us_45w: array, total_deduction_first_year: array):
+        self.engine = engine
+        self._inputs = inputs
+        self.asset_ids = asset_ids
+        self.sec_179 = sec_179
+        self.macrs = macrs
+        self.us_45w = us_45w
+        self.total_deduction_first_year = total_deduction_first_year
+
+    def __len__(self) -> int:
+        return len(self.sec_179)
+
+    def columns(self) -> Dict[str, array]:
+        return {"US_SEC_179_HEAVY": self.sec_179, "US_MACRS_2026": self.macrs, "US_45W": self.us_45w,
+                "total_deduction_first_year": self.total_deduction_first_year}
+
+    def report(self, i: int) -> Dict[str, Any]:
+        """evaluate_all() output for row i."""
+        cost, weight, date, business_use = (column[i] for column in self._inputs)
+        asset_data = {"id": self.asset_ids[i] if self.asset_ids is not None else None,
+                      "cost_minor": cost, "weight_lbs": weight, "date_service": date}
+        return self.engine.evaluate_all(asset_data, business_use)
+
+    def reports(self) -> Iterator[Dict[str, Any]]:
+        for i in range(len(self)):
+            yield self.report(i)
+
+def evaluate_fleet(engine: "RegulatoryEngine", cost_minor: Sequence[int], weight_lbs: Sequence[int],
+                   date_service: Sequence[str], business_use_percent: Sequence[int],
+                   asset_ids: Optional[Sequence[str]] = None) -> FleetResult:
+    """
+    Section 179 -> MACRS bonus -> 45W for every row in one pass. Rulepack lookups are done
+    once per distinct service date instead of once per asset, and amounts use the same
+    integer and float arithmetic as the per-asset rules, so totals agree to the cent.
+    """
+    count = len(cost_minor)
+    columns = (weight_lbs, date_service, business_use_percent) + ((asset_ids,) if asset_ids is not None else ())
+    if any(len(column) != count for column in columns):
+        raise ValueError("Fleet columns must all have the same length")
+
+    sec179 = engine._sec179
+    min_weight, max_weight = sec179["min_weight_lbs"], sec179["max_weight_lbs"]
+    min_use_179 = sec179["min_business_use_percent"]
+    cap_by_year = sec179["cap_minor_by_year"].lookup
+    macrs = engine._macrs
+    min_use_macrs = macrs["min_business_use_percent"]
+    restored_after, restored_rate = macrs["restored_after"], macrs["restored_rate"]
+    rate_by_year = macrs["bonus_rate_by_year"].lookup
+    w45 = engine._45w
+    cap_by_weight = w45["cap_minor_by_weight"].lookup
+    ev_rate = w45["ev_rate"]
+
+    # date -> (179 cap, bonus rate); None marks a date without a parseable year.
+    by_date: Dict[str, Optional[Tuple[int, float]]] = {}
+    out_179 = array("q", bytes(8 * count))
+    out_macrs = array("q", bytes(8 * count))
+    out_45w = array("q", bytes(8 * count))
+    out_total = array("q", bytes(8 * count))
+
+    for i, (cost, weight, date, business_use) in enumerate(zip(cost_minor, weight_lbs, date_service, business_use_percent)):
+        business_cost = (cost * business_use) // 100
+        heavy = min_weight <= weight < max_weight
+        needs_year = (business_use > min_use_179 and heavy) or (business_use > min_use_macrs and not date > restored_after)
+        tables = None
+        if needs_year:
+            tables = by_date.get(date, False)
+            if tables is False:
+                try:
+                    year = int(date[:4])
+                    tables = by_date[date] = (cap_by_year(year), rate_by_year(year))
+                except ValueError:
+                    tables = by_date[date] = None
+            if tables is None:
+                raise ValueError(f"Invalid date_service at row {i}: {date!r}")
+
+        deduction = 0
+        if business_use > min_use_179 and heavy:
+            deduction = min(business_cost, tables[0])
+        bonus = 0
+        if business_use > min_use_macrs:
+            rate = restored_rate if date > restored_after else tables[1]
+            bonus = int(max(0, business_cost - deduction) * rate)
+        if business_use > 50:
+            out_45w[i] = min(int(cost * ev_rate), cap_by_weight(weight))
+        out_179[i] = deduction
+        out_macrs[i] = bonus
+        out_total[i] = deduction + bonus
+
+    inputs = (cost_minor, weight_lbs, date_service, business_use_percent)
+    return FleetResult(engine, inputs, asset_ids, out_179, out_macrs, out_45w, out_total)
@@ -0,0 +1,250 @@
+from bisect import bisect_right
+from typing import Any, Dict, FrozenSet, Hashable, List, Optional, Set, Tuple
+from .regulatory import RegulatoryEngine, RuleResult
+from .rulepack import CompiledRulepack, StepTable
+
+# The evaluate_all stack, in evaluation order: rule -> (input fields, upstream rules whose amount it reads).
+RULE_DEPENDENCIES: Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]] = {
+    "US_SEC_179_HEAVY": (("cost_minor", "weight_lbs", "date_service", "business_use_percent"), ()),
+    "US_MACRS_2026": (("cost_minor", "date_service", "business_use_percent"), ("US_SEC_179_HEAVY",)),
+    "US_45W": (("cost_minor", "weight_lbs", "business_use_percent"), ()),
+}
+_RULES = tuple(RULE_DEPENDENCIES)
+_ENGINE_RULES = {"_sec179": "US_SEC_179_HEAVY", "_macrs": "US_MACRS_2026", "_45w": "US_45W"}
+
+# A rulepack dependency: (rule_id, parameter) or (rule_id, step table, segment index).
+Dependency = Tuple[Hashable, ...]
+
+class _RecordingTable:
+    def __init__(self, table: StepTable, prefix: Tuple[str, str], log: Set[Dependency]):
+        self._table = table
+        self._prefix = prefix
+        self._log = log
+
+    def lookup(self, key: Any) -> Any:
+        segment = bisect_right(self._table.keys, key)
+        self._log.add(self._prefix + (segment,))
+        return self._table.values[segment]
+
+class _RecordingRule(dict):
+    """A rule's parameters that note every parameter (and step-table segment) read into a shared log."""
+    def __init__(self, rule_id: str, params: Dict[str, Any], log: Set[Dependency]):
+        super().__init__(params)
+        self._rule_id = rule_id
+        self._log = log
+
+    def __getitem__(self, name: str) -> Any:
+        value = super().__getitem__(name)
+        if isinstance(value, StepTable):
+            return _RecordingTable(value, (self._rule_id, name), self._log)
+        self._log.add((self._rule_id, name))
+        return value
+
+class Dependencies:
+    """What one stored (asset, rule) result was computed from."""
+    def __init__(self, inputs: Tuple[str, ...], upstream: Tuple[str, ...], parameters: FrozenSet[Dependency]):
+        self.inputs = inputs
+        self.upstream = upstream
+        self.parameters = parameters
+
+class DeltaReport:
+    """
+    (asset, rule) results that changed (amount, eligibility, trace or citation), how many
+    pairs were re-evaluated to find them, and the rulepack parameters that differed.
+    """
+    def __init__(self, changes: List[Dict[str, Any]], reevaluated: int, changed_parameters: List[Dependency]):
+        self.changes = changes
+        self.reevaluated = reevaluated
+        self.changed_parameters = changed_parameters
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "changes": self.changes,
+            "reevaluated": self.reevaluated,
+            "changed_parameters": [list(p) for p in self.changed_parameters],
+        }
+
+def _amount(result: Optional[RuleResult]) -> Optional[int]:
+    return None if result is None else result.amount
+
+def _state(result: Optional[RuleResult]) -> Optional[Tuple[Any, ...]]:
+    return None if result is None else (result.eligible, result.amount, result.trace, result.citation)
+
+def diff_rulepacks(old: CompiledRulepack, new: CompiledRulepack) -> List[Dependency]:
+    """
+    Parameters that differ between two packs. A step table with the same keys reports only
+    the segments whose value changed; moved keys report the whole table as (rule_id, name).
+    """
+    changed: List[Dependency] = []
+    for rule_id in sorted(set(old.rules) | set(new.rules)):
+        before, after = old.rules.get(rule_id, {}), new.rules.get(rule_id, {})
+        for name in sorted(set(before) | set(after)):
+            a, b = before.get(name), after.get(name)
+            if isinstance(a, StepTable) and isinstance(b, StepTable):
+                if a.keys == b.keys:
+                    changed.extend((rule_id, name, s) for s, (x, y) in enumerate(zip(a.values, b.values)) if x != y)
+                    continue
+            elif a == b and type(a) is type(b):
+                continue
+            changed.append((rule_id, name))
+    return changed
+
+class IncrementalEvaluator:
+    """
+    Keeps the evaluate_all stack for a fleet together with what each (asset, rule) result
+    depends on: its input fields, upstream rules, and the exact rulepack parameters and
+    step-table segments it read. Changing the rulepack or an asset's inputs re-evaluates
+    only the pairs that depend on what changed (and the downstream rules whose input
+    moved), so an update costs time proportional to the change, not the fleet.
+    """
+
+    def __init__(self, engine: RegulatoryEngine):
+        # A private engine whose rule tables record reads; the caller's engine is left alone.
+        self.engine = RegulatoryEngine(engine.version, engine.rulepack)
+        self._log: Set[Dependency] = set()
+        self._instrument()
+        self._inputs: Dict[str, Dict[str, Any]] = {}
+        self._results: Dict[str, Dict[str, Optional[RuleResult]]] = {}
+        self._dependencies: Dict[Tuple[str, str], Dependencies] = {}
+        # Rulepack dependency -> (asset_id, rule_id) pairs that read it; step tables are also indexed as a whole.
+        self._readers: Dict[Dependency, Set[Tuple[str, str]]] = {}
+
+    def _instrument(self):
+        for attribute, rule_id in _ENGINE_RULES.items():
+            setattr(self.engine, attribute, _RecordingRule(rule_id, self.engine.rulepack.rule(rule_id), self._log))
+
+    def __len__(self) -> int:
+        return len(self._inputs)
+
+    def add(self, asset_data: Dict[str, Any], business_use_percent: int = 100):
+        """Evaluates a new asset (asset_data["id"] must be unique) and records its dependencies."""
+        asset_id = asset_data.get("id")
+        if asset_id in self._inputs:
+            raise ValueError(f"Asset already tracked: {asset_id}")
+        self._inputs[asset_id] = self._normalize(asset_data, business_use_percent)
+        self._results[asset_id] = {}
+        try:
+            for rule_id in _RULES:
+                self._evaluate(asset_id, rule_id)
+        except ValueError:
+            self.remove(asset_id)
+            raise
+
+    def remove(self, asset_id: str):
+        """Stops tracking an asset."""
+        del self._inputs[asset_id]
+        del self._results[asset_id]
+        for rule_id in _RULES:
+            dependencies = self._dependencies.pop((asset_id, rule_id), None)
+            if dependencies is not None:
+                for dependency in dependencies.parameters:
+                    self._unindex(dependency, (asset_id, rule_id))
+
+    def update_asset(self, asset_data: Dict[str, Any], business_use_percent: int = 100) -> DeltaReport:
+        """Re-evaluates only the rules that read an input field that changed."""
+        asset_id = asset_data.get("id")
+        if asset_id not in self._inputs:
+            raise ValueError(f"Unknown asset: {asset_id}")
+        old, new = self._inputs[asset_id], self._normalize(asset_data, business_use_percent)
+        fields = {name for name in new if new[name] != old[name]}
+        self._inputs[asset_id] = new
+        dirty = {(asset_id, rule_id) for rule_id in _RULES if fields.intersection(RULE_DEPENDENCIES[rule_id][0])}
+        return self._reevaluate(dirty, [])
+
+    def apply_rulepack(self, rulepack: CompiledRulepack) -> DeltaReport:
+        """Switches to `rulepack`, re-evaluating only the pairs that read a parameter that changed."""
+        changed = diff_rulepacks(self.engine.rulepack, rulepack)
+        dirty: Set[Tuple[str, str]] = set()
+        for dependency in changed:
+            dirty.update(self._readers.get(dependency, ()))
+        self.engine.use_rulepack(rulepack)
+        self._instrument()
+        return self._reevaluate(dirty, changed)
+
+    def report(self, asset_id: str) -> Dict[str, Any]:
+        """The asset's evaluate_all() report, rebuilt from the stored results."""
+        stored = self._results[asset_id]
+        return {
+            "asset_id": asset_id,
+            "results": [{"rule": r.rule_id, "amount": r.amount, "trace": r.trace, "citation": r.citation}
+                        for r in stored.values() if r is not None],
+            "total_deduction_first_year": stored["US_SEC_179_HEAVY"].amount + stored["US_MACRS_2026"].amount,
+        }
+
+    def dependencies(self, asset_id: str, rule_id: str) -> Dependencies:
+        return self._dependencies[(asset_id, rule_id)]
+
+    @staticmethod
+    def _normalize(asset_data: Dict[str, Any], business_use_percent: int) -> Dict[str, Any]:
+        return {
+            "cost_minor": asset_data.get("cost_minor", 0),
+            "weight_lbs": asset_data.get("weight_lbs", 0),
+            "date_service": asset_data.get("date_service", ""),
+            "business_use_percent": business_use_percent,
+        }
+
+    def _reevaluate(self, dirty: Set[Tuple[str, str]], changed: List[Dependency]) -> DeltaReport:
+        changes = []
+        reevaluated = 0
+        for asset_id in sorted({asset_id for asset_id, _ in dirty}):
+            # Rules whose amount moved; downstream rules read it, so they are re-run too.
+            moved: Set[str] = set()
+            for rule_id in _RULES:
+                upstream = RULE_DEPENDENCIES[rule_id][1]
+                if (asset_id, rule_id) not in dirty and not moved.intersection(upstream):
+                    continue
+                old = self._results[asset_id].get(rule_id)
+                new = self._evaluate(asset_id, rule_id)
+                reevaluated += 1
+                if _amount(old) != _amount(new):
+                    moved.add(rule_id)
+                if _state(old) != _state(new):
+                    changes.append({
+                        "asset_id": asset_id,
+                        "rule": rule_id,
+                        "old_amount": None if old is None else old.amount,
+                        "new_amount": None if new is None else new.amount,
+                        "old_eligible": None if old is None else old.eligible,
+                        "new_eligible": None if new is None else new.eligible,
+                    })
+        return DeltaReport(changes, reevaluated, changed)
+
+    def _evaluate(self, asset_id: str, rule_id: str) -> Optional[RuleResult]:
+        """One rule of the evaluate_all stack for one asset, recording what it read."""
+        inputs = self._inputs[asset_id]
+        cost, weight = inputs["cost_minor"], inputs["weight_lbs"]
+        date, business_use = inputs["date_service"], inputs["business_use_percent"]
+        engine = self.engine
+        self._log.clear()
+        if rule_id == "US_SEC_179_HEAVY":
+            result = engine.evaluate_us_section_179_heavy(weight, cost, date, business_use)
+        elif rule_id == "US_MACRS_2026":
+            business_cost = (cost * business_use) // 100
+            remaining_basis = max(0, business_cost - self._results[asset_id]["US_SEC_179_HEAVY"].amount)
+            result = engine.evaluate_us_macrs_2026(remaining_basis, date, business_use)
+        else:
+            # evaluate_all only claims 45W above 50% business use.
+            result = engine.evaluate_us_45w(weight, cost, is_ev=True) if business_use > 50 else None
+
+        key = (asset_id, rule_id)
+        previous = self._dependencies.get(key)
+        if previous is not None:
+            for dependency in previous.parameters:
+                self._unindex(dependency, key)
+        parameters = frozenset(self._log)
+        for dependency in parameters:
+            self._readers.setdefault(dependency, set()).add(key)
+            if len(dependency) == 3:
+                self._readers.setdefault(dependency[:2], set()).add(key)
+        self._dependencies[key] = Dependencies(RULE_DEPENDENCIES[rule_id][0], RULE_DEPENDENCIES[rule_id][1], parameters)
+        self._results[asset_id][rule_id] = result
+        return result
+
+    def _unindex(self, dependency: Dependency, key: Tuple[str, str]):
+        targets = [dependency, dependency[:2]] if len(dependency) == 3 else [dependency]
+        for target in targets:
+            readers = self._readers.get(target)
+            if readers is not None:
+                readers.discard(key)
+                if not readers:
+                    del self._readers[target]
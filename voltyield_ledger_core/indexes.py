@@ -0,0 +1,210 @@
+import json
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union
+
+_MISSING_TIME = -(1 << 63)
+_LENGTH = struct.Struct(">Q")
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MS = timedelta(milliseconds=1)
+
+def lookup_path(payload: Dict[str, Any], path: str) -> Any:
+    """Resolves a dotted path like "telemetry_match.asset_id"; None if any step is missing."""
+    value: Any = payload
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+def parse_timestamp_ms(value: Union[str, int]) -> int:
+    """ISO 8601 (naive means UTC) or epoch milliseconds -> epoch milliseconds."""
+    if isinstance(value, int):
+        return value
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    # Exact integer arithmetic; float timestamps truncate pre-epoch fractions the wrong way.
+    return (parsed - _EPOCH) // _MS
+
+class FieldIndex:
+    """Equality index: the first present payload path value -> ascending entry positions."""
+
+    def __init__(self, name: str, paths: Sequence[str]):
+        self.name = name
+        self.paths = tuple(paths)
+        self._postings: Dict[str, array] = {}
+
+    def extract(self, payload: Dict[str, Any]) -> Optional[str]:
+        for path in self.paths:
+            value = lookup_path(payload, path)
+            if value is not None and not isinstance(value, (dict, list)):
+                return str(value)
+        return None
+
+    def add(self, position: int, payload: Dict[str, Any]):
+        value = self.extract(payload)
+        if value is not None:
+            postings = self._postings.get(value)
+            if postings is None:
+                postings = self._postings[value] = array("Q")
+            postings.append(position)
+
+    def postings(self, value: str) -> array:
+        return self._postings.get(value, array("Q"))
+
+    def dump(self) -> bytes:
+        values = sorted(self._postings)
+        header = json.dumps([[v, len(self._postings[v])] for v in values], separators=(",", ":")).encode("utf-8")
+        return b"".join([_LENGTH.pack(len(header)), header] + [self._postings[v].tobytes() for v in values])
+
+    def load(self, data: bytes):
+        (header_len,) = _LENGTH.unpack_from(data, 0)
+        pos = _LENGTH.size + header_len
+        self._postings = {}
+        for value, count in json.loads(data[_LENGTH.size:pos]):
+            postings = array("Q")
+            postings.frombytes(data[pos:pos + count * postings.itemsize])
+            pos += count * postings.itemsize
+            self._postings[value] = postings
+
+class TimeIndex:
+    """Timestamp index: epoch ms per entry position, plus positions sorted by time for range scans."""
+
+    def __init__(self, name: str, paths: Sequence[str]):
+        self.name = name
+        self.paths = tuple(paths)
+        self._ms_by_position = array("q")
+        self._sorted_ms = array("q")
+        self._sorted_positions = array("Q")
+
+    def extract(self, payload: Dict[str, Any]) -> Optional[int]:
+        for path in self.paths:
+            value = lookup_path(payload, path)
+            if isinstance(value, str):
+                try:
+                    return parse_timestamp_ms(value)
+                except ValueError:
+                    continue
+        return None
+
+    def add(self, position: int, payload: Dict[str, Any]):
+        ms = self.extract(payload)
+        while len(self._ms_by_position) < position:
+            self._ms_by_position.append(_MISSING_TIME)
+        self._ms_by_position.append(_MISSING_TIME if ms is None else ms)
+        if ms is None:
+            return
+        if not self._sorted_ms or ms >= self._sorted_ms[-1]:
+            # Ingestion is mostly time-ordered: append without shifting.
+            self._sorted_ms.append(ms)
+            self._sorted_positions.append(position)
+        else:
+            i = bisect_right(self._sorted_ms, ms)
+            self._sorted_ms.insert(i, ms)
+            self._sorted_positions.insert(i, position)
+
+    def ms_at(self, position: int) -> int:
+        return self._ms_by_position[position] if position < len(self._ms_by_position) else _MISSING_TIME
+
+    def in_range(self, position: int, since_ms: Optional[int], until_ms: Optional[int]) -> bool:
+        ms = self.ms_at(position)
+        if ms == _MISSING_TIME:
+            return False
+        return (since_ms is None or ms >= since_ms) and (until_ms is None or ms < until_ms)
+
+    def range_positions(self, since_ms: Optional[int], until_ms: Optional[int]) -> array:
+        lo = 0 if since_ms is None else bisect_left(self._sorted_ms, since_ms)
+        hi = len(self._sorted_ms) if until_ms is None else bisect_left(self._sorted_ms, until_ms)
+        return self._sorted_positions[lo:hi]
+
+    def dump(self) -> bytes:
+        return b"".join([
+            _LENGTH.pack(len(self._ms_by_position)), self._ms_by_position.tobytes(),
+            self._sorted_ms.tobytes(), self._sorted_positions.tobytes(),
+        ])
+
+    def load(self, data: bytes):
+        (count,) = _LENGTH.unpack_from(data, 0)
+        self._ms_by_position = array("q")
+        pos = _LENGTH.size + count * self._ms_by_position.itemsize
+        self._ms_by_position.frombytes(data[_LENGTH.size:pos])
+        rest = (len(data) - pos) // 2
+        self._sorted_ms = array("q")
+        self._sorted_ms.frombytes(data[pos:pos + rest])
+        self._sorted_positions = array("Q")
+        self._sorted_positions.frombytes(data[pos + rest:])
+
+def default_indexes() -> List[Union[FieldIndex, TimeIndex]]:
+    """Indexes the API queries by: asset, rule, payload type and event time."""
+    return [
+        FieldIndex("asset_id", ("asset_id", "data.asset_id", "telemetry_match.asset_id")),
+        FieldIndex("rule_id", ("rule_id",)),
+        FieldIndex("type", ("type", "event_type")),
+        TimeIndex("timestamp", ("timestamp", "telemetry_match.timestamp", "receipt_data.timestamp")),
+    ]
+
+class IndexSet:
+    """Secondary indexes maintained on commit and the lazy query planner over them."""
+
+    def __init__(self, indexes: Sequence[Union[FieldIndex, TimeIndex]]):
+        self.fields = {i.name: i for i in indexes if isinstance(i, FieldIndex)}
+        self.times = [i for i in indexes if isinstance(i, TimeIndex)]
+        self.time = self.times[0] if self.times else None
+
+    def __len__(self) -> int:
+        return len(self.fields) + len(self.times)
+
+    def __iter__(self) -> Iterator[Union[FieldIndex, TimeIndex]]:
+        yield from self.fields.values()
+        yield from self.times
+
+    def add(self, position: int, payload: Dict[str, Any]):
+        for index in self:
+            index.add(position, payload)
+
+    def positions(self, size: int, start: int = 0, since: Optional[Union[str, int]] = None,
+                  until: Optional[Union[str, int]] = None, reverse: bool = False, **equals: str) -> Iterator[int]:
+        """
+        Entry positions in [start, size) matching every equality filter and the [since, until)
+        time range, in position order (descending with reverse). Walks the shortest posting
+        list and probes the others by bisection, so nothing proportional to the ledger is built.
+        """
+        for name in equals:
+            if name not in self.fields:
+                raise ValueError(f"No secondary index named {name}")
+        since_ms = parse_timestamp_ms(since) if since is not None else None
+        until_ms = parse_timestamp_ms(until) if until is not None else None
+        timed = since_ms is not None or until_ms is not None
+        if timed and self.time is None:
+            raise ValueError("No timestamp index configured")
+
+        postings = sorted((self.fields[name].postings(value) for name, value in equals.items()), key=len)
+        if postings:
+            driver, probes = postings[0], postings[1:]
+            lo, hi = bisect_left(driver, start), bisect_left(driver, size)
+            candidates = (driver[i] for i in (range(hi - 1, lo - 1, -1) if reverse else range(lo, hi)))
+        else:
+            probes = []
+            if timed:
+                in_range = self.time.range_positions(since_ms, until_ms)
+                if len(in_range) * 8 < size - start:
+                    # Narrow window: sort the few hits back into position order.
+                    candidates = iter(sorted((p for p in in_range if start <= p < size), reverse=reverse))
+                    timed = False
+                else:
+                    candidates = iter(range(size - 1, start - 1, -1) if reverse else range(start, size))
+            else:
+                candidates = iter(range(size - 1, start - 1, -1) if reverse else range(start, size))
+
+        for position in candidates:
+            if timed and not self.time.in_range(position, since_ms, until_ms):
+                continue
+            if all(_contains(p, position) for p in probes):
+                yield position
+
+def _contains(postings: array, position: int) -> bool:
+    i = bisect_left(postings, position)
+    return i < len(postings) and postings[i] == position
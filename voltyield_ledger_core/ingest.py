@@ -0,0 +1,65 @@
+import asyncio
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple, Union
+from .ledger import ForensicLedger, LedgerEntry, CanonicalPayload
+
+class LedgerWriter:
+    """
+    Single-writer commit path for async request handlers.
+    Callers enqueue payloads and await their entry; one writer task drains the queue
+    in FIFO order and commits each drained batch with ForensicLedger.commit_many, so
+    chain order is exactly submission order and concurrent requests share one
+    storage append (and one fsync). The writer task only lives while work is pending.
+    """
+
+    def __init__(self, ledger: ForensicLedger, max_batch: int = 512):
+        self.ledger = ledger
+        self.max_batch = max_batch
+        self._pending: Deque[Tuple[Union[Dict[str, Any], CanonicalPayload], str, Optional[str], asyncio.Future]] = deque()
+        self._writer: Optional[asyncio.Task] = None
+        # The loop the writer task runs on; a task left on a closed loop never reports done.
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def submit(self, payload: Union[Dict[str, Any], CanonicalPayload], idempotency_key: str, adc_key: Optional[str] = None) -> LedgerEntry:
+        """
+        Commits through the writer; raises ValueError exactly like ForensicLedger.commit.
+        Raises RuntimeError while the writer is still busy on another, open event loop.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not None and self._loop is not loop:
+            if self._writer is not None and not self._writer.done() and not self._loop.is_closed():
+                # A second writer would commit concurrently and break submission order.
+                raise RuntimeError("LedgerWriter is busy on another event loop")
+            # Submissions stranded on a closed loop have no one left awaiting them.
+            self._pending = deque(p for p in self._pending if not p[3].get_loop().is_closed())
+            self._writer = None
+        future = loop.create_future()
+        self._pending.append((payload, idempotency_key, adc_key, future))
+        if self._writer is None or self._writer.done():
+            self._loop = loop
+            self._writer = loop.create_task(self._drain())
+        return await future
+
+    async def _drain(self):
+        while self._pending:
+            batch = []
+            while self._pending and len(batch) < self.max_batch:
+                batch.append(self._pending.popleft())
+            items = [(payload, key, adc) for payload, key, adc, _ in batch]
+
+            # Hashing and fsync run off the event loop; submissions keep queueing meanwhile.
+            try:
+                results = await asyncio.to_thread(self.ledger.commit_many, items, "PER_ITEM")
+            except Exception as e:
+                for *_, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (*_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if result.ok:
+                    future.set_result(result.entry)
+                else:
+                    future.set_exception(ValueError(result.error))
@@ -0,0 +1,269 @@
+import mmap
+import heapq
+from bisect import bisect_right
+import hashlib
+import tempfile
+from typing import Iterator, List, Optional
+
+DIGEST_SIZE = 32
+# One in-memory fence key per block of packed digests; lookups bisect the fences, then scan one block.
+_BLOCK_RECORDS = 64
+_BLOCK_BYTES = _BLOCK_RECORDS * DIGEST_SIZE
+DEFAULT_MEMORY_BUDGET_BYTES = 256 * 1024 * 1024
+_BUFFERED_DIGEST_BYTES = DIGEST_SIZE + 70  # bytes object + set slot
+
+def key_digest(key: str) -> bytes:
+    return hashlib.sha256(key.encode("utf-8")).digest()
+
+class BloomFilter:
+    """Bit array front for fast negative lookups. Bit positions come from the key digest itself."""
+
+    def __init__(self, capacity: int, bits_per_key: int = 10):
+        self.capacity = capacity
+        self.bits_per_key = bits_per_key
+        self.size_bits = max(64, capacity * bits_per_key)
+        self.hash_count = max(1, (bits_per_key * 69) // 100)  # ~ bits_per_key * ln 2
+        self._bits = bytearray((self.size_bits + 7) // 8)
+
+    def _positions(self, digest: bytes) -> Iterator[int]:
+        # Kirsch-Mitzenmacher double hashing over two independent 64-bit digest slices.
+        h1 = int.from_bytes(digest[0:8], "big")
+        h2 = int.from_bytes(digest[8:16], "big") | 1
+        m = self.size_bits
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % m
+
+    def add(self, digest: bytes):
+        bits = self._bits
+        for p in self._positions(digest):
+            bits[p >> 3] |= 1 << (p & 7)
+
+    def might_contain(self, digest: bytes) -> bool:
+        bits = self._bits
+        for p in self._positions(digest):
+            if not bits[p >> 3] & (1 << (p & 7)):
+                return False
+        return True
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._bits)
+
+class _SortedRun:
+    """Immutable sorted array of packed digests, held in memory or in an mmapped spill file."""
+
+    def __init__(self, data: bytes):
+        self.count = len(data) // DIGEST_SIZE
+        self._data = data
+        self._file = None
+        self._fences = [data[i:i + DIGEST_SIZE] for i in range(0, len(data), _BLOCK_BYTES)]
+
+    @property
+    def in_memory(self) -> bool:
+        return self._file is None
+
+    @property
+    def nbytes(self) -> int:
+        return self.count * DIGEST_SIZE
+
+    @property
+    def fence_bytes(self) -> int:
+        return len(self._fences) * (DIGEST_SIZE + 41)  # bytes object + list slot
+
+    @classmethod
+    def merge_to_file(cls, runs: List["_SortedRun"], directory: Optional[str]) -> "_SortedRun":
+        """Streams the merge of sorted runs into a spill file; only the merged fence keys stay in memory."""
+        run = cls(b"")
+        f = tempfile.TemporaryFile(dir=directory)
+        chunk: List[bytes] = []
+        for digest in heapq.merge(*runs):
+            if not run.count % _BLOCK_RECORDS:
+                run._fences.append(digest)
+            chunk.append(digest)
+            run.count += 1
+            if len(chunk) == _BLOCK_RECORDS:
+                f.write(b"".join(chunk))
+                chunk = []
+        f.write(b"".join(chunk))
+        f.flush()
+        if run.count:
+            run._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            run._file = f
+        else:
+            f.close()
+        return run
+
+    def spill(self, directory: Optional[str]):
+        if not self.in_memory or not self.count:
+            return
+        f = tempfile.TemporaryFile(dir=directory)
+        f.write(self._data)
+        f.flush()
+        self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._file = f
+
+    def __contains__(self, digest: bytes) -> bool:
+        block = bisect_right(self._fences, digest) - 1
+        if block < 0:
+            return False
+        start = block * _BLOCK_BYTES
+        end = min(start + _BLOCK_BYTES, self.nbytes)
+        pos = self._data.find(digest, start, end)
+        while pos != -1:
+            if (pos - start) % DIGEST_SIZE == 0:
+                return True
+            pos = self._data.find(digest, pos + 1, end)
+        return False
+
+    def __iter__(self) -> Iterator[bytes]:
+        data = self._data
+        for start in range(0, self.nbytes, DIGEST_SIZE):
+            yield data[start:start + DIGEST_SIZE]
+
+    def close(self):
+        if self._file is not None:
+            self._data.close()
+            self._file.close()
+            self._file = None
+            self._data = b""
+
+class KeyIndex:
+    """
+    Exact set of ledger keys stored as raw 32-byte SHA-256 digests.
+    New keys land in a small write buffer that is sorted into packed runs; runs of
+    similar size are merged so a lookup bisects the fence keys of O(log n) runs. An optional Bloom
+    filter answers most negative lookups without touching the runs, and once the
+    in-memory runs pass `memory_budget_bytes` the largest are spilled to mmapped
+    temporary files in `spill_dir`. Supports `in` and `add` like the set it replaces.
+    The budget covers digest data (memory_bytes: in-memory runs and the write buffer).
+    The Bloom filter (bloom_bits_per_key / 8 bytes per key) and fence keys (about 1 byte
+    per key) always stay resident; they are reported separately as overhead_bytes.
+    """
+
+    def __init__(self, memory_budget_bytes: int = DEFAULT_MEMORY_BUDGET_BYTES, bloom_bits_per_key: int = 10,
+                 spill_dir: Optional[str] = None, buffer_size: int = 4096):
+        self.memory_budget_bytes = memory_budget_bytes
+        self.bloom_bits_per_key = bloom_bits_per_key
+        self.spill_dir = spill_dir
+        self.buffer_size = buffer_size
+        self._buffer: set[bytes] = set()
+        self._runs: List[_SortedRun] = []
+        self._count = 0
+        self._bloom = BloomFilter(1 << 16, bloom_bits_per_key) if bloom_bits_per_key else None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, key: str) -> bool:
+        return self.contains_digest(key_digest(key))
+
+    def add(self, key: str):
+        self.add_digest(key_digest(key))
+
+    def contains_digest(self, digest: bytes) -> bool:
+        if self._bloom is not None and not self._bloom.might_contain(digest):
+            return False
+        if digest in self._buffer:
+            return True
+        # Newest runs first: recent keys are the likeliest duplicates.
+        for run in reversed(self._runs):
+            if digest in run:
+                return True
+        return False
+
+    def add_digest(self, digest: bytes):
+        if self.contains_digest(digest):
+            return
+        self._buffer.add(digest)
+        self._count += 1
+        if self._bloom is not None:
+            if self._count > self._bloom.capacity:
+                self._rebuild_bloom(self._bloom.capacity * 2)
+            else:
+                self._bloom.add(digest)
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        """Sorts the write buffer into a run and merges runs of similar size."""
+        if not self._buffer:
+            return
+        self._runs.append(_SortedRun(b"".join(sorted(self._buffer))))
+        self._buffer = set()
+        while len(self._runs) > 1 and self._runs[-2].count <= self._runs[-1].count:
+            newer = self._runs.pop()
+            older = self._runs.pop()
+            # Spilled inputs, or a merge that would not fit the budget, stream to a spill file instead.
+            if (not older.in_memory or not newer.in_memory
+                    or self._run_bytes_limit() < self.memory_bytes + older.nbytes + newer.nbytes):
+                merged = _SortedRun.merge_to_file([older, newer], self.spill_dir)
+            else:
+                merged = _SortedRun(b"".join(heapq.merge(older, newer)))
+            older.close()
+            newer.close()
+            self._runs.append(merged)
+        self._enforce_budget()
+
+    def _rebuild_bloom(self, capacity: int):
+        bloom = BloomFilter(capacity, self.bloom_bits_per_key)
+        for digest in self.digests():
+            bloom.add(digest)
+        self._bloom = bloom
+
+    @property
+    def memory_bytes(self) -> int:
+        """Approximate resident digest data held against the budget: in-memory runs and the write buffer."""
+        size = sum(run.nbytes for run in self._runs if run.in_memory)
+        size += len(self._buffer) * _BUFFERED_DIGEST_BYTES
+        return size
+
+    @property
+    def overhead_bytes(self) -> int:
+        """Resident lookup structures outside the budget: fence keys of every run and the Bloom filter."""
+        size = sum(run.fence_bytes for run in self._runs)
+        if self._bloom is not None:
+            size += self._bloom.nbytes
+        return size
+
+    def _run_bytes_limit(self) -> int:
+        # Room is kept for a full write buffer, so the budget also holds between flushes.
+        return self.memory_budget_bytes - (self.buffer_size - len(self._buffer)) * _BUFFERED_DIGEST_BYTES
+
+    def _enforce_budget(self):
+        if self.memory_bytes <= self._run_bytes_limit():
+            return
+        for run in sorted((r for r in self._runs if r.in_memory), key=lambda r: -r.count):
+            run.spill(self.spill_dir)
+            if self.memory_bytes <= self._run_bytes_limit():
+                break
+
+    def digests(self) -> Iterator[bytes]:
+        """All stored digests, unordered."""
+        yield from self._buffer
+        for run in self._runs:
+            yield from run
+
+    def iter_sorted(self) -> Iterator[bytes]:
+        """All stored digests in byte order, streamed from the runs."""
+        return heapq.merge(sorted(self._buffer), *self._runs)
+
+    def load_sorted(self, data: bytes):
+        """Bulk-loads packed, sorted, distinct digests (e.g. from a snapshot) into an empty index."""
+        if self._count:
+            raise ValueError("Bulk load requires an empty key index")
+        if len(data) % DIGEST_SIZE:
+            raise ValueError("Packed digests must be a multiple of 32 bytes")
+        run = _SortedRun(data)
+        if run.count:
+            self._runs.append(run)
+        self._count = run.count
+        if self._bloom is not None:
+            capacity = self._bloom.capacity
+            while capacity < self._count:
+                capacity *= 2
+            self._rebuild_bloom(capacity)
+        self._enforce_budget()
+
+    def close(self):
+        for run in self._runs:
+            run.close()
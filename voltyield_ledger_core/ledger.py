@@ -1,38 +1,390 @@
 import json
 import hashlib
-from typing import Dict, Any, Optional, List
+import threading
+from json.encoder import encode_basestring_ascii
+from typing import Dict, Any, Optional, List, Iterable, Iterator, Sequence, Tuple, Union, TYPE_CHECKING
 from .models import AuditState
+from .merkle import MerkleAccumulator
+from .keyindex import KeyIndex
+from .indexes import IndexSet, FieldIndex, TimeIndex, default_indexes
+
+if TYPE_CHECKING:
+    from .storage import LedgerStorage
+    from .snapshot import Snapshot, SnapshotManager
+
+# json.dumps builds a fresh JSONEncoder per call when given options; reuse one instead.
+_CANONICAL_ENCODER = json.JSONEncoder(sort_keys=True, separators=(",", ":"))
+_encode = _CANONICAL_ENCODER.encode
+_escape = encode_basestring_ascii
 
 def canonicalize(data: Dict[str, Any]) -> bytes:
     """Deterministic JSON serialization: sorted keys, no whitespace, UTC strings."""
-    return json.dumps(data, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return _encode(data).encode("utf-8")
 
-class LedgerEntry:
-    def __init__(self, payload: Dict[str, Any], prev_hash: Optional[str] = None):
+# Shape-specific encoders for the hot API payloads. Keys are pre-sorted and string
+# fields escaped directly; output is byte-identical to canonicalize().
+
+def canonicalize_charging_event(event_type: str, timestamp: str, data: Dict[str, Any]) -> bytes:
+    """canonicalize({"event_type", "timestamp", "data"}) for charging webhooks."""
+    return f'{{"data":{_encode(data)},"event_type":{_escape(event_type)},"timestamp":{_escape(timestamp)}}}'.encode("utf-8")
+
+def canonicalize_verified_charging_event(asset_id: str, receipt_data: Dict[str, Any], telemetry_match: Dict[str, Any], certificate_hash: str) -> bytes:
+    """canonicalize() of a VERIFIED_CHARGING_EVENT payload."""
+    return (
+        f'{{"asset_id":{_escape(asset_id)},"certificate_hash":{_escape(certificate_hash)},'
+        f'"receipt_data":{_encode(receipt_data)},"telemetry_match":{_encode(telemetry_match)},'
+        f'"type":"VERIFIED_CHARGING_EVENT"}}'
+    ).encode("utf-8")
+
+class CanonicalPayload:
+    """
+    A payload serialized and hashed exactly once. Pass it to commit() in place of the
+    dict to reuse the bytes and digest (e.g. when the digest is also the idempotency key).
+    """
+    __slots__ = ("payload", "canonical", "digest", "entry_hash")
+
+    def __init__(self, payload: Dict[str, Any], canonical: Optional[bytes] = None):
         self.payload = payload
-        self.entry_hash = hashlib.sha256(canonicalize(payload)).hexdigest()
-        self.prev_hash = prev_hash
+        self.canonical = canonicalize(payload) if canonical is None else canonical
+        self.digest = hashlib.sha256(self.canonical).digest()
+        self.entry_hash = self.digest.hex()
+
+# Stands in for the missing prev digest of the genesis entry (same convention as the segment format).
+_NO_PREV = bytes(32)
+
+class LedgerEntry:
+    """
+    One chained entry, held compactly: the canonical payload bytes plus the entry, prev
+    and chain digests packed into a single 96-byte string. `payload` is decoded from the
+    canonical bytes on each read and the *_hash attributes are hex views of the digests,
+    so a stored entry never keeps a dict or hex strings alive.
+    """
+    __slots__ = ("canonical", "_digests")
+
+    def __init__(self, payload: Union[Dict[str, Any], CanonicalPayload], prev_hash: Optional[str] = None):
+        if not isinstance(payload, CanonicalPayload):
+            payload = CanonicalPayload(payload)
+        self.canonical = payload.canonical
+        chain_input = (prev_hash or "") + payload.entry_hash
+        chain_digest = hashlib.sha256(chain_input.encode()).digest()
+        self._digests = payload.digest + (bytes.fromhex(prev_hash) if prev_hash else _NO_PREV) + chain_digest
+
+    @classmethod
+    def from_digests(cls, canonical: bytes, digests: bytes) -> "LedgerEntry":
+        """Wraps canonical bytes and packed entry|prev|chain digests (zeros for no prev) as stored on disk."""
+        entry = cls.__new__(cls)
+        entry.canonical = canonical
+        entry._digests = digests
+        return entry
+
+    @property
+    def payload(self) -> Dict[str, Any]:
+        return json.loads(self.canonical)
+
+    @property
+    def digests(self) -> bytes:
+        return self._digests
+
+    @property
+    def entry_digest(self) -> bytes:
+        return self._digests[:32]
+
+    @property
+    def prev_digest(self) -> Optional[bytes]:
+        prev = self._digests[32:64]
+        return None if prev == _NO_PREV else prev
+
+    @property
+    def chain_digest(self) -> bytes:
+        return self._digests[64:]
 
-        chain_input = (prev_hash or "") + self.entry_hash
-        self.chain_hash = hashlib.sha256(chain_input.encode()).hexdigest()
+    @property
+    def entry_hash(self) -> str:
+        return self._digests[:32].hex()
+
+    @property
+    def prev_hash(self) -> Optional[str]:
+        prev = self.prev_digest
+        return None if prev is None else prev.hex()
+
+    @property
+    def chain_hash(self) -> str:
+        return self._digests[64:].hex()
+
+class CommitResult:
+    """Outcome of one item in a PER_ITEM batch: the committed entry, or why it was rejected."""
+    def __init__(self, entry: Optional[LedgerEntry], error: Optional[str] = None):
+        self.entry = entry
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.entry is not None
 
 class ForensicLedger:
-    def __init__(self):
-        self.entries: List[LedgerEntry] = []
-        self.idempotency_keys: set[str] = set()
-        self.anti_double_count_keys: set[str] = set()
+    def __init__(self, storage: Optional["LedgerStorage"] = None, key_index_options: Optional[Dict[str, Any]] = None,
+                 snapshots: Optional["SnapshotManager"] = None, snapshot_every: int = 0,
+                 indexes: Optional[Sequence[Union[FieldIndex, TimeIndex]]] = None):
+        if storage is None:
+            from .storage import InMemoryStorage
+            storage = InMemoryStorage()
+        self.storage = storage
+        self._key_index_options = key_index_options or {}
+        # Compact digest indexes; key_index_options (memory budget, spill dir, bloom bits) go to KeyIndex.
+        self.idempotency_keys = KeyIndex(**self._key_index_options)
+        self.anti_double_count_keys = KeyIndex(**self._key_index_options)
+        self.merkle = MerkleAccumulator()
+        # Secondary indexes over payload fields, maintained on commit (default: asset, rule, type, time).
+        self.indexes = IndexSet(default_indexes() if indexes is None else indexes)
+        # Serializes writers so two threads can never chain onto the same head.
+        self._lock = threading.RLock()
+        # With a SnapshotManager, a checkpoint is written every `snapshot_every` entries (0: only on demand).
+        self.snapshots = snapshots
+        self.snapshot_every = snapshot_every
+        self._head: Optional[str] = None
+        self._snapshot_count = 0
+
+        # Start from the newest valid checkpoint, then replay only the tail after it.
+        snapshot = snapshots.load_latest(storage) if snapshots is not None else None
+        stale_indexes = self._restore(snapshot) if snapshot is not None else []
+        # Indexes the checkpoint did not carry (e.g. added since) are built from genesis,
+        # before the tail, since postings must stay in position order.
+        for position in range(self._snapshot_count) if stale_indexes else ():
+            payload = storage.get(position).payload
+            for index in stale_indexes:
+                index.add(position, payload)
+        self._replay(self._snapshot_count)
+
+    def _replay(self, start: int):
+        """Rebuilds key, secondary and Merkle indexes and the chain head from entries[start:]."""
+        for idempotency_key, adc_key in self.storage.iter_keys(start):
+            self.idempotency_keys.add(idempotency_key)
+            if adc_key:
+                self.anti_double_count_keys.add(adc_key)
+        for entry_hash in self.storage.iter_entry_hashes(start):
+            self.merkle.append(bytes.fromhex(entry_hash))
+        if len(self.indexes):
+            for position in range(start, len(self.storage)):
+                self.indexes.add(position, self.storage.get(position).payload)
+        if len(self.storage) > start:
+            self._head = self.storage[-1].chain_hash
 
-    def commit(self, payload: Dict[str, Any], idempotency_key: str, adc_key: Optional[str] = None) -> LedgerEntry:
+    @property
+    def entries(self) -> "LedgerStorage":
+        return self.storage
+
+    def commit(self, payload: Union[Dict[str, Any], CanonicalPayload], idempotency_key: str, adc_key: Optional[str] = None) -> LedgerEntry:
+        with self._lock:
+            return self._commit(payload, idempotency_key, adc_key)
+
+    def _commit(self, payload: Union[Dict[str, Any], CanonicalPayload], idempotency_key: str, adc_key: Optional[str]) -> LedgerEntry:
         if idempotency_key in self.idempotency_keys:
             raise ValueError(f"Idempotency violation: {idempotency_key}")
         if adc_key and adc_key in self.anti_double_count_keys:
             raise ValueError(f"Double-count protection triggered: {adc_key}")
 
-        prev_hash = self.entries[-1].chain_hash if self.entries else None
-        entry = LedgerEntry(payload, prev_hash)
+        if not isinstance(payload, CanonicalPayload):
+            payload = CanonicalPayload(payload)
+        entry = LedgerEntry(payload, self._head)
 
-        self.entries.append(entry)
+        position = len(self.storage)
+        self.storage.append(entry, idempotency_key, adc_key)
+        self._head = entry.chain_hash
+        self.indexes.add(position, payload.payload)
+        self.merkle.append(entry.entry_digest)
         self.idempotency_keys.add(idempotency_key)
         if adc_key:
             self.anti_double_count_keys.add(adc_key)
+        self._maybe_snapshot()
         return entry
+
+    def commit_many(self, items: Iterable[Sequence[Any]], mode: str = "ATOMIC") -> Union[List[LedgerEntry], List[CommitResult]]:
+        """
+        Commits a batch of (payload, idempotency_key[, adc_key]) items; payloads may be CanonicalPayloads.
+        Keys are checked against the ledger and against earlier items in the same batch and
+        each payload is serialized and hashed; then every accepted entry is chained in one
+        pass and the batch is published with a single storage append.
+        ATOMIC: raises ValueError on the first violation (or unserializable payload) and commits nothing; returns the entries.
+        PER_ITEM: skips violating or unserializable items and returns one CommitResult per input item.
+        """
+        if mode not in ("ATOMIC", "PER_ITEM"):
+            raise ValueError(f"Unknown batch mode: {mode}")
+        with self._lock:
+            return self._commit_many(items, mode)
+
+    def _commit_many(self, items: Iterable[Sequence[Any]], mode: str) -> Union[List[LedgerEntry], List[CommitResult]]:
+        batch_idempotency: set[str] = set()
+        batch_adc: set[str] = set()
+        accepted = []
+        results: List[CommitResult] = []
+        for i, item in enumerate(items):
+            payload, idempotency_key = item[0], item[1]
+            adc_key = item[2] if len(item) > 2 else None
+
+            error = None
+            if idempotency_key in self.idempotency_keys or idempotency_key in batch_idempotency:
+                error = f"Idempotency violation: {idempotency_key}"
+            elif adc_key and (adc_key in self.anti_double_count_keys or adc_key in batch_adc):
+                error = f"Double-count protection triggered: {adc_key}"
+            elif not isinstance(payload, CanonicalPayload):
+                # Serialized per item, so one bad payload cannot abort the rest of the batch.
+                try:
+                    payload = CanonicalPayload(payload)
+                except (TypeError, ValueError) as e:
+                    error = f"Unserializable payload: {e}"
+
+            if error:
+                if mode == "ATOMIC":
+                    raise ValueError(f"{error} (batch item {i})")
+                results.append(CommitResult(None, error))
+                continue
+
+            batch_idempotency.add(idempotency_key)
+            if adc_key:
+                batch_adc.add(adc_key)
+            accepted.append((payload, idempotency_key, adc_key))
+            results.append(None)
+
+        # Chain the whole batch in one tight loop.
+        sha256 = hashlib.sha256
+        head = self._head
+        prev_digest = bytes.fromhex(head) if head else _NO_PREV
+        records = []
+        payloads = []
+        for prepared, idempotency_key, adc_key in accepted:
+            payload, canonical, digest = prepared.payload, prepared.canonical, prepared.digest
+            chain_digest = sha256(((head or "") + prepared.entry_hash).encode()).digest()
+            records.append((LedgerEntry.from_digests(canonical, digest + prev_digest + chain_digest), idempotency_key, adc_key))
+            payloads.append(payload)
+            head, prev_digest = chain_digest.hex(), chain_digest
+
+        # Publish: nothing is visible to lookups until the storage holds the whole batch.
+        position = len(self.storage)
+        self.storage.append_many(records)
+        self._head = head
+        for (entry, idempotency_key, adc_key), payload in zip(records, payloads):
+            self.indexes.add(position, payload)
+            position += 1
+            self.merkle.append(entry.entry_digest)
+            self.idempotency_keys.add(idempotency_key)
+            if adc_key:
+                self.anti_double_count_keys.add(adc_key)
+        self._maybe_snapshot()
+
+        entries = [entry for entry, _, _ in records]
+        if mode == "ATOMIC":
+            return entries
+        committed = iter(entries)
+        return [r if r is not None else CommitResult(next(committed)) for r in results]
+
+    def query(self, start: int = 0, since: Optional[Union[str, int]] = None, until: Optional[Union[str, int]] = None,
+              reverse: bool = False, **equals: Optional[str]) -> Iterator[LedgerEntry]:
+        """
+        Lazily yields entries matching secondary index filters, e.g.
+        query(asset_id="V-001", type="ELIGIBLE_PENNY", since="2026-01-01T00:00:00Z").
+        `start` is an entry index cursor; `since`/`until` bound the indexed timestamp (ISO or epoch ms, half-open).
+        """
+        for _, entry in self.query_items(start, since, until, reverse, **equals):
+            yield entry
+
+    def query_items(self, start: int = 0, since: Optional[Union[str, int]] = None, until: Optional[Union[str, int]] = None,
+                    reverse: bool = False, **equals: Optional[str]) -> Iterator[Tuple[int, LedgerEntry]]:
+        """Like query(), but yields (entry index, entry) pairs for cursor-based consumers."""
+        filters = {name: value for name, value in equals.items() if value is not None}
+        for position in self.indexes.positions(len(self.storage), start, since, until, reverse, **filters):
+            yield position, self.storage.get(position)
+
+    def merkle_root(self, size: Optional[int] = None) -> str:
+        """Merkle root over the first `size` entries (default: all)."""
+        with self._lock:
+            return self.merkle.root(size).hex()
+
+    def inclusion_proof(self, index: int, size: Optional[int] = None) -> Dict[str, Any]:
+        """Proves entry `index` is part of the ledger at `size`; check with merkle.verify_inclusion."""
+        with self._lock:
+            size = len(self.merkle) if size is None else size
+            audit_path = self.merkle.inclusion_proof(index, size)
+            entry_hash = self.storage[index].entry_hash
+        return {
+            "index": index,
+            "tree_size": size,
+            "entry_hash": entry_hash,
+            "audit_path": [h.hex() for h in audit_path],
+            "root": self.merkle_root(size),
+        }
+
+    def consistency_proof(self, old_size: int, new_size: Optional[int] = None) -> Dict[str, Any]:
+        """Proves the ledger at `old_size` is a prefix of the ledger at `new_size`; check with merkle.verify_consistency."""
+        with self._lock:
+            new_size = len(self.merkle) if new_size is None else new_size
+            proof = self.merkle.consistency_proof(old_size, new_size)
+            return {
+                "old_size": old_size,
+                "new_size": new_size,
+                "old_root": self.merkle_root(old_size),
+                "new_root": self.merkle_root(new_size),
+                "proof": [h.hex() for h in proof],
+            }
+
+    def verify(self, workers: Optional[int] = None, shard_size: Optional[int] = None, progress=None):
+        """Recomputes every entry hash in parallel and checks every chain link; see verify.verify_storage."""
+        from .verify import verify_storage, DEFAULT_SHARD_SIZE
+        return verify_storage(self.storage, workers, shard_size or DEFAULT_SHARD_SIZE, progress)
+
+    # --- Snapshots ---
+
+    def _maybe_snapshot(self):
+        if self.snapshots is not None and self.snapshot_every and len(self.storage) - self._snapshot_count >= self.snapshot_every:
+            self.snapshot()
+
+    def _snapshot_sections(self) -> List[Any]:
+        sections = []
+        for name, keys in (("idempotency_keys", self.idempotency_keys), ("anti_double_count_keys", self.anti_double_count_keys)):
+            sections.append((name, len(keys) * 32, keys.iter_sorted()))
+        for level, nodes in enumerate(self.merkle.levels()):
+            sections.append((f"merkle/{level}", len(nodes), [nodes]))
+        for index in self.indexes:
+            data = index.dump()
+            sections.append((f"index/{index.name}", len(data), [data]))
+        return sections
+
+    def _restore(self, snapshot: "Snapshot") -> List[Union[FieldIndex, TimeIndex]]:
+        """Loads checkpointed state; returns the secondary indexes the snapshot has no section for."""
+        sections = snapshot.sections
+        self.idempotency_keys.load_sorted(sections["idempotency_keys"])
+        self.anti_double_count_keys.load_sorted(sections["anti_double_count_keys"])
+        levels = []
+        while f"merkle/{len(levels)}" in sections:
+            levels.append(sections[f"merkle/{len(levels)}"])
+        self.merkle.load_levels(levels)
+        if len(self.merkle) != snapshot.entry_count or self.merkle.root().hex() != snapshot.merkle_root:
+            raise ValueError(f"Snapshot Merkle state does not match its header: {snapshot.path}")
+        self._head = snapshot.chain_head
+        self._snapshot_count = snapshot.entry_count
+
+        stale = []
+        for index in self.indexes:
+            data = sections.get(f"index/{index.name}")
+            if data is None:
+                stale.append(index)
+            else:
+                index.load(data)
+        return stale
+
+    def snapshot(self) -> str:
+        """Checkpoints chain head, entry count, key, secondary and Merkle indexes; returns the snapshot path."""
+        if self.snapshots is None:
+            raise ValueError("No snapshot manager configured")
+        with self._lock:
+            # Entries referenced by the checkpoint must be durable before it is.
+            self.storage.sync()
+            count = len(self.storage)
+            path = self.snapshots.write(count, self._head, self.merkle.root().hex(), self._snapshot_sections())
+            self._snapshot_count = count
+            return path
+
+    def close(self):
+        """Flushes and releases the storage backend and any spilled key index files."""
+        self.storage.close()
+        self.idempotency_keys.close()
+        self.anti_double_count_keys.close()
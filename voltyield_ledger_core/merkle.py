@@ -0,0 +1,175 @@
+import hashlib
+from typing import List, Optional
+
+# RFC 6962 / RFC 9162 domain separation between leaves and interior nodes.
+_LEAF_PREFIX = b"\x00"
+_NODE_PREFIX = b"\x01"
+_EMPTY_ROOT = hashlib.sha256(b"").digest()
+_DIGEST_SIZE = 32
+
+def leaf_hash(entry_hash: bytes) -> bytes:
+    return hashlib.sha256(_LEAF_PREFIX + entry_hash).digest()
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(_NODE_PREFIX + left + right).digest()
+
+def _split(n: int) -> int:
+    """Largest power of two strictly smaller than n (n > 1)."""
+    return 1 << ((n - 1).bit_length() - 1)
+
+class MerkleAccumulator:
+    """
+    Incremental RFC 6962 Merkle tree over ledger entry hashes.
+    Every complete subtree is stored once, level by level, as packed 32-byte digests
+    (about 64 bytes per leaf), so roots and proofs for any historical size need
+    O(log n) node lookups instead of a replay from genesis.
+    """
+
+    def __init__(self):
+        self._levels: List[bytearray] = [bytearray()]
+
+    def __len__(self) -> int:
+        return len(self._levels[0]) // _DIGEST_SIZE
+
+    def append(self, entry_hash: bytes):
+        node = leaf_hash(entry_hash)
+        level = 0
+        while True:
+            if level == len(self._levels):
+                self._levels.append(bytearray())
+            nodes = self._levels[level]
+            nodes += node
+            count = len(nodes) // _DIGEST_SIZE
+            if count % 2:
+                return
+            node = node_hash(bytes(nodes[-2 * _DIGEST_SIZE:-_DIGEST_SIZE]), node)
+            level += 1
+
+    def levels(self) -> List[bytes]:
+        """Packed node hashes per level, leaves first; restored with load_levels."""
+        return [bytes(nodes) for nodes in self._levels]
+
+    def load_levels(self, levels: List[bytes]):
+        if len(self):
+            raise ValueError("Merkle levels can only be loaded into an empty accumulator")
+        self._levels = [bytearray(nodes) for nodes in levels] or [bytearray()]
+
+    def _node(self, level: int, index: int) -> bytes:
+        start = index * _DIGEST_SIZE
+        return bytes(self._levels[level][start:start + _DIGEST_SIZE])
+
+    def _subtree(self, start: int, end: int) -> bytes:
+        """MTH(D[start:end]); the left part of every split is a stored, aligned subtree."""
+        n = end - start
+        if n & (n - 1) == 0 and start % n == 0:
+            return self._node(n.bit_length() - 1, start // n)
+        k = _split(n)
+        return node_hash(self._subtree(start, start + k), self._subtree(start + k, end))
+
+    def _check_size(self, size: Optional[int]) -> int:
+        if size is None:
+            return len(self)
+        if not 0 <= size <= len(self):
+            raise ValueError(f"Invalid tree size: {size}")
+        return size
+
+    def root(self, size: Optional[int] = None) -> bytes:
+        size = self._check_size(size)
+        if size == 0:
+            return _EMPTY_ROOT
+        return self._subtree(0, size)
+
+    def inclusion_proof(self, index: int, size: Optional[int] = None) -> List[bytes]:
+        """Audit path for leaf `index` in the tree of the first `size` leaves."""
+        size = self._check_size(size)
+        if not 0 <= index < size:
+            raise ValueError(f"Leaf {index} not in tree of size {size}")
+        path: List[bytes] = []
+        start, end, m = 0, size, index
+        while end - start > 1:
+            k = _split(end - start)
+            if m < k:
+                path.append(self._subtree(start + k, end))
+                end = start + k
+            else:
+                path.append(self._subtree(start, start + k))
+                start += k
+                m -= k
+        path.reverse()
+        return path
+
+    def consistency_proof(self, old_size: int, new_size: Optional[int] = None) -> List[bytes]:
+        """Proof that the tree of `old_size` leaves is a prefix of the tree of `new_size` leaves."""
+        new_size = self._check_size(new_size)
+        if not 0 < old_size <= new_size:
+            raise ValueError(f"Invalid consistency range: {old_size}..{new_size}")
+        proof: List[bytes] = []
+        start, end, m, complete = 0, new_size, old_size, True
+        while m != end - start:
+            k = _split(end - start)
+            if m <= k:
+                proof.append(self._subtree(start + k, end))
+                end = start + k
+            else:
+                proof.append(self._subtree(start, start + k))
+                start += k
+                m -= k
+                complete = False
+        if not complete:
+            proof.append(self._subtree(start, end))
+        proof.reverse()
+        return proof
+
+def verify_inclusion(entry_hash: str, index: int, tree_size: int, audit_path: List[str], root: str) -> bool:
+    """Checks an inclusion proof in O(log n) hashes (RFC 9162 § 2.1.3.2)."""
+    if not 0 <= index < tree_size:
+        return False
+    fn, sn = index, tree_size - 1
+    r = leaf_hash(bytes.fromhex(entry_hash))
+    for p in audit_path:
+        p = bytes.fromhex(p)
+        if sn == 0:
+            return False
+        if fn & 1 or fn == sn:
+            r = node_hash(p, r)
+            if not fn & 1:
+                while not fn & 1 and fn != 0:
+                    fn >>= 1
+                    sn >>= 1
+        else:
+            r = node_hash(r, p)
+        fn >>= 1
+        sn >>= 1
+    return sn == 0 and r.hex() == root
+
+def verify_consistency(old_size: int, new_size: int, old_root: str, new_root: str, proof: List[str]) -> bool:
+    """Checks a consistency proof in O(log n) hashes (RFC 9162 § 2.1.4.2)."""
+    if not 0 < old_size <= new_size:
+        return False
+    if old_size == new_size:
+        return not proof and old_root == new_root
+    path = [bytes.fromhex(p) for p in proof]
+    if old_size & (old_size - 1) == 0:
+        path.insert(0, bytes.fromhex(old_root))
+    if not path:
+        return False
+    fn, sn = old_size - 1, new_size - 1
+    while fn & 1:
+        fn >>= 1
+        sn >>= 1
+    fr = sr = path[0]
+    for c in path[1:]:
+        if sn == 0:
+            return False
+        if fn & 1 or fn == sn:
+            fr = node_hash(c, fr)
+            sr = node_hash(c, sr)
+            if not fn & 1:
+                while not fn & 1 and fn != 0:
+                    fn >>= 1
+                    sn >>= 1
+        else:
+            sr = node_hash(sr, c)
+        fn >>= 1
+        sn >>= 1
+    return sn == 0 and fr.hex() == old_root and sr.hex() == new_root
@@ -1,7 +1,15 @@
 import math
+import heapq
 import hashlib
-from typing import List, Tuple
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Sequence, Tuple, Union
 from .models import TelemetryEvent, Receipt, AuditState
+from .indexes import parse_timestamp_ms
+from .telemetry import TelemetryStore, TelemetryView, best_position
+
+_METERS_PER_DEGREE = 111320.0
 
 def haversine_meters(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     R = 6371000
@@ -11,30 +19,275 @@ def haversine_meters(lat1: float, lon1: float, lat2: float, lon2: float) -> floa
     a = math.sin(dphi/2)**2 + math.cos(phi1)*math.cos(phi2)*math.sin(dlambda/2)**2
     return 2 * R * math.atan2(math.sqrt(a), math.sqrt(1-a))
 
+def receipt_location(receipt: Receipt) -> Tuple[float, float]:
+    # Receipts carry no coordinates yet; the demo convention reads `confidence` as latitude at lon 0.
+    return receipt.confidence, 0.0
+
+def evidence_hash_for(receipt: Receipt, event: TelemetryEvent) -> str:
+    return hashlib.sha256(f"{receipt.receipt_id}:{event.asset_id}".encode()).hexdigest()
+
+class TelemetryColumns:
+    """
+    Telemetry as parallel columns (lat, lon, cos(lat), epoch ms, asset id) so batch scoring
+    runs one fused loop over flat arrays instead of per-event attribute lookups, radians()
+    and cos() calls. Distances and scores are bit-identical to haversine_meters/stitch.
+    """
+
+    def __init__(self, events: Iterable[TelemetryEvent] = ()):
+        self.events: List[TelemetryEvent] = []
+        self.lat = array("d")
+        self.lon = array("d")
+        self.cos_lat = array("d")
+        self.time_ms = array("q")
+        self.asset_ids: List[str] = []
+        for event in events:
+            self.append(event)
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def append(self, event: TelemetryEvent, timestamp_ms: Optional[int] = None):
+        self.events.append(event)
+        self.lat.append(event.lat)
+        self.lon.append(event.lon)
+        self.cos_lat.append(math.cos(math.radians(event.lat)))
+        self.time_ms.append(parse_timestamp_ms(event.timestamp_iso) if timestamp_ms is None else timestamp_ms)
+        self.asset_ids.append(event.asset_id)
+
+    def event(self, position: int) -> TelemetryEvent:
+        return self.events[position]
+
+    def best(self, lat: float, lon: float, timestamp_ms: int, positions: Optional[Sequence[int]] = None) -> Optional[int]:
+        """
+        Position of the lowest (score, time diff, distance, asset id) event among `positions`
+        (default: all), earliest position on a full tie; None if there are no candidates.
+        """
+        return best_position(lat, lon, timestamp_ms, self.lat, self.lon, self.cos_lat, self.time_ms, self.asset_ids,
+                             range(len(self.events)) if positions is None else positions)
+
+class TelemetryIndex:
+    """
+    Grid index over telemetry for stitching. Events are bucketed into lat/lon cells about
+    `max_distance_m` wide, each holding (epoch ms, position) pairs in time order, so a
+    query visits only the neighbouring cells and bisects each one to the time window.
+    Candidates come back in insertion order, which keeps stitch tie-breaking identical
+    to a scan of the original list.
+    """
+
+    def __init__(self, events: Iterable[TelemetryEvent] = (), max_distance_m: float = 5000.0,
+                 max_time_ms: int = 6 * 60 * 60 * 1000):
+        if max_distance_m <= 0 or max_time_ms < 0:
+            raise ValueError(f"Invalid stitch window: {max_distance_m} m, {max_time_ms} ms")
+        self.max_distance_m = max_distance_m
+        self.max_time_ms = max_time_ms
+        self.cell_degrees = min(max_distance_m / _METERS_PER_DEGREE, 90.0)
+        self._columns = max(1, math.ceil(360.0 / self.cell_degrees))
+        self.columns = TelemetryColumns()
+        self.events = self.columns.events
+        self.times_ms = self.columns.time_ms
+        self._cells: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+        for event in events:
+            self.add(event)
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return math.floor((lat + 90.0) / self.cell_degrees), math.floor((lon + 180.0) / self.cell_degrees) % self._columns
+
+    def add(self, event: TelemetryEvent):
+        position = len(self.events)
+        ms = parse_timestamp_ms(event.timestamp_iso)
+        self.columns.append(event, ms)
+        bucket = self._cells.setdefault(self._cell(event.lat, event.lon), [])
+        if not bucket or bucket[-1][0] <= ms:
+            bucket.append((ms, position))
+        else:
+            insort(bucket, (ms, position))
+
+    def _columns_near(self, lat: float, lon: float) -> Iterable[int]:
+        # A cell spans fewer meters of longitude away from the equator; widen the scan to cover the radius.
+        nearest_pole_lat = min(90.0, abs(lat) + self.cell_degrees)
+        cos_lat = math.cos(math.radians(nearest_pole_lat))
+        if cos_lat * self._columns <= 2:
+            return range(self._columns)
+        span = math.ceil(1 / cos_lat)
+        _, col = self._cell(lat, lon)
+        if 2 * span + 1 >= self._columns:
+            return range(self._columns)
+        return ((col + d) % self._columns for d in range(-span, span + 1))
+
+    def candidates(self, lat: float, lon: float, timestamp_ms: int) -> List[int]:
+        """Positions of events within max_distance_m and max_time_ms of the point, ascending."""
+        return [position for position, _ in self.neighbours(lat, lon, timestamp_ms)]
+
+    def neighbours(self, lat: float, lon: float, timestamp_ms: int) -> List[Tuple[int, float]]:
+        """Like candidates(), as (position, distance in meters) pairs."""
+        row, _ = self._cell(lat, lon)
+        lo_ms, hi_ms = timestamp_ms - self.max_time_ms, timestamp_ms + self.max_time_ms
+        columns = list(self._columns_near(lat, lon))
+        found = []
+        for r in (row - 1, row, row + 1):
+            for c in columns:
+                bucket = self._cells.get((r, c))
+                if not bucket:
+                    continue
+                start = bisect_left(bucket, (lo_ms, -1))
+                stop = bisect_right(bucket, (hi_ms, len(self.events)))
+                for _, position in bucket[start:stop]:
+                    event = self.events[position]
+                    dist = haversine_meters(lat, lon, event.lat, event.lon)
+                    if dist <= self.max_distance_m:
+                        found.append((position, dist))
+        found.sort()
+        return found
+
 class ReceiptStitcher:
-    def stitch(self, receipt: Receipt, events: List[TelemetryEvent]) -> Tuple[TelemetryEvent, str]:
-        candidates = []
-        for e in events:
-            dist = haversine_meters(receipt.confidence, 0, e.lat, e.lon) # Simulating lat/lon in receipt or metadata - wait, receipt.confidence is float, logic was just using it as example?
-            # The prompt code used receipt.confidence as lat for demo purposes: "dist = haversine_meters(receipt.confidence, 0, e.lat, e.lon)"
-            # That's a bit weird, but I'll stick to the "Coding partner" code to follow instructions, or improve it.
-            # Ideally receipt has location info? The model says "receipt.confidence".
-            # The prompt says "receipt_processor that simulates OCR ... returning structured receipt fields + confidence".
-            # The code provided: "dist = haversine_meters(receipt.confidence, 0, e.lat, e.lon)".
-            # I will follow the provided code but maybe comment it's a simplification.
-
-            time_diff = abs(hash(receipt.timestamp_iso) - hash(e.timestamp_iso)) # Simplified for demo
-
-            # Deterministic Score: lower is better
-            score = dist + (time_diff / 100)
-            candidates.append((score, time_diff, dist, e.asset_id, e))
-
-        # Deterministic Tie-breaking: score, then time, then dist, then asset_id
-        candidates.sort(key=lambda x: (x[0], x[1], x[2], x[3]))
-
-        if not candidates:
+    def stitch(self, receipt: Receipt, events: Union[Sequence[TelemetryEvent], TelemetryColumns, TelemetryIndex, TelemetryStore, TelemetryView]) -> Tuple[TelemetryEvent, str]:
+        """
+        Best telemetry match for a receipt. With a TelemetryIndex only events inside its
+        distance/time window are scored; with a list, TelemetryColumns or a telemetry
+        store/view every event is.
+        """
+        match = self.stitch_many([receipt], events)[0]
+        if match is None:
             raise ValueError("No telemetry events found for stitching.")
+        return match
+
+    def stitch_many(self, receipts: Iterable[Receipt],
+                    events: Union[Sequence[TelemetryEvent], TelemetryColumns, TelemetryIndex, TelemetryStore, TelemetryView]) -> List[Optional[Tuple[TelemetryEvent, str]]]:
+        """
+        Stitches each receipt independently against the same telemetry, which is put into
+        columns once. Returns one (event, evidence_hash) per receipt, None where nothing matched.
+        Deterministic Tie-breaking: score, then time, then dist, then asset_id.
+        """
+        index = events if isinstance(events, TelemetryIndex) else None
+        if index is not None:
+            columns = index.columns
+        elif isinstance(events, TelemetryStore):
+            with events.view() as view:
+                return self.stitch_many(receipts, view)
+        elif isinstance(events, (TelemetryColumns, TelemetryView)):
+            columns = events
+        else:
+            columns = TelemetryColumns(events)
+
+        matches: List[Optional[Tuple[TelemetryEvent, str]]] = []
+        for receipt in receipts:
+            lat, lon = receipt_location(receipt)
+            receipt_ms = parse_timestamp_ms(receipt.timestamp_iso)
+            positions = index.candidates(lat, lon, receipt_ms) if index is not None else None
+            best = columns.best(lat, lon, receipt_ms, positions)
+            if best is None:
+                matches.append(None)
+                continue
+            best_event = columns.event(best)
+            matches.append((best_event, evidence_hash_for(receipt, best_event)))
+        return matches
+
+# (receipt, event, evidence_hash); event and hash are None when nothing was in the receipt's window.
+StitchedReceipt = Tuple[Receipt, Optional[TelemetryEvent], Optional[str]]
+
+class StreamingStitcher:
+    """
+    Stitches an unbounded telemetry stream against a receipt stream. Events are buffered
+    per asset in time order and evicted once they fall out of reach of any receipt that
+    can still arrive; a receipt is emitted once the event-time watermark (latest event
+    time minus `allowed_lateness_ms`) passes the end of its window, so memory follows the
+    window size rather than the history. Receipts whose window has already closed when
+    they arrive are stitched right away against what is still buffered.
+    Candidates are the events within `max_time_ms` of the receipt, scored and tie-broken
+    like ReceiptStitcher.stitch, with arrival order as the final tie-break.
+    """
+
+    def __init__(self, max_time_ms: int = 6 * 60 * 60 * 1000, allowed_lateness_ms: int = 0):
+        if max_time_ms < 0 or allowed_lateness_ms < 0:
+            raise ValueError(f"Invalid stream window: {max_time_ms} ms, lateness {allowed_lateness_ms} ms")
+        self.max_time_ms = max_time_ms
+        self.allowed_lateness_ms = allowed_lateness_ms
+        self.watermark_ms: Optional[int] = None
+        self._sequence = 0
+        self._by_asset: Dict[str, Deque[Tuple[int, int, TelemetryEvent]]] = {}
+        self._eviction: List[Tuple[int, int, str]] = []
+        self._pending: List[Tuple[int, int, Receipt, int]] = []
+
+    @property
+    def buffered_events(self) -> int:
+        return len(self._eviction)
+
+    @property
+    def pending_receipts(self) -> int:
+        return len(self._pending)
+
+    def push_event(self, event: TelemetryEvent) -> List[StitchedReceipt]:
+        """Buffers one telemetry event; returns receipts whose window it closed."""
+        ms = parse_timestamp_ms(event.timestamp_iso)
+        if self.watermark_ms is not None and ms < self.watermark_ms - 2 * self.max_time_ms:
+            return []  # Older than anything a receipt could still be matched to
+        self._sequence += 1
+        item = (ms, self._sequence, event)
+        events = self._by_asset.setdefault(event.asset_id, deque())
+        if not events or events[-1][0] <= ms:
+            events.append(item)
+        else:
+            events.insert(bisect_right(events, (ms, self._sequence)), item)
+        heapq.heappush(self._eviction, (ms, self._sequence, event.asset_id))
+
+        watermark = ms - self.allowed_lateness_ms
+        if self.watermark_ms is None or watermark > self.watermark_ms:
+            self.watermark_ms = watermark
+            emitted = self._emit(watermark)
+            self._evict(watermark - 2 * self.max_time_ms)
+            return emitted
+        return []
+
+    def push_receipt(self, receipt: Receipt) -> List[StitchedReceipt]:
+        """Queues a receipt until its window closes; a receipt that is already closed is returned at once."""
+        ms = parse_timestamp_ms(receipt.timestamp_iso)
+        self._sequence += 1
+        heapq.heappush(self._pending, (ms + self.max_time_ms, self._sequence, receipt, ms))
+        return self._emit(self.watermark_ms) if self.watermark_ms is not None else []
+
+    def flush(self) -> List[StitchedReceipt]:
+        """End of stream: stitches every pending receipt against the buffered events."""
+        emitted = []
+        while self._pending:
+            _, _, receipt, ms = heapq.heappop(self._pending)
+            emitted.append(self._stitch(receipt, ms))
+        return emitted
+
+    def _emit(self, watermark: int) -> List[StitchedReceipt]:
+        emitted = []
+        while self._pending and self._pending[0][0] <= watermark:
+            _, _, receipt, ms = heapq.heappop(self._pending)
+            emitted.append(self._stitch(receipt, ms))
+        return emitted
+
+    def _evict(self, cutoff: int):
+        eviction = self._eviction
+        while eviction and eviction[0][0] < cutoff:
+            _, _, asset_id = heapq.heappop(eviction)
+            events = self._by_asset[asset_id]
+            events.popleft()
+            if not events:
+                del self._by_asset[asset_id]
 
-        best_event = candidates[0][4]
-        evidence_hash = hashlib.sha256(f"{receipt.receipt_id}:{best_event.asset_id}".encode()).hexdigest()
-        return best_event, evidence_hash
+    def _stitch(self, receipt: Receipt, receipt_ms: int) -> StitchedReceipt:
+        lat, lon = receipt_location(receipt)
+        lo, hi = receipt_ms - self.max_time_ms, receipt_ms + self.max_time_ms
+        best_key = None
+        best_event = None
+        for events in self._by_asset.values():
+            start = bisect_left(events, (lo,))
+            for i in range(start, len(events)):
+                ms, sequence, e = events[i]
+                if ms > hi:
+                    break
+                dist = haversine_meters(lat, lon, e.lat, e.lon)
+                time_diff = abs(receipt_ms - ms)
+                key = (dist + (time_diff / 100), time_diff, dist, e.asset_id, sequence)
+                if best_key is None or key < best_key:
+                    best_key, best_event = key, e
+        if best_event is None:
+            return receipt, None, None
+        return receipt, best_event, evidence_hash_for(receipt, best_event)
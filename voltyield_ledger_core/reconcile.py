@@ -0,0 +1,166 @@
+import heapq
+from typing import Dict, Iterable, List, Tuple
+from .models import TelemetryEvent, Receipt
+from .indexes import parse_timestamp_ms
+from .processor import TelemetryIndex, evidence_hash_for, receipt_location
+
+class ReconciliationResult:
+    """One-to-one receipt/event pairs (by receipt_id) plus the receipts left without an event."""
+    def __init__(self, matches: List[Tuple[Receipt, TelemetryEvent, str]], unmatched: List[Receipt], total_cost: int):
+        self.matches = matches
+        self.unmatched = unmatched
+        self.total_cost = total_cost
+
+def edge_cost(dist_m: float, time_diff_ms: int) -> int:
+    """The stitch score (meters + ms / 100) in integer millimeters, so optimal totals compare exactly."""
+    return int(round(dist_m * 1000)) + time_diff_ms * 10
+
+class ReceiptReconciler:
+    """
+    Bulk receipt/telemetry reconciliation as a minimum-cost bipartite matching. Each receipt
+    may only take an event inside the (distance, time) window, no event is used twice, and
+    among the assignments that match as many receipts as possible the one with the lowest
+    total stitch score wins. Candidate edges come from a TelemetryIndex, the graph is split
+    into connected components, and each component is solved by the Hungarian method with
+    Dijkstra shortest augmenting paths. Inputs are put in a canonical order first,
+    so the result does not depend on the order receipts or events arrive in.
+    """
+
+    def __init__(self, max_distance_m: float = 5000.0, max_time_ms: int = 6 * 60 * 60 * 1000):
+        self.max_distance_m = max_distance_m
+        self.max_time_ms = max_time_ms
+
+    def reconcile(self, receipts: Iterable[Receipt], events: Iterable[TelemetryEvent]) -> ReconciliationResult:
+        receipts = sorted(receipts, key=lambda r: r.receipt_id)
+        for a, b in zip(receipts, receipts[1:]):
+            if a.receipt_id == b.receipt_id:
+                raise ValueError(f"Duplicate receipt_id: {a.receipt_id}")
+        ordered = sorted(events, key=lambda e: (parse_timestamp_ms(e.timestamp_iso), e.asset_id, e.lat, e.lon,
+                                                e.kwh_delivered, e.status, e.timestamp_iso))
+        index = TelemetryIndex(ordered, self.max_distance_m, self.max_time_ms)
+
+        # Sparse candidate edges, cheapest first: adjacency[r] = [(cost, event position)]
+        adjacency: List[List[Tuple[int, int]]] = []
+        for receipt in receipts:
+            lat, lon = receipt_location(receipt)
+            receipt_ms = parse_timestamp_ms(receipt.timestamp_iso)
+            times = index.times_ms
+            edges = sorted((edge_cost(dist, abs(receipt_ms - times[p])), p) for p, dist in index.neighbours(lat, lon, receipt_ms))
+            adjacency.append(edges)
+
+        match_event: Dict[int, int] = {}
+        total_cost = 0
+        for component in _components(adjacency, len(ordered)):
+            matched, cost = _min_cost_matching(component, adjacency)
+            match_event.update(matched)
+            total_cost += cost
+
+        matches = []
+        unmatched = []
+        for r, receipt in enumerate(receipts):
+            p = match_event.get(r)
+            if p is None:
+                unmatched.append(receipt)
+                continue
+            event = index.events[p]
+            matches.append((receipt, event, evidence_hash_for(receipt, event)))
+        return ReconciliationResult(matches, unmatched, total_cost)
+
+def _components(adjacency: List[List[Tuple[int, int]]], event_count: int) -> List[List[int]]:
+    """Receipts grouped by connected component of the candidate graph, each in ascending order."""
+    parent = list(range(len(adjacency) + event_count))
+
+    def find(x: int) -> int:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    offset = len(adjacency)
+    for r, edges in enumerate(adjacency):
+        for _, p in edges:
+            a, b = find(r), find(offset + p)
+            if a != b:
+                parent[max(a, b)] = min(a, b)
+    groups: Dict[int, List[int]] = {}
+    for r, edges in enumerate(adjacency):
+        if edges:
+            groups.setdefault(find(r), []).append(r)
+    return [groups[root] for root in sorted(groups)]
+
+def _min_cost_matching(receipts: List[int], adjacency: List[List[Tuple[int, int]]]) -> Tuple[Dict[int, int], int]:
+    """
+    Maximum-cardinality, minimum-cost matching of one component (Hungarian method with
+    Dijkstra on reduced costs). Every receipt r also has a private "unmatched" slot ~r
+    costing more than any set of real edges could, which makes matching as many receipts
+    as possible the first priority and keeps every augmentation exact. Receipts are added
+    one at a time; each search stops at the first free slot, so it only explores the
+    contested neighbourhood. Heap ties break on node ids, so the outcome is deterministic.
+    """
+    largest = max(c for r in receipts for c, _ in adjacency[r])
+    unmatched_cost = (len(receipts) + 1) * (largest + 1)
+    edges = {r: adjacency[r] + [(unmatched_cost, ~r)] for r in receipts}
+    costs = {(r, p): c for r in receipts for c, p in edges[r]}
+    match_r: Dict[int, int] = {}
+    match_e: Dict[int, int] = {}
+    pot_r: Dict[int, int] = {}
+    pot_e: Dict[int, int] = {}
+
+    for source in receipts:
+        pot_r[source] = 0
+        dist_r = {source: 0}
+        dist_e: Dict[int, int] = {}
+        prev_e: Dict[int, int] = {}
+        done_r: List[int] = []
+        done_e: List[int] = []
+        seen_e = set()
+        heap: List[Tuple[int, int, int]] = [(0, 0, source)]
+        target = None
+        while heap:
+            d, side, node = heapq.heappop(heap)
+            if side == 0:
+                if d > dist_r[node]:
+                    continue
+                done_r.append(node)
+                for c, p in edges[node]:
+                    if p in seen_e or match_r.get(node) == p:
+                        continue
+                    nd = d + c + pot_r[node] - pot_e.get(p, 0)
+                    if nd < dist_e.get(p, nd + 1):
+                        dist_e[p] = nd
+                        prev_e[p] = node
+                        heapq.heappush(heap, (nd, 1, p))
+            else:
+                if node in seen_e or d > dist_e[node]:
+                    continue
+                seen_e.add(node)
+                done_e.append(node)
+                owner = match_e.get(node)
+                if owner is None:
+                    target = node
+                    break
+                nd = d - costs[(owner, node)] + pot_e.get(node, 0) - pot_r[owner]
+                if nd < dist_r.get(owner, nd + 1):
+                    dist_r[owner] = nd
+                    heapq.heappush(heap, (nd, 0, owner))
+
+        # Shift potentials of the settled nodes so reduced costs stay non-negative.
+        limit = dist_e[target]
+        for r in done_r:
+            pot_r[r] += dist_r[r] - limit
+        for p in done_e:
+            pot_e[p] = pot_e.get(p, 0) + dist_e[p] - limit
+
+        # Flip the alternating path ending at `target`.
+        p = target
+        while True:
+            r = prev_e[p]
+            previous = match_r.get(r)
+            match_r[r] = p
+            match_e[p] = r
+            if previous is None:
+                break
+            p = previous
+
+    real = {r: p for r, p in match_r.items() if p >= 0}
+    return real, sum(costs[(r, p)] for r, p in real.items())
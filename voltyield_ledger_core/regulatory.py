@@ -1,6 +1,13 @@
 from datetime import datetime
+import time
 import hashlib
-from typing import List, Dict, Any, Optional
+import threading
+from collections import OrderedDict
+from typing import Callable, List, Dict, Any, Optional, Sequence, Tuple
+from .ledger import canonicalize
+from .fleet import FleetResult, evaluate_fleet
+from .depreciation import DepreciationSchedules, depreciation_schedules
+from .rulepack import CompiledRulepack, load_rulepack
 
 class RuleResult:
     def __init__(self, rule_id: str, eligible: bool, amount: int, trace: Dict[str, Any], citation: str):
@@ -10,30 +17,112 @@ class RuleResult:
         self.trace = trace
         self.citation = citation
 
+class EvaluationCache:
+    """
+    Bounded LRU of evaluate_all() reports keyed by canonical input bytes. Entries expire
+    `ttl_seconds` after they are stored (never if None), and the whole cache is dropped
+    when it is asked for a different rulepack fingerprint than the one it was filled under.
+    """
+    def __init__(self, max_entries: int = 1024, ttl_seconds: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        if max_entries < 1:
+            raise ValueError(f"Invalid cache size: {max_entries}")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.fingerprint: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries: "OrderedDict[bytes, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, fingerprint: str, key: bytes) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if fingerprint != self.fingerprint:
+                if self._entries:
+                    self.invalidations += 1
+                self._entries.clear()
+                self.fingerprint = fingerprint
+            item = self._entries.get(key)
+            if item is not None and (self.ttl_seconds is None or self.clock() < item[0]):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return item[1]
+            if item is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, fingerprint: str, key: bytes, report: Dict[str, Any]):
+        with self._lock:
+            if fingerprint != self.fingerprint:
+                return
+            expires = self.clock() + self.ttl_seconds if self.ttl_seconds is not None else 0.0
+            self._entries[key] = (expires, report)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._entries), "max_entries": self.max_entries, "hits": self.hits,
+                    "misses": self.misses, "evictions": self.evictions, "invalidations": self.invalidations}
+
 class RegulatoryEngine:
-    def __init__(self, rulepack_version: str):
+    def __init__(self, rulepack_version: str, rulepack: Optional[CompiledRulepack] = None,
+                 cache_size: int = 0, cache_ttl_seconds: Optional[float] = None):
+        """
+        Rates, caps and thresholds come from the rulepack (see rulepack.py), loaded for the
+        version unless given. cache_size > 0 enables memoization for evaluate_all_cached().
+        """
         self.version = rulepack_version
+        self.cache = EvaluationCache(cache_size, cache_ttl_seconds) if cache_size else None
+        self.use_rulepack(rulepack or load_rulepack(rulepack_version))
+
+    def reload_rulepack(self):
+        """Picks up edits to this version's rulepack file (a no-op when it is unchanged)."""
+        self.use_rulepack(load_rulepack(self.version))
+
+    def use_rulepack(self, rulepack: CompiledRulepack):
+        """Switches to another compiled rulepack; cached reports from the old one are dropped on next use."""
+        self.rulepack = rulepack
+        self._fingerprint = hashlib.sha256(f"{self.version}:{rulepack.fingerprint}".encode()).hexdigest()
+        self._sec179 = self.rulepack.rule("US_SEC_179_HEAVY")
+        self._macrs = self.rulepack.rule("US_MACRS_2026")
+        self._30c = self.rulepack.rule("US_30C")
+        self._lcfs = self.rulepack.rule("US_LCFS")
+        self._aer = self.rulepack.rule("UK_AER")
+        self._mtd = self.rulepack.rule("UK_MTD")
+        self._vat = self.rulepack.rule("UK_VAT")
+        self._45w = self.rulepack.rule("US_45W")
+        self._casualty = self.rulepack.rule("CASUALTY")
 
     def evaluate_us_section_179_heavy(self, vehicle_weight_lbs: int, asset_cost_minor: int, placed_in_service_date: str, business_use_percent: int) -> RuleResult:
         """US Section 179 for Heavy SUVs (6000-14000 lbs)."""
-        # Trigger: 6000 <= weight < 14000
-        is_heavy_suv = 6000 <= vehicle_weight_lbs < 14000
+        rule = self._sec179
+        # Trigger: min_weight <= weight < max_weight
+        is_heavy_suv = rule["min_weight_lbs"] <= vehicle_weight_lbs < rule["max_weight_lbs"]
 
-        # Business Use Check: > 50%
-        if business_use_percent <= 50:
-             return RuleResult("US_SEC_179_HEAVY", False, 0, {"reason": "Business use <= 50%"}, "IRC § 179(b)(5)")
+        # Business Use Check: > min_business_use_percent
+        if business_use_percent <= rule["min_business_use_percent"]:
+             return RuleResult("US_SEC_179_HEAVY", False, 0, {"reason": f"Business use <= {rule['min_business_use_percent']}%"}, rule["citation"])
 
         if not is_heavy_suv:
-             return RuleResult("US_SEC_179_HEAVY", False, 0, {"reason": "Not a Heavy SUV"}, "IRC § 179(b)(5)")
+             return RuleResult("US_SEC_179_HEAVY", False, 0, {"reason": "Not a Heavy SUV"}, rule["citation"])
 
-        # Determine cap based on year
+        # Determine cap based on year (the latest published limit is projected forward)
         year = int(placed_in_service_date[:4])
-        if year == 2024:
-            cap_limit = 3050000
-        elif year >= 2025:
-            cap_limit = 3130000 # 2025 Limit and projected forward
-        else:
-            cap_limit = 2890000 # 2023 or earlier fallback
+        cap_limit = rule["cap_minor_by_year"].lookup(year)
 
         # Calculate deductible cost based on business use
         # "deduction = min(asset_cost * (business_percent/100), cap_limit)"
@@ -48,32 +137,21 @@ class RegulatoryEngine:
             "business_cost": business_cost,
             "business_use_percent": business_use_percent
         }
-        return RuleResult("US_SEC_179_HEAVY", True, deduction, trace, "IRC § 179(b)(5) - Heavy SUV Limitation")
+        return RuleResult("US_SEC_179_HEAVY", True, deduction, trace, rule["eligible_citation"])
 
     def evaluate_us_macrs_2026(self, basis_minor: int, placed_in_service_date: str, business_use_percent: int) -> RuleResult:
         """US MACRS Bonus Depreciation (with 2025 Restoration)."""
-        # Business Use Check: > 50%
-        if business_use_percent <= 50:
-             return RuleResult("US_MACRS_2026", False, 0, {"reason": "Business use <= 50%"}, "IRC § 168(k)")
-
-        # 2025 Bonus Restoration: > 2025-01-19
-        if placed_in_service_date > "2025-01-19":
-            bonus_rate = 1.00
+        rule = self._macrs
+        # Business Use Check: > min_business_use_percent
+        if business_use_percent <= rule["min_business_use_percent"]:
+             return RuleResult("US_MACRS_2026", False, 0, {"reason": f"Business use <= {rule['min_business_use_percent']}%"}, rule["citation"])
+
+        # 2025 Bonus Restoration: > restored_after
+        if placed_in_service_date > rule["restored_after"]:
+            bonus_rate = rule["restored_rate"]
         else:
             # TCJA Phase-out
-            year = int(placed_in_service_date[:4])
-            if year <= 2022:
-                bonus_rate = 1.00
-            elif year == 2023:
-                bonus_rate = 0.80
-            elif year == 2024:
-                bonus_rate = 0.60
-            elif year == 2025:
-                bonus_rate = 0.40
-            elif year == 2026:
-                bonus_rate = 0.20
-            else:
-                bonus_rate = 0.00
+            bonus_rate = rule["bonus_rate_by_year"].lookup(int(placed_in_service_date[:4]))
 
         # Basis for bonus depreciation is the remaining basis after Sec 179,
         # multiplied by business use percentage.
@@ -100,21 +178,22 @@ class RegulatoryEngine:
             "bonus_rate": bonus_rate,
             "basis_applied": basis_minor
         }
-        return RuleResult("US_MACRS_2026", True, amount, trace, "IRC § 168(k) (2025 Update)")
+        return RuleResult("US_MACRS_2026", True, amount, trace, rule["eligible_citation"])
 
     def evaluate_us_30c_enhanced(self, wage_evidence: bool, basis_minor: int, census_tract_status: str = "URBAN") -> RuleResult:
         """US Section 30C Infrastructure Credit (Enhanced with Prevailing Wage & Census)."""
+        rule = self._30c
         # Huntington Check: LOW_INCOME or NON_URBAN
-        eligible_tract = census_tract_status in ["LOW_INCOME", "NON_URBAN"]
+        eligible_tract = census_tract_status in rule["eligible_tracts"]
 
         if not eligible_tract:
-             return RuleResult("US_30C", False, 0, {"reason": "Ineligible Census Tract"}, "IRC § 30C")
+             return RuleResult("US_30C", False, 0, {"reason": "Ineligible Census Tract"}, rule["citation"])
 
         # Base Case: 6%. Enhanced Case: 30%.
-        rate = 0.30 if wage_evidence else 0.06
+        rate = rule["enhanced_rate"] if wage_evidence else rule["base_rate"]
         amount = int(basis_minor * rate)
         # Cap is $100,000 per item of property
-        amount = min(amount, 10000000)
+        amount = min(amount, rule["cap_minor"])
 
         trace = {
             "wage_evidence_hash": "VERIFIED" if wage_evidence else "MISSING",
@@ -122,14 +201,15 @@ class RegulatoryEngine:
             "rate_applied": rate,
             "census_tract_status": census_tract_status
         }
-        return RuleResult("US_30C", True, amount, trace, "IRC § 30C(g) / IRA 2022 § 13404")
+        return RuleResult("US_30C", True, amount, trace, rule["eligible_citation"])
 
     def evaluate_us_lcfs(self, kwh_delivered: int, jurisdiction: str, has_ansi_meter: bool, has_gps_lock: bool) -> RuleResult:
         """US LCFS Credits (Carbon Rail)."""
-        rate_cents = {"CA": 15, "OR": 12, "WA": 14}
+        rule = self._lcfs
+        rate_cents = rule["rate_cents_per_kwh"]
 
         if jurisdiction not in rate_cents or not (has_ansi_meter and has_gps_lock):
-             return RuleResult("US_LCFS", False, 0, {"reason": "Invalid Jurisdiction or Evidence"}, "Cal. Code Regs. Tit. 17 § 95481")
+             return RuleResult("US_LCFS", False, 0, {"reason": "Invalid Jurisdiction or Evidence"}, rule["citation"])
 
         rate = rate_cents[jurisdiction]
         amount = (kwh_delivered * rate) // 1000
@@ -140,16 +220,14 @@ class RegulatoryEngine:
             "jurisdiction": jurisdiction,
             "rate_cents_per_kwh": rate
         }
-        return RuleResult("US_LCFS", True, amount, trace, "Cal. Code Regs. Tit. 17 § 95481")
+        return RuleResult("US_LCFS", True, amount, trace, rule["citation"])
 
     def evaluate_uk_aer_reimbursement(self, kwh_delivered: int, location_type: str) -> RuleResult:
         """UK Audit Shield (AER & BiK)."""
-        if location_type == "HOME_BASE":
-            rate = 8
-        elif location_type == "PUBLIC_NETWORK":
-            rate = 14
-        else:
-            return RuleResult("UK_AER", False, 0, {"reason": "Unknown Location"}, "HMRC Guidance EIM23900")
+        rule = self._aer
+        rate = rule["rate_pence_per_kwh"].get(location_type)
+        if rate is None:
+            return RuleResult("UK_AER", False, 0, {"reason": "Unknown Location"}, rule["citation"])
 
         amount = (kwh_delivered * rate) // 1000
         trace = {
@@ -157,31 +235,29 @@ class RegulatoryEngine:
             "location_type": location_type,
             "rate_pence_per_kwh": rate
         }
-        return RuleResult("UK_AER", True, amount, trace, "HMRC Guidance EIM23900")
+        return RuleResult("UK_AER", True, amount, trace, rule["citation"])
 
     def evaluate_uk_mtd(self, digital_links_compliant: bool) -> RuleResult:
         """UK MTD Compliance Link."""
-        return RuleResult("UK_MTD", digital_links_compliant, 0, {"compliant": digital_links_compliant}, "HMRC MTD Notice 700/22")
+        return RuleResult("UK_MTD", digital_links_compliant, 0, {"compliant": digital_links_compliant}, self._mtd["citation"])
 
     def evaluate_uk_vat_recovery(self, net_amount_minor: int, unbroken_lineage: bool) -> RuleResult:
         """UK VAT Recovery with MTD Digital Links check."""
-        vat_amount = int(net_amount_minor * 0.20)
+        vat_amount = int(net_amount_minor * self._vat["rate"])
         eligible = unbroken_lineage
         trace = {
             "unbroken_lineage": unbroken_lineage,
             "basis_amount": net_amount_minor,
             "calculated_vat": vat_amount
         }
-        return RuleResult("UK_VAT", eligible, vat_amount if eligible else 0, trace, "VATA 1994 s24")
+        return RuleResult("UK_VAT", eligible, vat_amount if eligible else 0, trace, self._vat["citation"])
 
     def evaluate_us_45w(self, vehicle_weight_lbs: int, cost_basis_minor: int, is_tax_exempt: bool = False, is_ev: bool = True) -> RuleResult:
         """US Section 45W Commercial Clean Vehicle Credit."""
-        if vehicle_weight_lbs < 14000:
-            cap_amount = 750000
-        else:
-            cap_amount = 4000000
+        rule = self._45w
+        cap_amount = rule["cap_minor_by_weight"].lookup(vehicle_weight_lbs)
 
-        rate = 0.30 if is_ev else 0.15
+        rate = rule["ev_rate"] if is_ev else rule["non_ev_rate"]
         tentative_credit = int(cost_basis_minor * rate)
         final_amount = min(tentative_credit, cap_amount)
 
@@ -194,16 +270,16 @@ class RegulatoryEngine:
             "is_tax_exempt": is_tax_exempt
         }
 
-        return RuleResult("US_45W", True, final_amount, trace, "IRC § 45W(b)(1)")
+        return RuleResult("US_45W", True, final_amount, trace, rule["citation"])
 
     def evaluate_casualty_event(self, date_of_loss: str, insurance_payout_minor: int, adjusted_basis_minor: int, state: str = "") -> Dict[str, Any]:
         """Calculates Casualty Forensics (Section 1033 & WV Refund)."""
         taxable_gain = max(0, insurance_payout_minor - adjusted_basis_minor)
 
-        # Replacement Deadline: Date of Loss Year + 2 (Dec 31)
+        # Replacement Deadline: Date of Loss Year + replacement_years (Dec 31)
         try:
             loss_date = datetime.strptime(date_of_loss, "%Y-%m-%d")
-            deadline_year = loss_date.year + 2
+            deadline_year = loss_date.year + self._casualty["replacement_years"]
             deadline = f"{deadline_year}-12-31"
         except ValueError:
             deadline = "INVALID_DATE"
@@ -214,7 +290,7 @@ class RegulatoryEngine:
             "alert": "TAX_EVENT_IMMINENT",
             "casualty_forensics": {
                 "insurance_payout_taxable": taxable_gain,
-                "tax_liability_if_kept": int(taxable_gain * 0.32), # Assuming ~32% blended rate
+                "tax_liability_if_kept": int(taxable_gain * self._casualty["blended_tax_rate"]), # Assuming ~32% blended rate
                 "section_1033_deadline": deadline,
                 "recommendation": "BUY_REPLACEMENT_ASSET",
                 "wv_property_tax_refund": "ELIGIBLE" if wv_refund_eligible else "INELIGIBLE"
@@ -275,5 +351,34 @@ class RegulatoryEngine:
             "total_deduction_first_year": deduction_179 + r_macrs.amount
         }
 
+    def evaluate_all_cached(self, asset_data: Dict[str, Any], business_use_percent: int = 100) -> Dict[str, Any]:
+        """
+        evaluate_all() memoized on the canonical form of its inputs and the rulepack fingerprint.
+        Repeat calls return the same report object, so callers must not modify it.
+        """
+        if self.cache is None:
+            return self.evaluate_all(asset_data, business_use_percent)
+        try:
+            key = canonicalize({"asset_data": asset_data, "business_use_percent": business_use_percent})
+        except (TypeError, ValueError):
+            return self.evaluate_all(asset_data, business_use_percent)
+        fingerprint = self._fingerprint
+        report = self.cache.get(fingerprint, key)
+        if report is None:
+            report = self.evaluate_all(asset_data, business_use_percent)
+            self.cache.put(fingerprint, key, report)
+        return report
+
+    def evaluate_fleet(self, cost_minor: Sequence[int], weight_lbs: Sequence[int], date_service: Sequence[str],
+                       business_use_percent: Sequence[int], asset_ids: Optional[Sequence[str]] = None) -> FleetResult:
+        """evaluate_all() over columns (lists or arrays, one row per asset); see fleet.evaluate_fleet."""
+        return evaluate_fleet(self, cost_minor, weight_lbs, date_service, business_use_percent, asset_ids)
+
+    def depreciation_schedules(self, cost_minor: Sequence[int], weight_lbs: Sequence[int], date_service: Sequence[str],
+                               business_use_percent: Sequence[int], **options) -> DepreciationSchedules:
+        """Multi-year MACRS schedules (assets x tax years); see depreciation.depreciation_schedules for options."""
+        return depreciation_schedules(self, cost_minor, weight_lbs, date_service, business_use_percent, **options)
+
     def get_fingerprint(self) -> str:
-        return hashlib.sha256(self.version.encode()).hexdigest()
+        """Identifies the version label together with the rule content it resolved to."""
+        return self._fingerprint
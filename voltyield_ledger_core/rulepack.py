@@ -0,0 +1,123 @@
+import os
+import re
+import json
+import hashlib
+import threading
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional, Tuple
+from .ledger import canonicalize
+
+RULEPACK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rulepacks")
+DEFAULT_RULEPACK = "default"
+REQUIRED_RULES = ("US_SEC_179_HEAVY", "US_MACRS_2026", "US_30C", "US_LCFS", "UK_AER", "UK_MTD", "UK_VAT", "US_45W", "CASUALTY")
+
+_VERSION_NAME = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,127}$")
+
+class StepTable:
+    """
+    A piecewise-constant lookup: `default` below the first key, otherwise the value of the
+    last key <= the lookup key. Stored as parallel arrays and searched with bisect.
+    """
+    __slots__ = ("keys", "values")
+
+    def __init__(self, keys: List[Any], values: List[Any]):
+        if len(values) != len(keys) + 1:
+            raise ValueError("A step table needs exactly one more value than keys")
+        self.keys = tuple(keys)
+        self.values = tuple(values)
+
+    def lookup(self, key: Any) -> Any:
+        return self.values[bisect_right(self.keys, key)]
+
+class CompiledRulepack:
+    """Rule parameters with every step table ready for lookup, identified by a content fingerprint."""
+    def __init__(self, fingerprint: str, rules: Dict[str, Dict[str, Any]]):
+        self.fingerprint = fingerprint
+        self.rules = rules
+
+    def rule(self, rule_id: str) -> Dict[str, Any]:
+        params = self.rules.get(rule_id)
+        if params is None:
+            raise ValueError(f"Rulepack has no rule {rule_id}")
+        return params
+
+def rulepack_fingerprint(data: Dict[str, Any]) -> str:
+    """SHA-256 of the canonical JSON form, so formatting changes do not change it."""
+    return hashlib.sha256(canonicalize(data)).hexdigest()
+
+def compile_rulepack(data: Dict[str, Any]) -> CompiledRulepack:
+    """
+    Validates a rulepack document, turning each {"default", "steps"} table into a
+    StepTable and each list into a frozenset.
+    """
+    rules = data.get("rules")
+    if not isinstance(rules, dict):
+        raise ValueError("Rulepack has no rules")
+    for rule_id in REQUIRED_RULES:
+        if not isinstance(rules.get(rule_id), dict):
+            raise ValueError(f"Rulepack has no rule {rule_id}")
+    compiled = {}
+    for rule_id, params in rules.items():
+        compiled[rule_id] = {name: _compile_value(rule_id, name, value) for name, value in params.items()}
+    return CompiledRulepack(rulepack_fingerprint(data), compiled)
+
+def _compile_value(rule_id: str, name: str, value: Any) -> Any:
+    if isinstance(value, list):
+        return frozenset(value)
+    if not (isinstance(value, dict) and "steps" in value):
+        return value
+    if "default" not in value:
+        raise ValueError(f"Step table {rule_id}.{name} has no default")
+    keys = [step[0] for step in value["steps"]]
+    if any(a >= b for a, b in zip(keys, keys[1:])):
+        raise ValueError(f"Step table {rule_id}.{name} keys must be strictly increasing")
+    return StepTable(keys, [value["default"]] + [step[1] for step in value["steps"]])
+
+def rulepack_path(version: str) -> str:
+    """
+    The data file for a rulepack version, rulepacks/<version>.json. Only the "default"
+    name falls back to the default pack; any other version must be shipped, so a
+    mistyped version cannot quietly evaluate under the wrong rules.
+    """
+    if version == DEFAULT_RULEPACK:
+        return os.path.join(RULEPACK_DIR, f"{DEFAULT_RULEPACK}.json")
+    if not _VERSION_NAME.match(version):
+        raise ValueError(f"Invalid rulepack version: {version!r}")
+    path = os.path.join(RULEPACK_DIR, f"{version}.json")
+    if not os.path.exists(path):
+        raise ValueError(f"Unknown rulepack version: {version}")
+    return path
+
+# Compiled packs stay resident by fingerprint, so several versions can be loaded side by side.
+_resident: Dict[str, CompiledRulepack] = {}
+# path -> (mtime_ns, size, fingerprint): an unchanged file is not even re-read.
+_by_path: Dict[str, Tuple[int, int, str]] = {}
+_lock = threading.Lock()
+
+def load_rulepack(version: str = DEFAULT_RULEPACK, path: Optional[str] = None) -> CompiledRulepack:
+    """
+    Loads and compiles a rulepack once per process. Tables are always compiled from the
+    source file, so the fingerprint an engine reports is the content it evaluates with.
+    """
+    path = os.path.abspath(path or rulepack_path(version))
+    stat = os.stat(path)
+    with _lock:
+        known = _by_path.get(path)
+        if known is not None and known[:2] == (stat.st_mtime_ns, stat.st_size):
+            return _resident[known[2]]
+
+    with open(path, "rb") as f:
+        data = json.loads(f.read())
+    fingerprint = rulepack_fingerprint(data)
+    with _lock:
+        pack = _resident.get(fingerprint)
+    if pack is None:
+        pack = compile_rulepack(data)
+    with _lock:
+        pack = _resident.setdefault(fingerprint, pack)
+        _by_path[path] = (stat.st_mtime_ns, stat.st_size, fingerprint)
+    return pack
+
+def resident_fingerprints() -> List[str]:
+    with _lock:
+        return sorted(_resident)
@@ -0,0 +1,201 @@
+import os
+import re
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Union
+from .ledger import ForensicLedger, LedgerEntry, CanonicalPayload, CommitResult
+from .snapshot import SnapshotManager
+from .storage import FsyncPolicy, SegmentStorage
+from .verify import VerificationReport
+
+ANCHOR_TYPE = "SHARD_ANCHOR"
+ROUTING_MODES = ("TENANT", "ASSET_HASH")
+_SHARD_NAME = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,127}$")
+
+class ShardedLedger:
+    """
+    Independent ForensicLedger chains ("shards"), each with its own head, lock and key
+    indexes, so commits to different shards never wait on each other.
+    TENANT routing gives every tenant id its own shard; ASSET_HASH routing spreads
+    asset ids over `shard_count` shards by SHA-256. Idempotency and double-count keys
+    are enforced per shard, so route by the entity those keys protect.
+    anchor() commits every shard head that moved into a separate root chain, which
+    pins each shard's history without coupling their write paths.
+    """
+
+    def __init__(self, directory: Optional[str] = None, routing: str = "TENANT", shard_count: int = 16,
+                 fsync_policy: Optional[FsyncPolicy] = None, snapshot_every: int = 0,
+                 ledger_options: Optional[Dict[str, Any]] = None):
+        if routing not in ROUTING_MODES:
+            raise ValueError(f"Unknown routing mode: {routing}")
+        if shard_count < 1:
+            raise ValueError(f"Invalid shard count: {shard_count}")
+        self.directory = directory
+        self.routing = routing
+        self.shard_count = shard_count
+        self.fsync_policy = fsync_policy
+        self.snapshot_every = snapshot_every
+        self.ledger_options = ledger_options or {}
+        self._shards: Dict[str, ForensicLedger] = {}
+        # Guards the shard map only; commits hold the owning shard's lock.
+        self._lock = threading.Lock()
+        self._anchor_lock = threading.Lock()
+        self._anchored: Dict[str, int] = {}
+        self._anchor_stop = threading.Event()
+        self._anchor_thread: Optional[threading.Thread] = None
+
+        self.root = self._open("_root", os.path.join(directory, "root") if directory else None)
+        if directory:
+            shard_dir = os.path.join(directory, "shards")
+            os.makedirs(shard_dir, exist_ok=True)
+            for name in sorted(os.listdir(shard_dir)):
+                self._shards[name] = self._open(name, os.path.join(shard_dir, name))
+        for entry in self.root.query(type=ANCHOR_TYPE):
+            for name, head in entry.payload["shards"].items():
+                self._anchored[name] = head["entry_count"]
+
+    def _open(self, name: str, path: Optional[str]) -> ForensicLedger:
+        if path is None:
+            return ForensicLedger(**self.ledger_options)
+        snapshots = SnapshotManager(os.path.join(path, "snapshots")) if self.snapshot_every else None
+        storage = SegmentStorage(os.path.join(path, "log"), self.fsync_policy)
+        return ForensicLedger(storage, snapshots=snapshots, snapshot_every=self.snapshot_every, **self.ledger_options)
+
+    # --- Routing ---
+
+    def shard_name(self, key: str) -> str:
+        """Shard that owns a tenant id (TENANT) or asset id (ASSET_HASH)."""
+        if self.routing == "ASSET_HASH":
+            bucket = int.from_bytes(hashlib.sha256(key.encode("utf-8")).digest()[:8], "big") % self.shard_count
+            return f"shard-{bucket:04d}"
+        if not _SHARD_NAME.match(key):
+            raise ValueError(f"Invalid tenant id for a shard name: {key!r}")
+        return key
+
+    def shard(self, key: str) -> ForensicLedger:
+        """The ledger for `key`, created on first use."""
+        return self._ledger(self.shard_name(key))
+
+    def _ledger(self, name: str) -> ForensicLedger:
+        ledger = self._shards.get(name)
+        if ledger is not None:
+            return ledger
+        with self._lock:
+            ledger = self._shards.get(name)
+            if ledger is None:
+                path = os.path.join(self.directory, "shards", name) if self.directory else None
+                ledger = self._shards[name] = self._open(name, path)
+            return ledger
+
+    @property
+    def shard_names(self) -> List[str]:
+        return sorted(self._shards)
+
+    # --- Writes ---
+
+    def commit(self, key: str, payload: Union[Dict[str, Any], CanonicalPayload], idempotency_key: str,
+               adc_key: Optional[str] = None) -> LedgerEntry:
+        return self.shard(key).commit(payload, idempotency_key, adc_key)
+
+    def commit_many(self, key: str, items: Iterable[Sequence[Any]], mode: str = "ATOMIC") -> Union[List[LedgerEntry], List[CommitResult]]:
+        return self.shard(key).commit_many(items, mode)
+
+    def commit_batches(self, batches: Mapping[str, Iterable[Sequence[Any]]], mode: str = "PER_ITEM",
+                       workers: Optional[int] = None) -> Dict[str, Union[List[LedgerEntry], List[CommitResult]]]:
+        """
+        Commits {key: items} with one commit_many per shard, running shards concurrently.
+        Keys that route to the same shard are merged into one batch in the given order.
+        """
+        grouped: Dict[str, List[Sequence[Any]]] = {}
+        for key, items in batches.items():
+            grouped.setdefault(self.shard_name(key), []).extend(items)
+        if len(grouped) <= 1:
+            return {name: self._ledger(name).commit_many(items, mode) for name, items in grouped.items()}
+        with ThreadPoolExecutor(max_workers=workers or len(grouped)) as pool:
+            futures = {name: pool.submit(self._ledger(name).commit_many, items, mode) for name, items in grouped.items()}
+            return {name: future.result() for name, future in futures.items()}
+
+    # --- Anchoring ---
+
+    def anchor(self) -> Optional[LedgerEntry]:
+        """
+        Commits the head (entry count, chain hash, Merkle root) of every shard that
+        grew since its last anchor into the root chain; None if nothing moved.
+        """
+        with self._anchor_lock:
+            heads = {}
+            for name in self.shard_names:
+                ledger = self._shards[name]
+                with ledger._lock:
+                    count = len(ledger.storage)
+                    if count == self._anchored.get(name, 0):
+                        continue
+                    heads[name] = {
+                        "entry_count": count,
+                        "chain_head": ledger.storage[count - 1].chain_hash,
+                        "merkle_root": ledger.merkle_root(count),
+                    }
+            if not heads:
+                return None
+            sequence = len(self.root.storage)
+            entry = self.root.commit({"type": ANCHOR_TYPE, "sequence": sequence, "shards": heads}, f"anchor:{sequence}")
+            for name, head in heads.items():
+                self._anchored[name] = head["entry_count"]
+            return entry
+
+    def start_anchoring(self, interval_seconds: float):
+        """Anchors in a background thread every `interval_seconds` until close()."""
+        if self._anchor_thread is not None:
+            raise ValueError("Anchoring is already running")
+        self._anchor_stop.clear()
+        self._anchor_thread = threading.Thread(target=self._anchor_loop, args=(interval_seconds,), daemon=True)
+        self._anchor_thread.start()
+
+    def _anchor_loop(self, interval_seconds: float):
+        while not self._anchor_stop.wait(interval_seconds):
+            self.anchor()
+
+    # --- Verification ---
+
+    def verify_shard(self, key: str, workers: Optional[int] = None) -> VerificationReport:
+        """
+        Verifies one shard's chain, then checks it against every anchor that names it:
+        the anchored entry count must exist and its chain head and Merkle root must match.
+        Reads only that shard and the root chain.
+        """
+        name = self.shard_name(key)
+        if name not in self._shards:
+            raise ValueError(f"Unknown shard: {name}")
+        ledger = self._shards[name]
+        report = ledger.verify(workers)
+        if not report.ok:
+            return report
+        root_report = self.root.verify(1)
+        if not root_report.ok:
+            return VerificationReport(False, report.entries_checked, None, "ANCHOR_CHAIN_BROKEN",
+                                      report.elapsed_seconds + root_report.elapsed_seconds)
+
+        size = report.entries_checked
+        for entry in self.root.query(type=ANCHOR_TYPE):
+            head = entry.payload["shards"].get(name)
+            if head is None:
+                continue
+            count = head["entry_count"]
+            if (count > size or ledger.storage[count - 1].chain_hash != head["chain_head"]
+                    or ledger.merkle_root(count) != head["merkle_root"]):
+                # A shorter shard lost anchored entries; otherwise its history was rewritten up to `count`.
+                broken = size if count > size else count - 1
+                return VerificationReport(False, size, broken, "ANCHOR_MISMATCH",
+                                          report.elapsed_seconds + root_report.elapsed_seconds)
+        return VerificationReport(True, size, None, None, report.elapsed_seconds + root_report.elapsed_seconds)
+
+    def close(self):
+        """Stops background anchoring and closes every shard and the root chain."""
+        if self._anchor_thread is not None:
+            self._anchor_stop.set()
+            self._anchor_thread.join()
+            self._anchor_thread = None
+        for ledger in self._shards.values():
+            ledger.close()
+        self.root.close()
@@ -0,0 +1,128 @@
+import os
+import json
+import struct
+import hashlib
+from typing import Dict, Iterable, List, Optional, Tuple, TYPE_CHECKING
+from .ledger import canonicalize
+
+if TYPE_CHECKING:
+    from .storage import LedgerStorage
+
+_MAGIC = b"VYSNAP1\n"
+_LENGTH = struct.Struct(">Q")
+_SUFFIX = ".snap"
+
+# A section is streamed to disk: (name, byte length, chunks).
+SnapshotSection = Tuple[str, int, Iterable[bytes]]
+
+class Snapshot:
+    """A validated checkpoint: chain head and entry count plus named binary sections."""
+    def __init__(self, path: str, entry_count: int, chain_head: Optional[str], merkle_root: str, sections: Dict[str, bytes]):
+        self.path = path
+        self.entry_count = entry_count
+        self.chain_head = chain_head
+        self.merkle_root = merkle_root
+        self.sections = sections
+
+class SnapshotManager:
+    """
+    Writes and loads ledger checkpoints in one directory.
+    File layout: magic, length-prefixed canonical JSON header, the raw sections in
+    header order, then a SHA-256 over everything before it. Files are written to a
+    temporary name and renamed into place, so a crash never leaves a half snapshot
+    that looks valid.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, entry_count: int) -> str:
+        return os.path.join(self.directory, f"{entry_count:020d}{_SUFFIX}")
+
+    def list(self) -> List[str]:
+        """Snapshot paths, oldest first."""
+        names = sorted(n for n in os.listdir(self.directory) if n.endswith(_SUFFIX))
+        return [os.path.join(self.directory, n) for n in names]
+
+    def write(self, entry_count: int, chain_head: Optional[str], merkle_root: str, sections: List[SnapshotSection]) -> str:
+        header = canonicalize({
+            "entry_count": entry_count,
+            "chain_head": chain_head,
+            "merkle_root": merkle_root,
+            "sections": [{"name": name, "length": length} for name, length, _ in sections],
+        })
+        path = self._path(entry_count)
+        tmp_path = path + ".tmp"
+        digest = hashlib.sha256()
+        with open(tmp_path, "wb") as f:
+            def emit(chunk: bytes):
+                digest.update(chunk)
+                f.write(chunk)
+
+            emit(_MAGIC)
+            emit(_LENGTH.pack(len(header)))
+            emit(header)
+            for name, length, chunks in sections:
+                written = 0
+                for chunk in chunks:
+                    emit(chunk)
+                    written += len(chunk)
+                if written != length:
+                    raise ValueError(f"Snapshot section {name} wrote {written} bytes, declared {length}")
+            f.write(digest.digest())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        dir_fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+        return path
+
+    def read(self, path: str) -> Snapshot:
+        """Parses and checksums one snapshot file; raises ValueError if it is damaged."""
+        with open(path, "rb") as f:
+            data = f.read()
+        if len(data) < len(_MAGIC) + _LENGTH.size + 32 or not data.startswith(_MAGIC):
+            raise ValueError(f"Not a ledger snapshot: {path}")
+        body, checksum = data[:-32], data[-32:]
+        if hashlib.sha256(body).digest() != checksum:
+            raise ValueError(f"Snapshot checksum mismatch: {path}")
+
+        pos = len(_MAGIC)
+        (header_len,) = _LENGTH.unpack_from(body, pos)
+        pos += _LENGTH.size
+        header = json.loads(body[pos:pos + header_len])
+        pos += header_len
+        sections = {}
+        for section in header["sections"]:
+            sections[section["name"]] = body[pos:pos + section["length"]]
+            pos += section["length"]
+        if pos != len(body):
+            raise ValueError(f"Snapshot length mismatch: {path}")
+        return Snapshot(path, header["entry_count"], header["chain_head"], header["merkle_root"], sections)
+
+    def load_latest(self, storage: "LedgerStorage") -> Optional[Snapshot]:
+        """Newest snapshot that is intact and agrees with the entries in `storage`."""
+        for path in reversed(self.list()):
+            try:
+                snapshot = self.read(path)
+            except ValueError:
+                continue
+            if snapshot.entry_count > len(storage):
+                continue  # Log is shorter than the checkpoint (e.g. lost an unsynced tail)
+            if snapshot.entry_count and storage[snapshot.entry_count - 1].chain_hash != snapshot.chain_head:
+                continue
+            return snapshot
+        return None
+
+    def prune(self, keep: int = 2) -> List[str]:
+        """Deletes all but the newest `keep` snapshots; returns the removed paths."""
+        if keep < 1:
+            raise ValueError(f"Must keep at least one snapshot: {keep}")
+        removed = self.list()[:-keep]
+        for path in removed:
+            os.remove(path)
+        return removed
@@ -0,0 +1,416 @@
+import os
+import mmap
+import zlib
+import struct
+import threading
+from abc import ABC, abstractmethod
+from array import array
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional, Tuple
+from .ledger import LedgerEntry
+
+# Frame: body length + CRC32 of the body, so a torn tail write is detectable on recovery.
+_FRAME = struct.Struct(">II")
+# Body header: entry_hash, prev_hash (zeroes for genesis), chain_hash, key lengths.
+_HEADER = struct.Struct(">32s32s32sII")
+_LENGTHS = struct.Struct(">II")
+_NO_PREV = bytes(32)
+
+DEFAULT_SEGMENT_MAX_BYTES = 64 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class FsyncPolicy:
+    """When appended records are forced to stable storage."""
+    mode: str  # "ENTRY", "EVERY_N" or "INTERVAL"
+    every: int = 1  # Entry count for EVERY_N, milliseconds for INTERVAL
+
+    @classmethod
+    def per_entry(cls) -> "FsyncPolicy":
+        return cls("ENTRY")
+
+    @classmethod
+    def every_n(cls, n: int) -> "FsyncPolicy":
+        if n < 1:
+            raise ValueError(f"Invalid fsync batch size: {n}")
+        return cls("EVERY_N", n)
+
+    @classmethod
+    def interval_ms(cls, ms: int) -> "FsyncPolicy":
+        if ms < 1:
+            raise ValueError(f"Invalid fsync interval: {ms}")
+        return cls("INTERVAL", ms)
+
+
+def encode_record(entry: LedgerEntry, idempotency_key: str, adc_key: Optional[str]) -> bytes:
+    """Length-prefixed frame holding the entry digests, its keys and canonical payload bytes."""
+    idem = idempotency_key.encode("utf-8")
+    adc = (adc_key or "").encode("utf-8")
+    body = b"".join((
+        entry.digests,
+        _LENGTHS.pack(len(idem), len(adc)),
+        idem,
+        adc,
+        entry.canonical,
+    ))
+    return _FRAME.pack(len(body), zlib.crc32(body)) + body
+
+
+def decode_record(body: bytes) -> Tuple[LedgerEntry, str, Optional[str]]:
+    _, _, _, idem_len, adc_len = _HEADER.unpack_from(body, 0)
+    pos = _HEADER.size
+    idem = body[pos:pos + idem_len].decode("utf-8")
+    pos += idem_len
+    adc = body[pos:pos + adc_len].decode("utf-8") or None
+    pos += adc_len
+    # The header opens with the packed entry|prev|chain digests LedgerEntry keeps; the payload decodes lazily.
+    entry = LedgerEntry.from_digests(body[pos:], body[:96])
+    return entry, idem, adc
+
+
+def _payload_offset(body: bytes) -> int:
+    _, _, _, idem_len, adc_len = _HEADER.unpack_from(body, 0)
+    return _HEADER.size + idem_len + adc_len
+
+
+def iter_span(path: str, begin: int, count: int) -> Iterator[Tuple[bytes, bytes]]:
+    """
+    Yields (entry_hash, canonical payload bytes) for `count` records of one segment file
+    starting at byte offset `begin`. Opens the file independently, so it can run in a worker process.
+    """
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+        pos = begin
+        for _ in range(count):
+            length, _ = _FRAME.unpack_from(view, pos)
+            body = view[pos + _FRAME.size:pos + _FRAME.size + length]
+            yield body[:32], body[_payload_offset(body):]
+            pos += _FRAME.size + length
+
+
+def _decode_keys(body: bytes) -> Tuple[str, Optional[str]]:
+    _, _, _, idem_len, adc_len = _HEADER.unpack_from(body, 0)
+    pos = _HEADER.size
+    idem = body[pos:pos + idem_len].decode("utf-8")
+    adc = body[pos + idem_len:pos + idem_len + adc_len].decode("utf-8") or None
+    return idem, adc
+
+
+class LedgerStorage(ABC):
+    """Ordered, append-only home for ledger entries. Indexable like the list it replaces."""
+
+    @abstractmethod
+    def append(self, entry: LedgerEntry, idempotency_key: str, adc_key: Optional[str] = None):
+        pass
+
+    def append_many(self, records: Iterable[Tuple[LedgerEntry, str, Optional[str]]]):
+        for entry, idempotency_key, adc_key in records:
+            self.append(entry, idempotency_key, adc_key)
+
+    @abstractmethod
+    def get(self, index: int) -> LedgerEntry:
+        pass
+
+    @abstractmethod
+    def iter_keys(self, start: int = 0) -> Iterator[Tuple[str, Optional[str]]]:
+        """Yields (idempotency_key, adc_key) per entry, used to rebuild key indexes."""
+        pass
+
+    def iter_entry_hashes(self, start: int = 0) -> Iterator[str]:
+        for i in range(start, len(self)):
+            yield self.get(i).entry_hash
+
+    def iter_links(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Tuple[str, Optional[str], str]]:
+        """Yields (entry_hash, prev_hash, chain_hash) per entry, for chain verification."""
+        for i in range(start, len(self) if stop is None else stop):
+            entry = self.get(i)
+            yield entry.entry_hash, entry.prev_hash, entry.chain_hash
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+    def sync(self):
+        pass
+
+    def close(self):
+        pass
+
+    def __getitem__(self, index: int) -> LedgerEntry:
+        if isinstance(index, slice):
+            return [self.get(i) for i in range(*index.indices(len(self)))]
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("ledger index out of range")
+        return self.get(index)
+
+    def __iter__(self) -> Iterator[LedgerEntry]:
+        for i in range(len(self)):
+            yield self.get(i)
+
+
+class InMemoryStorage(LedgerStorage):
+    """Volatile storage for tests and demos."""
+
+    def __init__(self):
+        self._entries: List[LedgerEntry] = []
+        self._keys: List[Tuple[str, Optional[str]]] = []
+
+    def append(self, entry: LedgerEntry, idempotency_key: str, adc_key: Optional[str] = None):
+        self._entries.append(entry)
+        self._keys.append((idempotency_key, adc_key))
+
+    def get(self, index: int) -> LedgerEntry:
+        return self._entries[index]
+
+    def iter_keys(self, start: int = 0) -> Iterator[Tuple[str, Optional[str]]]:
+        return iter(self._keys[start:])
+
+    def iter_entry_hashes(self, start: int = 0) -> Iterator[str]:
+        for entry in self._entries[start:]:
+            yield entry.entry_hash
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class _Segment:
+    def __init__(self, path: str, base_index: int):
+        self.path = path
+        self.base_index = base_index
+        self.size = os.path.getsize(path) if os.path.exists(path) else 0
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+
+    def view(self, end: int):
+        """Read-only mapping covering at least `end` bytes, remapped as the segment grows."""
+        if self._map is None or len(self._map) < end:
+            self.release()
+            self._file = open(self.path, "rb")
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map
+
+    def release(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class SegmentStorage(LedgerStorage):
+    """
+    Append-only segment files of length-prefixed records, read through mmap.
+    Segment files are named after the index of their first record and rolled once
+    they pass `segment_max_bytes`. A torn record at the tail of the newest segment
+    is truncated on open; damage anywhere else is refused. A read-only open of a
+    directory without segments is refused too, since a writable open always creates one.
+    """
+
+    def __init__(self, directory: str, fsync_policy: Optional[FsyncPolicy] = None,
+                 segment_max_bytes: int = DEFAULT_SEGMENT_MAX_BYTES, read_only: bool = False):
+        self.directory = directory
+        self.fsync_policy = fsync_policy or FsyncPolicy.per_entry()
+        self.segment_max_bytes = segment_max_bytes
+        self.read_only = read_only
+        self._lock = threading.RLock()
+        self._segments: List[_Segment] = []
+        self._segment_starts: List[int] = []
+        self._offsets = array("Q")  # Offset of each record within its segment
+        self._fd: Optional[int] = None
+        self._unsynced = 0
+        self._closed = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+
+        if not read_only:
+            os.makedirs(directory, exist_ok=True)
+        self._recover()
+        if read_only and not self._segments:
+            raise ValueError(f"No ledger segments in {directory}")
+
+        if not read_only:
+            if not self._segments:
+                self._add_segment(0)
+            self._fd = os.open(self._segments[-1].path, os.O_WRONLY | os.O_APPEND)
+            if self.fsync_policy.mode == "INTERVAL":
+                self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+                self._flusher.start()
+
+    # --- Recovery ---
+
+    def _segment_path(self, base_index: int) -> str:
+        return os.path.join(self.directory, f"{base_index:020d}.seg")
+
+    def _recover(self):
+        names = sorted(n for n in os.listdir(self.directory) if n.endswith(".seg")) if os.path.isdir(self.directory) else []
+        for i, name in enumerate(names):
+            base_index = int(name[:-4])
+            if base_index != len(self._offsets):
+                raise ValueError(f"Segment gap: {name} does not start at entry {len(self._offsets)}")
+            segment = _Segment(os.path.join(self.directory, name), base_index)
+            good = self._scan(segment)
+            if good != segment.size:
+                if i != len(names) - 1 or self.read_only:
+                    raise ValueError(f"Corrupt record in sealed segment {name} at offset {good}")
+                with open(segment.path, "r+b") as f:
+                    f.truncate(good)
+                    os.fsync(f.fileno())
+                segment.size = good
+            self._segments.append(segment)
+            self._segment_starts.append(base_index)
+
+    def _scan(self, segment: _Segment) -> int:
+        """Indexes every intact record; returns the offset just past the last one."""
+        if segment.size == 0:
+            return 0
+        view = segment.view(segment.size)
+        pos = 0
+        while pos + _FRAME.size <= segment.size:
+            length, crc = _FRAME.unpack_from(view, pos)
+            end = pos + _FRAME.size + length
+            if end > segment.size or zlib.crc32(view[pos + _FRAME.size:end]) != crc:
+                break
+            self._offsets.append(pos)
+            pos = end
+        segment.release()
+        return pos
+
+    # --- Writes ---
+
+    def _add_segment(self, base_index: int):
+        segment = _Segment(self._segment_path(base_index), base_index)
+        open(segment.path, "ab").close()
+        self._segments.append(segment)
+        self._segment_starts.append(base_index)
+
+    def _roll(self):
+        os.fsync(self._fd)
+        os.close(self._fd)
+        self._unsynced = 0
+        self._add_segment(len(self._offsets))
+        self._fd = os.open(self._segments[-1].path, os.O_WRONLY | os.O_APPEND)
+        # The new directory entry must be durable before records in it are.
+        dir_fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+    def _write(self, frames: List[bytes]):
+        segment = self._segments[-1]
+        pending: List[bytes] = []
+        for frame in frames:
+            if segment.size and segment.size + len(frame) > self.segment_max_bytes:
+                if pending:
+                    os.write(self._fd, b"".join(pending))
+                    pending = []
+                self._roll()
+                segment = self._segments[-1]
+            self._offsets.append(segment.size)
+            segment.size += len(frame)
+            pending.append(frame)
+        if pending:
+            os.write(self._fd, b"".join(pending))
+        self._unsynced += len(frames)
+
+        policy = self.fsync_policy
+        if policy.mode == "ENTRY" or (policy.mode == "EVERY_N" and self._unsynced >= policy.every):
+            self._fsync()
+
+    def _fsync(self):
+        if self._unsynced:
+            os.fsync(self._fd)
+            self._unsynced = 0
+
+    def _flush_loop(self):
+        interval = self.fsync_policy.every / 1000
+        while not self._closed.wait(interval):
+            with self._lock:
+                if self._fd is not None:
+                    self._fsync()
+
+    def append(self, entry: LedgerEntry, idempotency_key: str, adc_key: Optional[str] = None):
+        self.append_many([(entry, idempotency_key, adc_key)])
+
+    def append_many(self, records: Iterable[Tuple[LedgerEntry, str, Optional[str]]]):
+        """Writes the whole batch with one write per segment and at most one fsync (group commit)."""
+        if self.read_only:
+            raise ValueError("Storage is read-only")
+        frames = [encode_record(entry, idem, adc) for entry, idem, adc in records]
+        if frames:
+            with self._lock:
+                self._write(frames)
+
+    def sync(self):
+        with self._lock:
+            if self._fd is not None:
+                self._fsync()
+
+    def close(self):
+        self._closed.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        with self._lock:
+            if self._fd is not None:
+                self._fsync()
+                os.close(self._fd)
+                self._fd = None
+            for segment in self._segments:
+                segment.release()
+
+    # --- Reads ---
+
+    def _body(self, index: int):
+        segment = self._segments[bisect_right(self._segment_starts, index) - 1]
+        offset = self._offsets[index]
+        view = segment.view(offset + _FRAME.size)
+        length, _ = _FRAME.unpack_from(view, offset)
+        start = offset + _FRAME.size
+        return segment.view(start + length)[start:start + length]
+
+    def get(self, index: int) -> LedgerEntry:
+        with self._lock:
+            body = self._body(index)
+        return decode_record(body)[0]
+
+    def iter_keys(self, start: int = 0) -> Iterator[Tuple[str, Optional[str]]]:
+        for i in range(start, len(self)):
+            with self._lock:
+                body = self._body(i)
+            yield _decode_keys(body)
+
+    def iter_entry_hashes(self, start: int = 0) -> Iterator[str]:
+        """Reads only the fixed-size digest header, skipping payload decoding."""
+        for i in range(start, len(self)):
+            with self._lock:
+                body = self._body(i)
+            yield body[:32].hex()
+
+    def iter_links(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Tuple[str, Optional[str], str]]:
+        """Reads only the digest header of each record."""
+        for i in range(start, len(self) if stop is None else stop):
+            with self._lock:
+                segment = self._segments[bisect_right(self._segment_starts, i) - 1]
+                begin = self._offsets[i] + _FRAME.size
+                header = segment.view(begin + 96)[begin:begin + 96]
+            prev_hash = header[32:64]
+            yield header[:32].hex(), prev_hash.hex() if prev_hash != _NO_PREV else None, header[64:].hex()
+
+    def spans(self, start: int, stop: int) -> List[Tuple[str, int, int]]:
+        """Splits entries[start:stop] into (segment path, byte offset, record count) pieces for iter_span."""
+        spans = []
+        with self._lock:
+            i = start
+            while i < stop:
+                s = bisect_right(self._segment_starts, i) - 1
+                segment_stop = self._segment_starts[s + 1] if s + 1 < len(self._segments) else len(self._offsets)
+                j = min(stop, segment_stop)
+                spans.append((self._segments[s].path, self._offsets[i], j - i))
+                i = j
+        return spans
+
+    def __len__(self) -> int:
+        return len(self._offsets)
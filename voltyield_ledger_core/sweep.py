@@ -0,0 +1,209 @@
+import os
+import sys
+import json
+import mmap
+import struct
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+from .regulatory import RegulatoryEngine
+from .rulepack import load_rulepack, rulepack_path
+
+_MAGIC = b"VYSWP1\n\x00"
+_LENGTH = struct.Struct("<Q")
+_ALIGN = 8
+DEFAULT_CHUNK_ASSETS = 2_000
+# Result columns in file order (all int64 minor units).
+COLUMNS = ("US_SEC_179_HEAVY", "US_MACRS_2026", "US_45W", "total_deduction_first_year")
+
+# Per-process engines by (rulepack version, rulepack file), reused by every chunk a worker runs.
+_engines: Dict[Tuple[str, str], RegulatoryEngine] = {}
+
+def _engine(version: str, path: str) -> RegulatoryEngine:
+    engine = _engines.get((version, path))
+    if engine is None:
+        engine = _engines[(version, path)] = RegulatoryEngine(version, load_rulepack(version, path))
+    return engine
+
+class SweepGrid:
+    """
+    A what-if grid: every asset under every rulepack version, placed-in-service date and
+    business-use percentage. A date of None keeps the asset's own date_service.
+    Rows are ordered version-major, then asset, date and business use, so row numbers are
+    fixed by the grid alone.
+    """
+    def __init__(self, assets: Sequence[Mapping[str, Any]], business_use_percents: Sequence[int],
+                 dates: Sequence[Optional[str]] = (None,), versions: Sequence[str] = ("default",)):
+        if not assets or not business_use_percents or not dates or not versions:
+            raise ValueError("Sweep grid has an empty axis")
+        self.asset_ids = [a.get("id") for a in assets]
+        self.cost_minor = [a.get("cost_minor", 0) for a in assets]
+        self.weight_lbs = [a.get("weight_lbs", 0) for a in assets]
+        self.date_service = [a.get("date_service", "") for a in assets]
+        self.business_use_percents = list(business_use_percents)
+        self.dates = list(dates)
+        self.versions = list(versions)
+
+    def __len__(self) -> int:
+        return len(self.versions) * len(self.asset_ids) * len(self.dates) * len(self.business_use_percents)
+
+    def scenario(self, row: int) -> Tuple[str, Optional[str], str, int]:
+        """(version, asset id, date_service, business_use_percent) of a row."""
+        rest, b = divmod(row, len(self.business_use_percents))
+        rest, d = divmod(rest, len(self.dates))
+        v, a = divmod(rest, len(self.asset_ids))
+        date = self.dates[d]
+        return self.versions[v], self.asset_ids[a], self.date_service[a] if date is None else date, self.business_use_percents[b]
+
+    def chunks(self, chunk_assets: int) -> Iterator[Tuple[int, str, Tuple[List[int], List[int], List[str]], List[Optional[str]], List[int]]]:
+        """Worker tasks: (first row, version, asset columns, dates, business uses)."""
+        per_asset = len(self.dates) * len(self.business_use_percents)
+        for v, version in enumerate(self.versions):
+            for start in range(0, len(self.asset_ids), chunk_assets):
+                stop = min(start + chunk_assets, len(self.asset_ids))
+                columns = (self.cost_minor[start:stop], self.weight_lbs[start:stop], self.date_service[start:stop])
+                yield (v * len(self.asset_ids) + start) * per_asset, version, columns, self.dates, self.business_use_percents
+
+def _run_chunk(task) -> Tuple[int, str, List[bytes]]:
+    """
+    Worker: evaluates one chunk with evaluate_fleet and returns its result columns as raw
+    int64 bytes, with the fingerprint of the engine that produced them.
+    """
+    first_row, version, path, (costs, weights, own_dates), dates, uses = task
+    per_asset = len(dates) * len(uses)
+    cost_col, weight_col, date_col, use_col = [], [], [], []
+    for cost, weight, own_date in zip(costs, weights, own_dates):
+        cost_col.extend([cost] * per_asset)
+        weight_col.extend([weight] * per_asset)
+        for date in dates:
+            date_col.extend([own_date if date is None else date] * len(uses))
+            use_col.extend(uses)
+    engine = _engine(version, path)
+    fleet = engine.evaluate_fleet(cost_col, weight_col, date_col, use_col)
+    return first_row, engine.get_fingerprint(), [column.tobytes() for column in fleet.columns().values()]
+
+def rulepack_paths(grid: SweepGrid) -> Dict[str, str]:
+    """Rulepack file per version, resolved once here so workers never depend on their own module state."""
+    return {version: os.path.abspath(rulepack_path(version)) for version in grid.versions}
+
+def iter_sweep(grid: SweepGrid, workers: Optional[int] = None, chunk_assets: int = DEFAULT_CHUNK_ASSETS) -> Iterator[Tuple[int, str, Dict[str, array]]]:
+    """
+    Yields (first row, rulepack fingerprint, {column: int64 array}) chunks in row order.
+    Chunks run across a process pool with a bounded number in flight, so memory stays
+    flat on large grids. Each task carries its rulepack file, so workers load the same
+    packs under any multiprocessing start method.
+    """
+    if chunk_assets < 1:
+        raise ValueError(f"Invalid chunk size: {chunk_assets}")
+    workers = workers or os.cpu_count() or 1
+    paths = rulepack_paths(grid)
+    tasks = ((first_row, version, paths[version], *rest) for first_row, version, *rest in grid.chunks(chunk_assets))
+    if workers <= 1 or len(grid.versions) * -(-len(grid.asset_ids) // chunk_assets) <= 1:
+        for first_row, fingerprint, blobs in map(_run_chunk, tasks):
+            yield first_row, fingerprint, _decode(blobs)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for task in tasks:
+            pending.append(pool.submit(_run_chunk, task))
+            if len(pending) >= 2 * workers:
+                first_row, fingerprint, blobs = pending.popleft().result()
+                yield first_row, fingerprint, _decode(blobs)
+        while pending:
+            first_row, fingerprint, blobs = pending.popleft().result()
+            yield first_row, fingerprint, _decode(blobs)
+
+def _decode(blobs: List[bytes]) -> Dict[str, array]:
+    columns = {}
+    for name, blob in zip(COLUMNS, blobs):
+        column = array("q")
+        column.frombytes(blob)
+        columns[name] = column
+    return columns
+
+def run_sweep(grid: SweepGrid, path: str, workers: Optional[int] = None, chunk_assets: int = DEFAULT_CHUNK_ASSETS) -> int:
+    """Streams the sweep into a columnar result file at `path` (see SweepResult); returns the row count."""
+    rows = len(grid)
+    paths = rulepack_paths(grid)
+    fingerprints = [_engine(v, paths[v]).get_fingerprint() for v in grid.versions]
+    per_version = rows // len(grid.versions)
+    header: Dict[str, Any] = {
+        "rows": rows,
+        "byteorder": sys.byteorder,
+        "versions": grid.versions,
+        "rulepack_fingerprints": fingerprints,
+        "asset_ids": grid.asset_ids,
+        "asset_dates": grid.date_service,
+        "dates": grid.dates,
+        "business_use_percents": grid.business_use_percents,
+        "columns": [],
+    }
+    # Header length depends on the offsets, so lay the columns out after a fixed-size header slot.
+    header_len = len(json.dumps(header).encode("utf-8")) + 64 * len(COLUMNS) + 64
+    offset = len(_MAGIC) + _LENGTH.size + header_len
+    for name in COLUMNS:
+        offset += -offset % _ALIGN
+        header["columns"].append([name, offset])
+        offset += rows * 8
+    encoded = json.dumps(header, separators=(",", ":")).encode("utf-8")
+
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_MAGIC + _LENGTH.pack(header_len) + encoded.ljust(header_len, b" "))
+        f.truncate(offset)
+        for first_row, fingerprint, columns in iter_sweep(grid, workers, chunk_assets):
+            expected = fingerprints[first_row // per_version]
+            if fingerprint != expected:
+                raise ValueError(f"Rows from {first_row} were evaluated under {fingerprint}, not {expected}")
+            for (_, column_offset), name in zip(header["columns"], COLUMNS):
+                f.seek(column_offset + first_row * 8)
+                columns[name].tofile(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return rows
+
+class SweepResult:
+    """A sweep result file mapped read-only; columns are int64 views over the file."""
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(_MAGIC)] != _MAGIC:
+            self._map.close()
+            raise ValueError(f"Not a sweep result: {path}")
+        (header_len,) = _LENGTH.unpack_from(self._map, len(_MAGIC))
+        start = len(_MAGIC) + _LENGTH.size
+        header = json.loads(self._map[start:start + header_len])
+        if header["byteorder"] != sys.byteorder:
+            self._map.close()
+            raise ValueError(f"Sweep result was written on a {header['byteorder']}-endian host: {path}")
+        self.header = header
+        self.rows = header["rows"]
+        self.grid = SweepGrid([{"id": i, "date_service": d} for i, d in zip(header["asset_ids"], header["asset_dates"])],
+                              header["business_use_percents"], header["dates"], header["versions"])
+        buffer = memoryview(self._map)
+        self.columns = {name: buffer[offset:offset + self.rows * 8].cast("q") for name, offset in header["columns"]}
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def __enter__(self) -> "SweepResult":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def row(self, row: int) -> Dict[str, Any]:
+        version, asset_id, date, business_use = self.grid.scenario(row)
+        result = {"version": version, "asset_id": asset_id, "date_service": date, "business_use_percent": business_use}
+        result.update((name, column[row]) for name, column in self.columns.items())
+        return result
+
+    def close(self):
+        if self._map is not None:
+            for column in self.columns.values():
+                column.release()
+            self.columns = {}
+            self._map.close()
+            self._map = None
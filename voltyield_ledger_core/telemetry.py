@@ -0,0 +1,302 @@
+import sys
+import json
+import math
+import mmap
+import struct
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+from .models import TelemetryEvent
+from .indexes import parse_timestamp_ms
+
+_MAGIC = b"VYTEL1\n\x00"
+_LENGTH = struct.Struct("<Q")
+_ALIGN = 8
+_EARTH_RADIUS_M = 6371000
+# math.radians(x) is x * (pi / 180); the scorer applies it inline so distances match haversine_meters bit for bit.
+_DEG_TO_RAD = math.pi / 180.0
+
+# (column name, array typecode) in file order.
+_COLUMNS = (
+    ("time_ms", "q"),
+    ("lat", "d"),
+    ("lon", "d"),
+    ("kwh_delivered", "q"),
+    ("asset", "I"),
+    ("status", "I"),
+    ("unbroken_lineage", "B"),
+)
+
+def format_timestamp_ms(ms: int) -> str:
+    """Epoch milliseconds -> ISO 8601 UTC ("Z"), with milliseconds only when non-zero."""
+    seconds, millis = divmod(ms, 1000)
+    text = datetime.fromtimestamp(seconds, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+    return f"{text}.{millis:03d}Z" if millis else f"{text}Z"
+
+def best_position(lat: float, lon: float, timestamp_ms: int, lats: Sequence[float], lons: Sequence[float],
+                  coss: Sequence[float], times: Sequence[int], assets: Sequence[str], positions: Iterable[int]) -> Optional[int]:
+    """
+    Position of the lowest (score, time diff, distance, asset id) row among `positions`,
+    earliest position on a full tie; None if there are none. Score is the stitch score:
+    haversine meters + ms / 100, computed from precomputed cos(lat) columns.
+    """
+    sin, sqrt, atan2 = math.sin, math.sqrt, math.atan2
+    k = _DEG_TO_RAD
+    R = _EARTH_RADIUS_M
+    cos_r = math.cos(lat * k)
+    best = None
+    best_key = None
+    for p in positions:
+        a = sin((lats[p] - lat) * k / 2)**2 + cos_r*coss[p]*sin((lons[p] - lon) * k / 2)**2
+        dist = 2 * R * atan2(sqrt(a), sqrt(1-a))
+        time_diff = abs(timestamp_ms - times[p])
+        key = (dist + (time_diff / 100), time_diff, dist, assets[p])
+        if best_key is None or key < best_key:
+            best_key, best = key, p
+    return best
+
+class _Decoded:
+    """Dictionary-encoded column read as its values."""
+    def __init__(self, codes: Sequence[int], values: List[str]):
+        self._codes = codes
+        self._values = values
+
+    def __getitem__(self, position: int) -> str:
+        return self._values[self._codes[position]]
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+class TelemetryView:
+    """
+    A time range of a TelemetryStore. Columns are memoryview slices of the store's
+    buffers, so creating a view copies nothing; call release() (or use it as a context
+    manager) before appending to an in-memory store again.
+    """
+
+    def __init__(self, store: "TelemetryStore", start: int, stop: int):
+        self.store = store
+        self.start = start
+        self.stop = stop
+        self.columns: Dict[str, memoryview] = {name: store._view(name)[start:stop] for name, _ in _COLUMNS}
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    def __enter__(self) -> "TelemetryView":
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+    def release(self):
+        for column in self.columns.values():
+            column.release()
+        self.columns = {}
+
+    @property
+    def time_ms(self) -> memoryview:
+        return self.columns["time_ms"]
+
+    @property
+    def kwh_delivered(self) -> memoryview:
+        return self.columns["kwh_delivered"]
+
+    def asset_ids(self) -> _Decoded:
+        return _Decoded(self.columns["asset"], self.store.asset_names)
+
+    def statuses(self) -> _Decoded:
+        return _Decoded(self.columns["status"], self.store.status_names)
+
+    def event(self, position: int) -> TelemetryEvent:
+        """Row `position` of this view as a TelemetryEvent (canonical UTC timestamp, no metadata)."""
+        c = self.columns
+        return TelemetryEvent(
+            asset_id=self.store.asset_names[c["asset"][position]],
+            timestamp_iso=format_timestamp_ms(c["time_ms"][position]),
+            lat=c["lat"][position],
+            lon=c["lon"][position],
+            kwh_delivered=c["kwh_delivered"][position],
+            status=self.store.status_names[c["status"][position]],
+            unbroken_lineage=bool(c["unbroken_lineage"][position]),
+        )
+
+    def __iter__(self) -> Iterator[TelemetryEvent]:
+        for position in range(len(self)):
+            yield self.event(position)
+
+    def best(self, lat: float, lon: float, timestamp_ms: int, positions: Optional[Sequence[int]] = None) -> Optional[int]:
+        """Stitch scoring over this view's rows; see best_position."""
+        coss = memoryview(self.store._cos_lat())[self.start:self.stop]
+        c = self.columns
+        return best_position(lat, lon, timestamp_ms, c["lat"], c["lon"], coss, c["time_ms"], self.asset_ids(),
+                             range(len(self)) if positions is None else positions)
+
+    # --- Aggregations ---
+
+    def _asset_code(self, asset_id: Optional[str]) -> Optional[int]:
+        return None if asset_id is None else self.store._asset_codes.get(asset_id, -1)
+
+    def kwh_total(self, asset_id: Optional[str] = None) -> int:
+        """Sum of kwh_delivered (integer minor units), optionally for one asset: the LCFS/AER input."""
+        code = self._asset_code(asset_id)
+        if code is None:
+            return sum(self.kwh_delivered)
+        return sum(k for k, a in zip(self.kwh_delivered, self.columns["asset"]) if a == code)
+
+    def kwh_by_asset(self) -> Dict[str, int]:
+        totals: Dict[int, int] = {}
+        for k, a in zip(self.kwh_delivered, self.columns["asset"]):
+            totals[a] = totals.get(a, 0) + k
+        names = self.store.asset_names
+        return {names[a]: total for a, total in sorted(totals.items(), key=lambda t: names[t[0]])}
+
+    def status_counts(self, asset_id: Optional[str] = None) -> Dict[str, int]:
+        """Rows per status, optionally for one asset (e.g. fast-charge share for battery analytics)."""
+        code = self._asset_code(asset_id)
+        counts: Dict[int, int] = {}
+        for s, a in zip(self.columns["status"], self.columns["asset"]):
+            if code is None or a == code:
+                counts[s] = counts.get(s, 0) + 1
+        names = self.store.status_names
+        return {names[s]: n for s, n in sorted(counts.items(), key=lambda t: names[t[0]])}
+
+class TelemetryStore:
+    """
+    Columnar telemetry kept in time order: epoch-ms timestamps parsed once on ingest,
+    lat/lon/kWh in typed arrays, asset_id and status dictionary-encoded. Time ranges are
+    zero-copy views. save() writes one file that open() maps read-only, so a persisted
+    store is paged in on demand instead of parsed. TelemetryEvent.metadata is not stored.
+    """
+
+    def __init__(self):
+        self._columns: Dict[str, Any] = {name: array(code) for name, code in _COLUMNS}
+        self.asset_names: List[str] = []
+        self.status_names: List[str] = []
+        self._asset_codes: Dict[str, int] = {}
+        self._status_codes: Dict[str, int] = {}
+        self._cos: Optional[array] = None
+        self._map: Optional[mmap.mmap] = None
+        self.read_only = False
+
+    def __len__(self) -> int:
+        return len(self._columns["time_ms"])
+
+    def _view(self, name: str) -> memoryview:
+        return memoryview(self._columns[name])
+
+    def _cos_lat(self) -> array:
+        # Derived column for stitch scoring, built on first use.
+        if self._cos is None or len(self._cos) != len(self):
+            cos, radians = math.cos, math.radians
+            self._cos = array("d", (cos(radians(lat)) for lat in self._columns["lat"]))
+        return self._cos
+
+    @staticmethod
+    def _encode(value: str, names: List[str], codes: Dict[str, int]) -> int:
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(names)
+            names.append(value)
+        return code
+
+    def extend(self, events: Iterable[TelemetryEvent]):
+        """Ingests events in any order; rows stay sorted by time (ties keep arrival order)."""
+        if self.read_only:
+            raise ValueError("Telemetry store is read-only")
+        rows = sorted(
+            ((parse_timestamp_ms(e.timestamp_iso), e.lat, e.lon, e.kwh_delivered,
+              self._encode(e.asset_id, self.asset_names, self._asset_codes),
+              self._encode(e.status, self.status_names, self._status_codes),
+              1 if e.unbroken_lineage else 0) for e in events),
+            key=lambda row: row[0],
+        )
+        if not rows:
+            return
+        c = self._columns
+        if len(self) and rows[0][0] < c["time_ms"][-1]:
+            # Out-of-order batch: merge with the existing rows and rebuild the columns.
+            existing = zip(*(c[name] for name, _ in _COLUMNS))
+            rows = sorted(list(existing) + rows, key=lambda row: row[0])
+            self._columns = c = {name: array(code) for name, code in _COLUMNS}
+        for (name, _), values in zip(_COLUMNS, zip(*rows)):
+            c[name].extend(values)
+
+    def append(self, event: TelemetryEvent):
+        self.extend([event])
+
+    def view(self, since_ms: Optional[int] = None, until_ms: Optional[int] = None) -> TelemetryView:
+        """Rows with since_ms <= time < until_ms (either bound optional), without copying."""
+        times = self._columns["time_ms"]
+        start = 0 if since_ms is None else bisect_left(times, since_ms)
+        stop = len(self) if until_ms is None else bisect_left(times, until_ms)
+        return TelemetryView(self, start, max(start, stop))
+
+    def kwh_total(self, since_ms: Optional[int] = None, until_ms: Optional[int] = None, asset_id: Optional[str] = None) -> int:
+        with self.view(since_ms, until_ms) as view:
+            return view.kwh_total(asset_id)
+
+    # --- Persistence ---
+
+    def save(self, path: str):
+        header: Dict[str, Any] = {
+            "count": len(self),
+            "byteorder": sys.byteorder,
+            "assets": self.asset_names,
+            "statuses": self.status_names,
+            "columns": [],
+        }
+        blobs = [self._columns[name].tobytes() for name, _ in _COLUMNS]
+        # Header length depends on the offsets, so lay the columns out after a fixed-size header slot.
+        header_len = len(json.dumps(header).encode("utf-8")) + 64 * len(_COLUMNS) + 64
+        offset = len(_MAGIC) + _LENGTH.size + header_len
+        for (name, code), blob in zip(_COLUMNS, blobs):
+            offset += -offset % _ALIGN
+            header["columns"].append([name, code, offset])
+            offset += len(blob)
+        encoded = json.dumps(header, separators=(",", ":")).encode("utf-8")
+        if len(encoded) > header_len:
+            raise ValueError("Telemetry header overflow")
+        with open(path, "wb") as f:
+            f.write(_MAGIC + _LENGTH.pack(header_len) + encoded.ljust(header_len, b" "))
+            for (_, _, column_offset), blob in zip(header["columns"], blobs):
+                f.write(b"\x00" * (column_offset - f.tell()))
+                f.write(blob)
+
+    @classmethod
+    def open(cls, path: str) -> "TelemetryStore":
+        """Maps a saved store read-only; columns are views over the file."""
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if mapped[:len(_MAGIC)] != _MAGIC:
+            mapped.close()
+            raise ValueError(f"Not a telemetry store: {path}")
+        (header_len,) = _LENGTH.unpack_from(mapped, len(_MAGIC))
+        start = len(_MAGIC) + _LENGTH.size
+        header = json.loads(mapped[start:start + header_len])
+        if header["byteorder"] != sys.byteorder:
+            mapped.close()
+            raise ValueError(f"Telemetry store was written on a {header['byteorder']}-endian host: {path}")
+
+        store = cls()
+        store._map = mapped
+        store.read_only = True
+        store.asset_names = header["assets"]
+        store.status_names = header["statuses"]
+        store._asset_codes = {name: i for i, name in enumerate(store.asset_names)}
+        store._status_codes = {name: i for i, name in enumerate(store.status_names)}
+        buffer = memoryview(mapped)
+        for name, code, offset in header["columns"]:
+            size = header["count"] * array(code).itemsize
+            store._columns[name] = buffer[offset:offset + size].cast(code)
+        return store
+
+    def close(self):
+        """Releases the file mapping of an opened store."""
+        if self._map is not None:
+            for column in self._columns.values():
+                column.release()
+            self._columns = {name: array(code) for name, code in _COLUMNS}
+            self._map.close()
+            self._map = None
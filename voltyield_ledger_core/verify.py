@@ -0,0 +1,116 @@
+import os
+import time
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Iterator, Optional, Tuple
+from .storage import LedgerStorage, SegmentStorage, iter_span
+
+DEFAULT_SHARD_SIZE = 50_000
+
+# progress(entries_done, entries_total, phase) with phase "HASH" or "CHAIN".
+ProgressCallback = Callable[[int, int, str], None]
+
+class VerificationReport:
+    def __init__(self, ok: bool, entries_checked: int, first_broken_index: Optional[int], reason: Optional[str], elapsed_seconds: float):
+        self.ok = ok
+        self.entries_checked = entries_checked
+        self.first_broken_index = first_broken_index
+        self.reason = reason
+        self.elapsed_seconds = elapsed_seconds
+
+    @property
+    def entries_per_second(self) -> int:
+        return int(self.entries_checked / self.elapsed_seconds) if self.elapsed_seconds else 0
+
+    def as_dict(self) -> dict:
+        return {
+            "ok": self.ok,
+            "entries_checked": self.entries_checked,
+            "first_broken_index": self.first_broken_index,
+            "reason": self.reason,
+            "elapsed_seconds": self.elapsed_seconds,
+            "entries_per_second": self.entries_per_second,
+        }
+
+def _hash_shard(task: Tuple[int, str, Any]) -> Tuple[int, int, Optional[int]]:
+    """
+    Worker: recomputes entry hashes for one shard.
+    Returns (first index, entry count, first index whose payload does not hash to its entry_hash).
+    """
+    start, kind, source = task
+    if kind == "SPANS":
+        records: Iterator[Tuple[bytes, bytes]] = (r for path, begin, count in source for r in iter_span(path, begin, count))
+    else:
+        records = iter(source)
+
+    sha256 = hashlib.sha256
+    index = start
+    broken = None
+    for entry_hash, canonical in records:
+        if broken is None and sha256(canonical).digest() != entry_hash:
+            broken = index
+        index += 1
+    return start, index - start, broken
+
+def _shards(storage: LedgerStorage, size: int, shard_size: int) -> Iterator[Tuple[int, str, Any]]:
+    for start in range(0, size, shard_size):
+        stop = min(start + shard_size, size)
+        if isinstance(storage, SegmentStorage):
+            # Workers map the segment files themselves; only offsets cross the process boundary.
+            yield start, "SPANS", storage.spans(start, stop)
+        else:
+            # Hashed in process, so entries are streamed rather than copied into each task.
+            yield start, "RECORDS", ((e.entry_digest, e.canonical) for e in map(storage.get, range(start, stop)))
+
+def verify_storage(storage: LedgerStorage, workers: Optional[int] = None, shard_size: int = DEFAULT_SHARD_SIZE,
+                   progress: Optional[ProgressCallback] = None) -> VerificationReport:
+    """
+    Full-chain integrity check of the entries present when the call starts.
+    Phase 1 recomputes every entry_hash from its canonical payload across a process
+    pool in sharded ranges; phase 2 checks every prev_hash/chain_hash link in one
+    sequential pass. Reports the first broken index found by either phase.
+    Only SegmentStorage is hashed in parallel; other storage is hashed in process.
+    """
+    started = time.perf_counter()
+    size = len(storage)
+    workers = workers or os.cpu_count() or 1
+    first_broken: Optional[int] = None
+    reason: Optional[str] = None
+
+    # Phase 1: entry hashes, in parallel
+    shards = _shards(storage, size, shard_size)
+    if workers > 1 and size > shard_size and isinstance(storage, SegmentStorage):
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(_track(pool.map(_hash_shard, shards), size, progress))
+    else:
+        results = list(_track(map(_hash_shard, shards), size, progress))
+    for _, _, broken in results:
+        if broken is not None and (first_broken is None or broken < first_broken):
+            first_broken, reason = broken, "ENTRY_HASH_MISMATCH"
+
+    # Phase 2: chain links, sequential
+    sha256 = hashlib.sha256
+    prev_chain: Optional[str] = None
+    done = 0
+    for index, (entry_hash, prev_hash, chain_hash) in enumerate(storage.iter_links(0, size)):
+        if first_broken is not None and index >= first_broken:
+            break
+        if prev_hash != prev_chain or sha256(((prev_hash or "") + entry_hash).encode()).hexdigest() != chain_hash:
+            first_broken, reason = index, "CHAIN_LINK_BROKEN"
+            break
+        prev_chain = chain_hash
+        done = index + 1
+        if progress is not None and done % shard_size == 0:
+            progress(done, size, "CHAIN")
+    if progress is not None:
+        progress(size if first_broken is None else done, size, "CHAIN")
+
+    return VerificationReport(first_broken is None, size, first_broken, reason, time.perf_counter() - started)
+
+def _track(results: Iterator[Tuple[int, int, Optional[int]]], total: int, progress: Optional[ProgressCallback]) -> Iterator[Tuple[int, int, Optional[int]]]:
+    done = 0
+    for result in results:
+        done += result[1]
+        if progress is not None:
+            progress(done, total, "HASH")
+        yield result
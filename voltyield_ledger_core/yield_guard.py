@@ -1,58 +1,462 @@
-from typing import List, Dict
+import time
+from heapq import heapify, heappop, heappush
+from itertools import product
+from math import gcd
+from typing import Dict, Hashable, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
 from .regulatory import RuleResult
 from .models import BasisSlice
 
+MODES = ("GREEDY", "EXACT")
+# Largest subset-sum bitset (bits per category, times its whole rules) before falling back to branch and bound.
+_MAX_DP_BITS = 1 << 28
+
 class YieldPlan:
-    def __init__(self, chosen_incentives: List[RuleResult], total_yield: int):
+    def __init__(self, chosen_incentives: List[RuleResult], total_yield: int, optimal: bool = False):
         self.chosen_incentives = chosen_incentives
         self.total_yield = total_yield
+        # True when the exact search finished within its time budget.
+        self.optimal = optimal
+
+class _BudgetExceeded(Exception):
+    pass
+
+class _Found(Exception):
+    pass
+
+class _Item:
+    __slots__ = ("rule", "category", "amount", "group", "partial")
+
+    def __init__(self, rule: RuleResult, category: int, group: int, partial: bool):
+        self.rule = rule
+        self.category = category
+        self.amount = rule.amount
+        self.group = group
+        self.partial = partial
 
 class YieldOptimizer:
-    def optimize(self, results: List[RuleResult], total_basis: Dict[str, int]) -> YieldPlan:
+    """
+    Picks incentives whose claims fit the available basis per category. GREEDY is the
+    original highest-amount-first pass. EXACT maximizes the total claim with a memoized
+    branch and bound, honouring exclusivity groups (at most one rule per group) and
+    partial application (a listed rule may claim less than its amount to use up the
+    basis left in its category). If the search runs past `time_budget_seconds`, the
+    greedy plan is returned with optimal=False.
+    """
+
+    def __init__(self, mode: str = "GREEDY", time_budget_seconds: float = 1.0):
+        if mode not in MODES:
+            raise ValueError(f"Unknown optimizer mode: {mode}")
+        self.mode = mode
+        self.time_budget_seconds = time_budget_seconds
+
+    def optimize(self, results: List[RuleResult], total_basis: Union[Dict[str, int], Sequence[BasisSlice]],
+                 exclusive_groups: Optional[Iterable[Iterable[str]]] = None,
+                 partial_rules: Optional[Iterable[str]] = None) -> YieldPlan:
         """
         results: Available incentives
-        total_basis: Map of category -> available minor units (e.g., {"EQUIPMENT": 500000})
+        total_basis: Map of category -> available minor units (e.g., {"EQUIPMENT": 500000}),
+                     or BasisSlices, summed per category
+        exclusive_groups: Sets of rule ids of which at most one may be claimed
+        partial_rules: Rule ids that may be claimed in part
         """
+        basis = _basis_by_category(total_basis)
+        group_of: Dict[str, int] = {}
+        for g, group in enumerate(exclusive_groups or ()):
+            for rule_id in group:
+                if rule_id in group_of:
+                    raise ValueError(f"Rule {rule_id} is in more than one exclusive group")
+                group_of[rule_id] = g
+        partial = set(partial_rules or ())
+
         # 1. Filter and prioritize by highest yield (Greedy Deterministic)
         eligible = [r for r in results if r.eligible]
-        eligible.sort(key=lambda x: (-x.amount, x.rule_id))
-
-        chosen = []
-        remaining_basis = total_basis.copy()
-        total_yield = 0
-
-        for rule in eligible:
-            # Check if this rule requires a specific basis category
-            # For this demo, we assume rules consume from "GENERAL" unless specified in trace
-            category = rule.trace.get("basis_category", "GENERAL")
-
-            # If the rule doesn't specify a basis consumption amount, we assume it consumes its own amount
-            # or 0 if it's a tax credit that doesn't reduce basis?
-            # The prompt implies "stackable only up to 100% of the cost".
-            # So the claim amount consumes the basis.
-            # But wait, a 30% credit on $100k cost is $30k credit.
-            # Does it consume $30k of basis or $100k?
-            # Usually "basis" means the cost.
-            # If I claim a credit ON the cost, I usually use up that cost "slot" if it's mutually exclusive.
-            # If they stack, maybe I don't use it up.
-            # The prompt says: "if two incentives are mutually exclusive... or stackable... optimizer must ensure sum of claims does not exceed underlying value."
-            # It also says: "basis slices / claim scopes represented explicitly... solver prevents overlapping claims unless explicitly allowed."
-            # The code snippet provided in the "Coding partner" response uses:
-            # `required_amount = rule.amount`
-            # `if remaining_basis... >= required_amount`
-            # This implies the credit amount reduces the available basis dollar-for-dollar?
-            # That seems like a simplification (credit vs basis), but I will follow the provided snippet exactly.
-
-            required_amount = rule.amount
-
-            # Deterministic double-dip check
-            if remaining_basis.get(category, 0) >= required_amount:
-                # Deduct from available basis
-                remaining_basis[category] -= required_amount
-                total_yield += required_amount
-                chosen.append(rule)
-            else:
-                # Rule is skipped or partially applied if basis is exhausted
+        eligible.sort(key=_priority)
+        categories = sorted({_category(r) for r in eligible})
+        index = {c: i for i, c in enumerate(categories)}
+        items = [_Item(r, index[_category(r)], group_of.get(r.rule_id, -1), r.rule_id in partial) for r in eligible]
+        capacity = tuple(basis.get(c, 0) for c in categories)
+
+        claims = None
+        if self.mode == "EXACT":
+            try:
+                claims = _exact_claims(items, capacity, time.monotonic() + self.time_budget_seconds)
+            except _BudgetExceeded:
+                claims = None
+        optimal = claims is not None
+        if claims is None:
+            claims = _greedy_claims(items, capacity)
+
+        chosen = [_claimed(item.rule, claim) for item, claim in zip(items, claims) if claim is not None]
+        return YieldPlan(chosen, sum(c for c in claims if c), optimal)
+
+def _category(rule: RuleResult) -> str:
+    # For this demo, we assume rules consume from "GENERAL" unless specified in trace
+    return rule.trace.get("basis_category", "GENERAL")
+
+def _priority(rule: RuleResult) -> Tuple[int, str, str, str]:
+    return -rule.amount, rule.rule_id, _category(rule), rule.citation
+
+def _basis_by_category(total_basis: Union[Mapping[str, int], Sequence[BasisSlice]]) -> Dict[str, int]:
+    if isinstance(total_basis, Mapping):
+        return dict(total_basis)
+    basis: Dict[str, int] = {}
+    for basis_slice in total_basis:
+        basis[basis_slice.category] = basis.get(basis_slice.category, 0) + basis_slice.amount_minor
+    return basis
+
+def _claimed(rule: RuleResult, claim: int) -> RuleResult:
+    """The rule as chosen: itself, or a copy marked as applied in part."""
+    if claim == rule.amount:
+        return rule
+    trace = dict(rule.trace, applied_partially=True, full_amount=rule.amount)
+    return RuleResult(rule.rule_id, rule.eligible, claim, trace, rule.citation)
+
+def _claim(item: _Item, left: int, groups: int) -> Optional[int]:
+    """What `item` would claim with `left` basis in its category; None if it cannot be chosen."""
+    if item.group >= 0 and groups >> item.group & 1:
+        return None
+    if left >= item.amount:
+        return item.amount
+    if item.partial and left > 0:
+        return left
+    return None
+
+def _greedy_claims(items: List[_Item], capacity: Tuple[int, ...]) -> List[Optional[int]]:
+    """
+    The claim amount consumes the basis dollar-for-dollar; a rule that does not fit is
+    skipped, or claimed in part when allowed. At most one rule per exclusive group.
+    """
+    remaining = list(capacity)
+    groups = 0
+    claims: List[Optional[int]] = []
+    for item in items:
+        claim = _claim(item, remaining[item.category], groups)
+        if claim is not None:
+            remaining[item.category] -= claim
+            if item.group >= 0:
+                groups |= 1 << item.group
+        claims.append(claim)
+    return claims
+
+def _exact_claims(items: List[_Item], capacity: Tuple[int, ...], deadline: float) -> List[Optional[int]]:
+    """
+    Maximum total claim. Categories only interact through exclusive groups, so the rules
+    split into independent components that are solved one at a time.
+    """
+    parent = list(range(len(capacity)))
+
+    def find(c: int) -> int:
+        while parent[c] != c:
+            parent[c] = parent[parent[c]]
+            c = parent[c]
+        return c
+
+    first_in_group: Dict[int, int] = {}
+    for item in items:
+        if item.group >= 0:
+            other = find(first_in_group.setdefault(item.group, item.category))
+            here = find(item.category)
+            parent[max(other, here)] = min(other, here)
+    components: Dict[int, List[int]] = {}
+    for k, item in enumerate(items):
+        components.setdefault(find(item.category), []).append(k)
+
+    claims: List[Optional[int]] = [None] * len(items)
+    for root in sorted(components):
+        members = components[root]
+        component = [items[k] for k in members]
+        solved = _solve_by_sums(component, capacity, deadline)
+        if solved is None:
+            solved = _branch_and_bound(component, capacity, deadline)
+        for k, claim in zip(members, solved):
+            claims[k] = claim
+    return claims
+
+def _solve_by_sums(items: List[_Item], capacity: Tuple[int, ...], deadline: float) -> Optional[List[Optional[int]]]:
+    """
+    Given which member (if any) of each exclusive group is taken, categories are
+    independent: the best claim in a category is min(basis, S + P), where P is the sum
+    of its partial rules and S the largest subset sum of its whole rules that fits.
+    Subset sums are a DP over the basis in units of the gcd of the amounts, held as an
+    integer bitset. Group choices are enumerated (members in priority order, then none)
+    with S memoized per (category, extra members). None if a bitset would be too large.
+    """
+    categories = sorted({item.category for item in items})
+    scale: Dict[int, int] = {}
+    for c in categories:
+        g = capacity[c]
+        for item in items:
+            if item.category == c and not item.partial:
+                g = gcd(g, item.amount)
+        scale[c] = g or 1
+        whole = sum(1 for item in items if item.category == c and not item.partial)
+        if (capacity[c] // scale[c] + 1) * (whole + 1) > _MAX_DP_BITS:
+            return None
+
+    def reachable(bits: int, amounts: Iterable[int], c: int) -> int:
+        mask = (1 << (capacity[c] // scale[c] + 1)) - 1
+        for amount in amounts:
+            bits |= (bits << (amount // scale[c])) & mask
+        return bits
+
+    free = [item for item in items if item.group < 0]
+    base = {c: reachable(1, (i.amount for i in free if i.category == c and not i.partial), c) for c in categories}
+    free_partial = {c: sum(i.amount for i in free if i.category == c and i.partial) for c in categories}
+    groups: Dict[int, List[_Item]] = {}
+    for item in items:
+        if item.group >= 0:
+            groups.setdefault(item.group, []).append(item)
+    options = [groups[g] + [None] for g in sorted(groups)]
+    ceiling = sum(min(capacity[c], sum(i.amount for i in items if i.category == c)) for c in categories)
+    best_sum: Dict[Tuple[int, Tuple[int, ...]], int] = {}
+
+    def category_sum(c: int, extra: Tuple[int, ...]) -> int:
+        key = (c, extra)
+        found = best_sum.get(key)
+        if found is None:
+            found = best_sum[key] = (reachable(base[c], extra, c).bit_length() - 1) * scale[c]
+        return found
+
+    best_value, best_picks = -1, None
+    checked = 0
+    for picks in product(*options):
+        checked += 1
+        if not checked & 255 and time.monotonic() > deadline:
+            raise _BudgetExceeded()
+        value = 0
+        for c in categories:
+            extra = tuple(p.amount for p in picks if p is not None and p.category == c and not p.partial)
+            partial = free_partial[c] + sum(p.amount for p in picks if p is not None and p.category == c and p.partial)
+            value += min(capacity[c], category_sum(c, extra) + partial)
+        if value > best_value:
+            best_value, best_picks = value, picks
+            if value >= ceiling:
+                break
+
+    # Rebuild the claims for the winning choice, preferring higher-priority rules.
+    taken = {id(p) for p in best_picks if p is not None}
+    claims: List[Optional[int]] = [None] * len(items)
+    for c in categories:
+        members = [k for k, item in enumerate(items) if item.category == c and (item.group < 0 or id(item) in taken)]
+        whole = [k for k in members if not items[k].partial]
+        extra = tuple(items[k].amount for k in whole if items[k].group >= 0)
+        target = category_sum(c, extra) // scale[c]
+        # suffix[j]: sums reachable with whole[j:]
+        suffix = [1] * (len(whole) + 1)
+        for j in range(len(whole) - 1, -1, -1):
+            suffix[j] = reachable(suffix[j + 1], (items[whole[j]].amount,), c)
+        for j, k in enumerate(whole):
+            units = items[k].amount // scale[c]
+            if units <= target and suffix[j + 1] >> (target - units) & 1:
+                claims[k] = items[k].amount
+                target -= units
+        left = capacity[c] - category_sum(c, extra)
+        for k in members:
+            if items[k].partial:
+                claim = _claim(items[k], left, 0)
+                if claim is not None:
+                    claims[k] = claim
+                    left -= claim
+    return claims
+
+def _branch_and_bound(items: List[_Item], capacity: Tuple[int, ...], deadline: float) -> List[Optional[int]]:
+    """
+    Branch and bound, including before skipping, starting from the greedy plan as the
+    incumbent. Whole rules are decided first in priority order, then partial rules, which
+    take what is left in their category (value equals basis used, so filling leftovers
+    last loses nothing). The value so far is the basis used, so a state (rule, remaining
+    basis, groups taken) fully determines the subproblem: each is explored at most once.
+    A branch is cut when used basis plus its bound (per category, the lesser of the basis
+    left and the amounts still ahead) cannot strictly beat the incumbent; the search
+    stops early once the incumbent reaches the bound at the root. Only strict
+    improvements replace the incumbent, so ties resolve the same way on every run.
+    """
+    greedy = _greedy_claims(items, capacity)
+    best_value = sum(c for c in greedy if c)
+    order = sorted(range(len(items)), key=lambda k: (items[k].partial, k))
+    ordered = [items[k] for k in order]
+    count = len(ordered)
+    # ahead[i][c]: total amount of rules i.. in category c
+    ahead = [[0] * len(capacity) for _ in range(count + 1)]
+    for i in range(count - 1, -1, -1):
+        ahead[i] = list(ahead[i + 1])
+        ahead[i][ordered[i].category] += ordered[i].amount
+
+    def bound(i: int, remaining: Tuple[int, ...]) -> int:
+        return sum(r if r < a else a for r, a in zip(remaining, ahead[i]))
+
+    total = sum(capacity)
+    ceiling = bound(0, capacity)
+    if best_value >= ceiling:
+        return greedy
+
+    best: Dict[str, Optional[List[Optional[int]]]] = {"claims": None}
+    path: List[Optional[int]] = [None] * count
+    seen = set()
+
+    def search(i: int, remaining: Tuple[int, ...], groups: int):
+        nonlocal best_value
+        used = total - sum(remaining)
+        if used + bound(i, remaining) <= best_value:
+            return
+        if i == count:
+            best_value = used
+            best["claims"] = list(path)
+            if used >= ceiling:
+                raise _Found()
+            return
+        key = (i, remaining, groups)
+        if key in seen:
+            return
+        seen.add(key)
+        if not len(seen) & 1023 and time.monotonic() > deadline:
+            raise _BudgetExceeded()
+
+        item = ordered[i]
+        left = remaining[item.category]
+        take = _claim(item, left, groups)
+        if take is not None:
+            path[i] = take
+            c = item.category
+            search(i + 1, remaining[:c] + (left - take,) + remaining[c + 1:], groups | (1 << item.group if item.group >= 0 else 0))
+            path[i] = None
+        search(i + 1, remaining, groups)
+
+    try:
+        search(0, capacity, 0)
+    except _Found:
+        pass
+    if best["claims"] is None:
+        return greedy
+    claims: List[Optional[int]] = [None] * count
+    for i, claim in enumerate(best["claims"]):
+        claims[order[i]] = claim
+    return claims
+
+class SharedPool:
+    """
+    A cap shared across a fleet: claims of `rule_ids` by `asset_ids` (every asset when
+    None) draw on `cap_minor` together, e.g. one taxpayer's Section 179 limit or an LCFS
+    program allocation.
+    """
+    def __init__(self, pool_id: str, cap_minor: int, rule_ids: Iterable[str], asset_ids: Optional[Iterable[Hashable]] = None):
+        if cap_minor < 0:
+            raise ValueError(f"Invalid cap for pool {pool_id}: {cap_minor}")
+        self.pool_id = pool_id
+        self.cap_minor = cap_minor
+        self.rule_ids = frozenset(rule_ids)
+        self.asset_ids = None if asset_ids is None else frozenset(asset_ids)
+
+class FleetPlan:
+    def __init__(self, plans: Dict[Hashable, YieldPlan], total_yield: int, pool_usage: Dict[str, int]):
+        # asset id -> that asset's chosen incentives
+        self.plans = plans
+        self.total_yield = total_yield
+        # pool id -> minor units claimed against it
+        self.pool_usage = pool_usage
+
+class FleetOptimizer:
+    """
+    Greedy plan for a whole fleet under shared pools. Every eligible (asset, rule) claim
+    sits in one priority queue keyed by what it could claim now: the lesser of its amount,
+    the asset's basis left in its category and what is left in each pool it draws on. The
+    top claim is re-checked when popped and pushed back if pools have shrunk since it was
+    queued; claims only ever shrink, so the queue is never rebuilt. Ties break on asset id
+    and then the YieldOptimizer rule order, so the plan does not depend on input order.
+    Exclusive groups and partial rules apply per asset, as in YieldOptimizer.
+    """
+
+    def __init__(self, pools: Iterable[SharedPool] = (), exclusive_groups: Optional[Iterable[Iterable[str]]] = None,
+                 partial_rules: Optional[Iterable[str]] = None):
+        self.pools = sorted(pools, key=lambda p: p.pool_id)
+        ids = [p.pool_id for p in self.pools]
+        if len(set(ids)) != len(ids):
+            raise ValueError("Duplicate pool id")
+        self.group_of: Dict[str, int] = {}
+        for g, group in enumerate(exclusive_groups or ()):
+            for rule_id in group:
+                if rule_id in self.group_of:
+                    raise ValueError(f"Rule {rule_id} is in more than one exclusive group")
+                self.group_of[rule_id] = g
+        self.partial_rules = frozenset(partial_rules or ())
+
+    def optimize(self, results: Mapping[Hashable, List[RuleResult]],
+                 basis: Optional[Mapping[Hashable, Union[Dict[str, int], Sequence[BasisSlice]]]] = None) -> FleetPlan:
+        """
+        results: asset id -> available incentives
+        basis: asset id -> that asset's basis per category (as for YieldOptimizer); when
+               None, claims are limited by the pools alone
+        """
+        pools = self.pools
+        # Pools a claim draws on, by rule id (fleet-wide pools) and by (asset id, rule id).
+        fleet_pools: Dict[str, Tuple[int, ...]] = {}
+        asset_pools: Dict[Tuple[Hashable, str], Tuple[int, ...]] = {}
+        for p, pool in enumerate(pools):
+            for rule_id in pool.rule_ids:
+                if pool.asset_ids is None:
+                    fleet_pools[rule_id] = fleet_pools.get(rule_id, ()) + (p,)
+                else:
+                    for asset_id in pool.asset_ids:
+                        asset_pools[(asset_id, rule_id)] = asset_pools.get((asset_id, rule_id), ()) + (p,)
+        pool_left = [pool.cap_minor for pool in pools]
+
+        asset_ids = sorted(results)
+        categories: Dict[str, int] = {}
+        items: List[_Item] = []
+        owner: List[int] = []
+        draws: List[Tuple[int, ...]] = []
+        for a, asset_id in enumerate(asset_ids):
+            eligible = [r for r in results[asset_id] if r.eligible]
+            eligible.sort(key=_priority)
+            for rule in eligible:
+                category = categories.setdefault(_category(rule), len(categories))
+                items.append(_Item(rule, category, self.group_of.get(rule.rule_id, -1), rule.rule_id in self.partial_rules))
+                owner.append(a)
+                draws.append(fleet_pools.get(rule.rule_id, ()) + asset_pools.get((asset_id, rule.rule_id), ()))
+
+        basis_left: Optional[List[Dict[int, int]]] = None
+        if basis is not None:
+            basis_left = []
+            for asset_id in asset_ids:
+                by_category = _basis_by_category(basis.get(asset_id, {}))
+                basis_left.append({categories[c]: amount for c, amount in by_category.items() if c in categories})
+        groups = [0] * len(asset_ids)
+        claims: List[Optional[int]] = [None] * len(items)
+
+        # Entries are -claim * n + k (plain ints compare faster than tuples): largest claim first, then item order.
+        n = len(items)
+        heap = [-item.amount * n + k for k, item in enumerate(items)]
+        heapify(heap)
+        while heap:
+            queued, k = divmod(heappop(heap), n)
+            item, a = items[k], owner[k]
+            left = item.amount
+            if basis_left is not None:
+                left = min(left, basis_left[a].get(item.category, 0))
+            for p in draws[k]:
+                if pool_left[p] < left:
+                    left = pool_left[p]
+            claim = _claim(item, left, groups[a])
+            if claim is None:
+                # Basis and pools only shrink and groups only fill, so it never fits again.
+                continue
+            if claim < -queued:
+                heappush(heap, -claim * n + k)
                 continue
+            claims[k] = claim
+            if basis_left is not None:
+                basis_left[a][item.category] -= claim
+            for p in draws[k]:
+                pool_left[p] -= claim
+            if item.group >= 0:
+                groups[a] |= 1 << item.group
 
-        return YieldPlan(chosen, total_yield)
+        chosen: Dict[int, List[RuleResult]] = {}
+        totals = [0] * len(asset_ids)
+        for k, claim in enumerate(claims):
+            if claim is not None:
+                chosen.setdefault(owner[k], []).append(_claimed(items[k].rule, claim))
+                totals[owner[k]] += claim
+        plans = {asset_id: YieldPlan(chosen.get(a, []), totals[a]) for a, asset_id in enumerate(asset_ids)}
+        pool_usage = {pool.pool_id: pool.cap_minor - left for pool, left in zip(pools, pool_left)}
+        return FleetPlan(plans, sum(totals), pool_usage)